@@ -11,38 +11,33 @@ deepflood论坛签到插件
 """
 import time
 import random
+import hashlib
+import threading
 import traceback
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
-import pytz
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 
 from app.core.config import settings
 from app.plugins import _PluginBase
 from typing import Any, List, Dict, Tuple, Optional
 from app.log import logger
+from app import schemas
 from app.schemas import NotificationType
-import requests
-from urllib.parse import urlencode
-import json
-
-# cloudscraper 作为 Cloudflare 备用方案
-try:
-    import cloudscraper
-    HAS_CLOUDSCRAPER = True
-except Exception:
-    HAS_CLOUDSCRAPER = False
-
-# 尝试导入curl_cffi库，用于绕过CloudFlare防护
-try:
-    from curl_cffi import requests as curl_requests
-    HAS_CURL_CFFI = True
-except ImportError:
-    HAS_CURL_CFFI = False
-
-
-class deepfloodsign(_PluginBase):
+from .signkit import (DEEPFLOOD_MESSAGE, DEEPFLOOD_PAGE, HAS_CLOUDSCRAPER, HAS_CURL_CFFI, EXPORT_FORMATS,
+                      CancelToken, Cancelled, NotificationQueue, OffsetCronTrigger, SignSite, RunProfile,
+                      Transport, admission, background, backend_headers, cancellable_sleep, check_cancelled,
+                      clock, clock_alert, current_profile, decode_json, exchanges_card, in_range, is_cancelled,
+                      latency, orchestrator, parse_day, profiled, release_transport, reload_plan, run_deadline,
+                      server_clock, shared_transport, singleflight, sleep_until, span, spread_offset,
+                      start_deadline, stream_export, timing_card)
+
+# 论坛按北京时间零点重置签到
+FORUM_TZ = ZoneInfo('Asia/Shanghai')
+
+
+class deepfloodsign(_PluginBase, SignSite):
     # 插件名称
     plugin_name = "deepflood论坛签到"
     # 插件描述
@@ -50,7 +45,7 @@ class deepfloodsign(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/kimjioo/MoviePilot-Plugins/main/icon/deepflood.png"
     # 插件版本
-    plugin_version = "1.1.0"
+    plugin_version = "1.2.0"
     # 插件作者
     plugin_author = "kimjioo"
     # 作者主页
@@ -61,6 +56,10 @@ class deepfloodsign(_PluginBase):
     plugin_order = 1
     # 可使用的用户级别
     auth_level = 2
+    # 统一签到站点信息
+    site_name = "deepflood"
+    site_host = "www.deepflood.com"
+    site_tz = FORUM_TZ
 
     # 私有属性
     _enabled = False
@@ -74,23 +73,65 @@ class deepfloodsign(_PluginBase):
     _use_proxy = True     # 是否使用代理，默认启用
     _max_retries = 3      # 最大重试次数
     _retry_count = 0      # 当天重试计数
-    _scheduled_retry = None  # 计划的重试任务
+    _scheduled_retry = None  # 计划的重试任务 ID
     _verify_ssl = False    # 是否验证SSL证书，默认禁用
     _min_delay = 5         # 请求前最小随机等待（秒）
     _max_delay = 12        # 请求前最大随机等待（秒）
     _member_id = ""       # deepflood 成员ID（可选，用于获取用户信息）
     _stats_days = 30
+    _batch_sign = False    # 是否参与统一签到
+    _http2 = False         # HTTP/2 模式：curl_cffi 协商 h2，补充信息请求在同一连接上并发
+    _race_mode = False     # 抢签模式：论坛日切换前预热连接，零点整发出签到请求
+    _race_lead = 10        # 抢签预热提前量（秒）
+    _race_margin = 30      # 抢签触发时刻允许偏离预热提前量的范围（秒），超出则放弃本次抢签
+    _isolate_scraper = False  # cloudscraper 在子进程中执行，挑战求解不占用 MoviePilot 进程
+    _run_deadline = 90  # 单次签到（不含随机等待）的总时限（秒）
+    _enrich_ttl = 6 * 3600  # 用户信息/收益统计缓存有效期（秒），过期后打开详情页时后台刷新
+    _stop_timeout = 5  # 停止插件时等待进行中签到退出的上限（秒）
+    _export_max_pages = 500  # 导出收支明细时最多翻页数
+    # 导出签到历史的列
+    _history_fields = ("date", "status", "message", "gain", "rank", "total_signers", "race_delta")
+    _spread_window = 0     # 错峰窗口（秒），按账号确定性推迟触发
+    _probe_ahead = 3600    # Cookie 预检提前量（秒）
+    _probe_ttl = 6 * 3600  # Cookie 预检结果有效期（秒）
+
+    _transport: Optional[Transport] = None  # 共用传输层（连接池 + 多后端回退）
+    _notify_queue: Optional[NotificationQueue] = None  # 异步通知队列
+    _cancel: Optional[CancelToken] = None  # 本次加载的取消令牌，stop_service 时取消
+    _applied_config: Optional[dict] = None  # 上次生效的配置，表单保存时与之比较做增量重载
 
-    _scraper = None        # cloudscraper 实例
+    # 配置项变化时需要重建的部分，空元组表示直接生效；未登记的配置项变化时全量重载
+    # lifecycle：停止进行中的签到与重试后重新开始；schedule：由 get_service 重新注册
+    _reload_effects = {
+        "enabled": ("lifecycle",),
+        "cookie": ("lifecycle", "transport"),
+        "use_proxy": ("transport",),
+        "verify_ssl": ("transport",),
+        "http2": ("transport",),
+        "isolate_scraper": ("transport",),
+        "cron": ("schedule",),
+        "spread_window": ("schedule",),
+        "race_mode": ("schedule",),
+        "race_lead": ("schedule",),
+        "batch_sign": ("batch", "schedule"),
+        "history_days": ("retention",),
+        "member_id": ("enrich",),
+        "stats_days": ("enrich",),
+        "notify": (),
+        "random_choice": (),
+        "max_retries": (),
+        "min_delay": (),
+        "max_delay": (),
+        "onlyonce": (),
+        "clear_history": (),
+    }
 
     # 定时器
-    _scheduler: Optional[BackgroundScheduler] = None
     _manual_trigger = False
+    # 插件数据读-改-写锁（类级别，插件重载前后的实例共用）
+    _data_lock = threading.RLock()
 
     def init_plugin(self, config: dict = None):
-        # 停止现有任务
-        self.stop_service()
-
         logger.info("============= deepfloodsign 初始化 =============")
         try:
             if config:
@@ -134,58 +175,76 @@ class deepfloodsign(_PluginBase):
                     self._stats_days = int(config.get("stats_days", 30))
                 except (ValueError, TypeError):
                     self._stats_days = 30
+                self._batch_sign = config.get("batch_sign", False)
+                self._http2 = config.get("http2", False)
+                self._race_mode = config.get("race_mode", False)
+                self._isolate_scraper = config.get("isolate_scraper", False)
+                try:
+                    self._race_lead = min(59, max(3, int(config.get("race_lead", 10) or 10)))
+                except (ValueError, TypeError):
+                    self._race_lead = 10
+                try:
+                    self._spread_window = max(0, int(config.get("spread_window", 0) or 0))
+                except (ValueError, TypeError):
+                    self._spread_window = 0
                 
                 logger.info(f"配置: enabled={self._enabled}, notify={self._notify}, cron={self._cron}, "
                            f"random_choice={self._random_choice}, history_days={self._history_days}, "
                            f"use_proxy={self._use_proxy}, max_retries={self._max_retries}, verify_ssl={self._verify_ssl}, "
-                           f"min_delay={self._min_delay}, max_delay={self._max_delay}, member_id={self._member_id or '未设置'}, clear_history={self._clear_history}")
-                # 初始化 cloudscraper（可选，用于绕过 Cloudflare）
-                if HAS_CLOUDSCRAPER:
-                    try:
-                        self._scraper = cloudscraper.create_scraper(browser="chrome")
-                    except Exception:
-                        try:
-                            self._scraper = cloudscraper.create_scraper()
-                        except Exception as e2:
-                            logger.warning(f"cloudscraper 初始化失败: {str(e2)}")
-                            self._scraper = None
-                    if self._scraper:
-                        proxies = self._get_proxies()
-                        if proxies:
-                            self._scraper.proxies = proxies
-                            logger.info(f"cloudscraper 初始化代理: {self._scraper.proxies}")
-                        logger.info("cloudscraper 初始化成功")
+                           f"min_delay={self._min_delay}, max_delay={self._max_delay}, member_id={self._member_id or '未设置'}, clear_history={self._clear_history}, "
+                           f"batch_sign={self._batch_sign}, spread_window={self._spread_window}, http2={self._http2}, "
+                           f"race_mode={self._race_mode}, race_lead={self._race_lead}, "
+                           f"isolate_scraper={self._isolate_scraper}")
+
+            # 与上次生效的配置比较，只重建变化项涉及的部分
+            current = self._config_dict()
+            plan = reload_plan(self._applied_config, current, self._reload_effects)
+            logger.info(f"配置重载: {plan}")
+            if "lifecycle" in plan:
+                # 启用状态或 Cookie 变化：停止进行中的签到和待执行的重试，按新配置重新开始
+                self.stop_service()
+                self._cancel = CancelToken()
+            self._applied_config = current
+
+            if "transport" in plan or not self._transport:
+                # 共用传输层（cloudscraper / curl_cffi / requests 依次回退），按账号区分，会话 Cookie 不跨账号共享；
+                # 先取新的再归还旧的，配置未变时不会关闭仍在用的连接池
+                previous = self._transport
+                self._transport = shared_transport(use_proxy=self._use_proxy, verify_ssl=self._verify_ssl,
+                                                   http2=self._http2, account=self._cookie_digest(),
+                                                   isolate_scraper=self._isolate_scraper)
+                release_transport(previous)
+                self.restore_impersonation()
+                self.restore_exchanges()
+                logger.info(f"传输层初始化成功，可用后端: {self._transport.available_backends()}")
+
+            # 通知由后台队列合并发送，不阻塞签到线程
+            if not self._notify_queue:
+                self._notify_queue = NotificationQueue(send=self._send_message,
+                                                       digest_title="【deepflood论坛签到】")
+
+            # 加入统一签到
+            if "batch" in plan or "lifecycle" in plan:
+                orchestrator.unregister(self)
+                if self.batch_enabled():
+                    orchestrator.register(self)
+
+            if "schedule" in plan and not plan.full:
+                logger.info("定时任务将按新的执行周期/错峰/抢签配置重新注册")
+            if "retention" in plan and not plan.full:
+                self._apply_history_retention()
+            if "enrich" in plan and not plan.full:
+                # 成员ID或统计天数变化：缓存的用户信息/收益统计作废，下次打开详情页时后台刷新
+                self.save_data('enriched_at', 0)
             
             if self._onlyonce:
                 logger.info("执行一次性签到")
-                self._scheduler = BackgroundScheduler(timezone=settings.TZ)
                 self._manual_trigger = True
-                self._scheduler.add_job(func=self.sign, trigger='date',
-                                   run_date=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=3),
-                                   name="deepflood论坛签到")
+                run_date = datetime.now(tz=ZoneInfo(settings.TZ)) + timedelta(seconds=3)
+                self._register_date_job("deepflood_onlyonce_job", run_date)
                 self._onlyonce = False
-                self.update_config({
-                    "onlyonce": False,
-                    "enabled": self._enabled,
-                    "cookie": self._cookie,
-                    "notify": self._notify,
-                    "cron": self._cron,
-                    "random_choice": self._random_choice,
-                    "history_days": self._history_days,
-                    "use_proxy": self._use_proxy,
-                    "max_retries": self._max_retries,
-                    "verify_ssl": self._verify_ssl,
-                    "min_delay": self._min_delay,
-                    "max_delay": self._max_delay,
-                    "member_id": self._member_id,
-                    "clear_history": self._clear_history,
-                    "stats_days": self._stats_days
-                })
-
-                # 启动任务
-                if self._scheduler.get_jobs():
-                    self._scheduler.print_jobs()
-                    self._scheduler.start()
+                self._applied_config = self._config_dict()
+                self.update_config(self._applied_config)
 
                 # 如果需要清除历史记录，则清空
                 if self._clear_history:
@@ -193,31 +252,150 @@ class deepfloodsign(_PluginBase):
                     self.clear_sign_history()
                     logger.info("已清除签到历史记录")
                     # 保存配置，将 clear_history 设置为 False
-                    self.update_config({
-                        "onlyonce": False,
-                        "enabled": self._enabled,
-                        "cookie": self._cookie,
-                        "notify": self._notify,
-                        "cron": self._cron,
-                        "random_choice": self._random_choice,
-                        "history_days": self._history_days,
-                        "use_proxy": self._use_proxy,
-                        "max_retries": self._max_retries,
-                        "verify_ssl": self._verify_ssl,
-                        "min_delay": self._min_delay,
-                        "max_delay": self._max_delay,
-                        "member_id": self._member_id,
-                        "clear_history": False,
-                        "stats_days": self._stats_days
-                    })
+                    self._clear_history = False
+                    self._applied_config = self._config_dict()
+                    self.update_config(self._applied_config)
                     logger.info("已保存配置，clear_history 已重置为 False")
 
         except Exception as e:
             logger.error(f"deepfloodsign初始化错误: {str(e)}", exc_info=True)
 
+    def _config_dict(self) -> dict:
+        """
+        当前生效的配置，用于保存及增量重载比较
+        """
+        return {
+            "onlyonce": self._onlyonce,
+            "enabled": self._enabled,
+            "cookie": self._cookie,
+            "notify": self._notify,
+            "cron": self._cron,
+            "random_choice": self._random_choice,
+            "history_days": self._history_days,
+            "use_proxy": self._use_proxy,
+            "max_retries": self._max_retries,
+            "verify_ssl": self._verify_ssl,
+            "min_delay": self._min_delay,
+            "max_delay": self._max_delay,
+            "member_id": self._member_id,
+            "clear_history": self._clear_history,
+            "stats_days": self._stats_days,
+            "batch_sign": self._batch_sign,
+            "spread_window": self._spread_window,
+            "http2": self._http2,
+            "race_mode": self._race_mode,
+            "race_lead": self._race_lead,
+            "isolate_scraper": self._isolate_scraper
+        }
+
+    def _register_date_job(self, job_id: str, run_date: datetime):
+        """
+        立即运行和失败重试交给宿主调度服务执行，不再为每个插件实例单独启动调度器线程；
+        同一 ID 的旧任务先注销，配置重载时宿主中待执行的任务得以保留
+        """
+        try:
+            self.unregister_scheduler(id=job_id)
+        except Exception:
+            pass
+        self.register_scheduler(id=job_id, func=self.sign, trigger=DateTrigger(run_date=run_date))
+
     def sign(self):
         """
         执行deepflood签到
+        同一账号已有签到在进行时（定时、立即运行、重试任务重叠），等待并复用其结果
+        """
+        manual, self._manual_trigger = self._manual_trigger, False
+        key = f"{self.site_name}:{self._cookie_digest()}"
+        if singleflight.running(key):
+            logger.info("已有签到正在进行，等待其结果")
+        sign_dict, shared = singleflight.do(key, self._profiled_sign, manual)
+        if shared:
+            logger.info(f"复用进行中签到的结果: {(sign_dict or {}).get('status')}")
+        return sign_dict
+
+    def race_sign(self):
+        """
+        抢签：论坛日切换前预热连接（含 Cloudflare clearance），保持空闲，零点整直接发出签到请求
+        """
+        if not self._cookie:
+            return None
+        try:
+            with self._cancel_token().running():
+                return self._race_sign()
+        except Cancelled as e:
+            logger.info(f"抢签已取消: {str(e)}")
+            return None
+
+    def _race_sign(self):
+        # 目标为服务器时钟上最近的零点，换算到本机时钟
+        offset = clock.offset(self.site_host)
+        target = self._nearest_forum_reset(time.time() + offset).timestamp() - offset
+        distance = target - time.time()
+        if abs(distance) > self._race_lead + self._race_margin:
+            # 错过触发（misfire 补跑）或时钟校正后触发时刻偏离零点，不占用调度线程等到下一次日切换
+            logger.warning(f"抢签触发时刻距论坛日切换 {distance:+.1f}s，超出预热提前量，放弃本次抢签")
+            return None
+        logger.info(f"抢签预热开始，距论坛日切换 {distance:.1f}s")
+        with span("抢签预热"):
+            # 预检请求同时建立并保持连接；Cookie 已失效则不必等到零点
+            self._scraper_warmup_and_attach_user_cookie()
+            if self.probe_cookie() is False:
+                logger.warning("抢签预热发现 Cookie 已失效，放弃抢签")
+                return None
+        if time.time() >= target:
+            logger.warning("抢签预热耗时超过提前量，立即发出签到请求")
+        sleep_until(target)
+        key = f"{self.site_name}:{self._cookie_digest()}"
+        sign_dict, _ = singleflight.do(key, self._profiled_sign, True, target)
+        return sign_dict
+
+    @staticmethod
+    def _nearest_forum_reset(timestamp: float) -> datetime:
+        """
+        距给定时刻最近的论坛日切换（上海时间零点），可能已经过去
+        """
+        now = datetime.fromtimestamp(timestamp, FORUM_TZ)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        tomorrow = today + timedelta(days=1)
+        return today if now - today < tomorrow - now else tomorrow
+
+    def _profiled_sign(self, manual: bool = False, race_target: float = None):
+        """
+        在耗时剖析下执行签到，结束后把各阶段耗时写入本次历史记录
+        """
+        profile = RunProfile()
+        with self._cancel_token().running(), profiled(profile), run_deadline(None):
+            try:
+                sign_dict = self._sign(manual, race_target)
+            except Cancelled as e:
+                sign_dict = self._record_cancelled(str(e))
+        if sign_dict and sign_dict.get("date"):
+            self._save_timing(sign_dict["date"], profile)
+        self.save_impersonation()
+        self.save_exchanges()
+        return sign_dict
+
+    def _cancel_token(self) -> CancelToken:
+        if self._cancel is None:
+            self._cancel = CancelToken()
+        return self._cancel
+
+    def _record_cancelled(self, reason: str) -> dict:
+        """
+        签到被插件停止打断：写入一条已取消记录，已完成阶段的耗时随后写入该记录
+        """
+        logger.warning(f"签到已取消: {reason}")
+        sign_dict = {
+            "date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "status": "签到已取消",
+            "message": reason
+        }
+        self._save_sign_history(sign_dict)
+        return sign_dict
+
+    def _sign(self, manual: bool = False, race_target: float = None):
+        """
+        签到主流程；race_target 为抢签目标时刻，此时不做随机等待并记录发出时刻与目标的偏差
         """
         logger.info("============= 开始deepflood签到 =============")
         sign_dict = None
@@ -233,33 +411,48 @@ class deepfloodsign(_PluginBase):
                 self._save_sign_history(sign_dict)
                 
                 if self._notify:
-                    self.post_message(
-                        mtype=NotificationType.SiteMessage,
+                    self._post_notification(
                         title="【deepflood论坛签到失败】",
                         text="未配置Cookie，请在设置中添加Cookie"
                     )
                 return sign_dict
+
+            # Cookie 预检已判定失效时，直接提示更新，不再浪费重试
+            if self._cookie_probe_verdict() is False:
+                logger.warning("Cookie 预检结果为失效，跳过本次签到")
+                sign_dict = {
+                    "date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "status": "签到失败: Cookie已失效",
+                    "message": "预检判定Cookie已失效，请更新Cookie"
+                }
+                self._save_sign_history(sign_dict)
+                self._retry_count = 0
+                if self._notify:
+                    self._post_notification(
+                        title="【deepflood论坛签到失败】",
+                        text=f"Cookie已失效，请在设置中更新Cookie\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                    )
+                return sign_dict
+
+            # 论坛日内已成功签到，跳过所有网络请求（手动触发除外）
+            if not manual and self._is_already_signed_today():
+                return self._record_skip()
             
-            # 请求前随机等待
-            self._wait_random_interval()
+            # 请求前随机等待（抢签时跳过）
+            if race_target is None:
+                with span("随机等待"):
+                    self._wait_random_interval()
+            # 运行时限从随机等待结束后开始计算，回退链超出时限即放弃后续尝试
+            start_deadline(self._run_deadline)
             
             # 无论任何情况都尝试执行API签到
-            result = self._run_api_sign()
-            
-            # 始终获取最新用户信息
-            user_info = None
-            try:
-                if getattr(self, "_member_id", ""):
-                    user_info = self._fetch_user_info(self._member_id)
-            except Exception as e:
-                logger.warning(f"获取用户信息失败: {str(e)}")
-            
-            # 始终获取签到记录以获取奖励和排名
-            attendance_record = None
-            try:
-                attendance_record = self._fetch_attendance_record()
-            except Exception as e:
-                logger.warning(f"获取签到记录失败: {str(e)}")
+            with span("签到请求"):
+                result = self._run_api_sign()
+            # 偏差按签到 POST 实际发出的时刻计算，由传输层在令牌排队之后记录
+            sent_at = result.get("sent_at")
+            race_delta = round(sent_at - race_target, 3) if race_target is not None and sent_at else None
+            if race_delta is not None:
+                logger.info(f"抢签请求发出时刻相对论坛日切换: {race_delta * 1000:+.0f}ms")
             
             # 处理签到结果
             if result["success"]:
@@ -269,35 +462,22 @@ class deepfloodsign(_PluginBase):
                     "status": "签到成功" if not result.get("already_signed") else "已签到",
                     "message": result.get("message", "")
                 }
+                if race_delta is not None:
+                    sign_dict["race_delta"] = race_delta
                 
-                # 添加奖励信息到历史记录
-                if attendance_record and attendance_record.get("gain"):
-                    sign_dict["gain"] = attendance_record.get("gain")
-                    if attendance_record.get("rank"):
-                        sign_dict["rank"] = attendance_record.get("rank")
-                        sign_dict["total_signers"] = attendance_record.get("total_signers")
-                elif result.get("gain"):
+                # 签到接口直接返回的奖励，排名等信息由后台补充
+                if result.get("gain"):
                     sign_dict["gain"] = result.get("gain")
                 
-                self._save_sign_history(sign_dict)
-                self._save_last_sign_date()
+                with span("保存记录"):
+                    self._save_sign_history(sign_dict)
+                    self._save_last_sign_date()
+                    self._save_cookie_probe(True)
                 # 重置重试计数
                 self._retry_count = 0
 
-                # 发送通知
-                if self._notify:
-                    try:
-                        self._send_sign_notification(sign_dict, result, user_info, attendance_record)
-                        logger.info("签到成功通知发送成功")
-                    except Exception as e:
-                        logger.error(f"签到成功通知发送失败: {str(e)}")
-                        # 通知失败不影响主流程，继续执行
-                try:
-                    stats = self._get_signin_stats(self._stats_days)
-                    if stats:
-                        self.save_data('last_signin_stats', stats)
-                except Exception as e:
-                    logger.warning(f"获取收益统计失败: {str(e)}")
+                # 用户信息、排名、收益统计及通知转入后台，不占用签到关键路径
+                self._submit_enrichment(sign_dict, result)
             else:
                 # 签到失败，安排重试
                 sign_dict = {
@@ -305,23 +485,29 @@ class deepfloodsign(_PluginBase):
                     "status": "签到失败",
                     "message": result.get("message", "")
                 }
+                if race_delta is not None:
+                    sign_dict["race_delta"] = race_delta
                 
                 # 最后兜底：通过签到记录进行时间验证或当日确认
+                attendance_record = None
+                try:
+                    with span("签到记录"):
+                        attendance_record = self._fetch_attendance_record()
+                except Exception as e:
+                    logger.warning(f"获取签到记录失败: {str(e)}")
                 try:
                     if attendance_record and attendance_record.get("created_at"):
                         record_date = datetime.fromisoformat(attendance_record["created_at"].replace('Z', '+00:00'))
-                        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                        if record_date.date() == today.date():
-                            logger.info(f"从签到记录确认今日已签到: {attendance_record}")
+                        if record_date.astimezone(FORUM_TZ).date() == self._forum_now().date():
+                            logger.info("从签到记录确认今日已签到")
+                            logger.debug(f"签到记录: {attendance_record}")
                             result["success"] = True
                             result["already_signed"] = True
                             result["message"] = "今日已签到（记录确认）"
                             sign_dict["status"] = "已签到（记录确认）"
                         else:
                             # 兜底时间验证：仅当无其它成功信号时，且时间差极小才认为成功
-                            current_time = datetime.utcnow()
-                            record_time = datetime.fromisoformat(attendance_record["created_at"].replace('Z', '+00:00')).replace(tzinfo=None)
-                            time_diff = abs((current_time - record_time).total_seconds() / 3600)
+                            time_diff = abs((self._forum_now() - record_date).total_seconds() / 3600)
                             logger.info(f"兜底时间验证差值: {time_diff:.2f}h")
                             if time_diff < 0.5:
                                 logger.info("时间差 < 0.5h，作为最后兜底判定为成功")
@@ -335,52 +521,47 @@ class deepfloodsign(_PluginBase):
                     logger.warning(f"兜底时间验证失败: {str(e)}")
                 
                 # 保存历史记录（包括可能通过兜底更改的状态）
-                self._save_sign_history(sign_dict)
-                try:
-                    stats = self._get_signin_stats(self._stats_days)
-                    if stats:
-                        self.save_data('last_signin_stats', stats)
-                except Exception as e:
-                    logger.warning(f"获取收益统计失败: {str(e)}")
+                with span("保存记录"):
+                    self._save_sign_history(sign_dict)
+                if result.get("success"):
+                    self._save_last_sign_date()
+                    self._submit_enrichment(sign_dict, result, attendance_record)
                 
+                # Cookie 失效时重试无意义，记录预检结果后不再重试
+                cookie_invalid = bool(result.get("cookie_invalid")) and not result.get("success")
+                if cookie_invalid:
+                    self._save_cookie_probe(False)
+
                 # 检查是否需要重试
                 # 确保 _max_retries 是整数类型
                 max_retries = int(self._max_retries) if self._max_retries is not None else 0
                 
-                if max_retries and self._retry_count < max_retries:
+                if cookie_invalid:
+                    logger.warning("Cookie已失效，不安排重试")
+                    self._retry_count = 0
+                    if self._notify:
+                        self._post_notification(
+                            title="【deepflood论坛签到失败】",
+                            text=f"签到失败: {result.get('message', '未知错误')}\n请在设置中更新Cookie\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                        )
+                elif is_cancelled():
+                    logger.info("插件已停止，不再安排重试")
+                elif max_retries and self._retry_count < max_retries:
                     self._retry_count += 1
                     retry_minutes = random.randint(5, 15)
-                    retry_time = datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(minutes=retry_minutes)
+                    retry_time = datetime.now(tz=ZoneInfo(settings.TZ)) + timedelta(minutes=retry_minutes)
                     
                     logger.info(f"签到失败，将在 {retry_minutes} 分钟后重试 (重试 {self._retry_count}/{max_retries})")
                     
-                    # 安排重试任务
-                    if not self._scheduler:
-                        self._scheduler = BackgroundScheduler(timezone=settings.TZ)
-                        if not self._scheduler.running:
-                            self._scheduler.start()
-                    
-                    # 移除之前计划的重试任务（如果有）
-                    if self._scheduled_retry:
-                        try:
-                            self._scheduler.remove_job(self._scheduled_retry)
-                        except Exception as e:
-                            # 忽略移除不存在任务的错误
-                            logger.warning(f"移除旧任务时出错 (可忽略): {str(e)}")
-                    
-                    # 添加新的重试任务
-                    self._scheduled_retry = f"deepflood_retry_{int(time.time())}"
-                    self._scheduler.add_job(
-                        func=self.sign,
-                        trigger='date',
-                        run_date=retry_time,
-                        id=self._scheduled_retry,
-                    name=f"deepflood论坛签到重试 {self._retry_count}/{max_retries}"
-                    )
+                    # 安排重试任务（替换之前计划的重试任务）
+                    try:
+                        self._register_date_job("deepflood_retry_job", retry_time)
+                        self._scheduled_retry = "deepflood_retry_job"
+                    except Exception as e:
+                        logger.error(f"重试任务注册失败: {str(e)}")
                     
                     if self._notify:
-                        self.post_message(
-                            mtype=NotificationType.SiteMessage,
+                        self._post_notification(
                             title="【deepflood论坛签到失败】",
                             text=f"签到失败: {result.get('message', '未知错误')}\n将在 {retry_minutes} 分钟后进行第 {self._retry_count}/{max_retries} 次重试\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
                         )
@@ -393,12 +574,12 @@ class deepfloodsign(_PluginBase):
                     
                     if self._notify:
                         retry_text = "未配置自动重试" if max_retries == 0 else f"已达到最大重试次数 ({max_retries})"
-                        self.post_message(
-                            mtype=NotificationType.SiteMessage,
+                        self._post_notification(
                             title="【deepflood论坛签到失败】",
                             text=f"签到失败: {result.get('message', '未知错误')}\n{retry_text}\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
                         )
             
+            self._log_request_rate()
             return sign_dict
         
         except Exception as e:
@@ -420,8 +601,7 @@ class deepfloodsign(_PluginBase):
             self._save_sign_history(sign_dict)
             
             if self._notify:
-                self.post_message(
-                    mtype=NotificationType.SiteMessage,
+                self._post_notification(
                     title="【deepflood论坛签到出错】",
                     text=f"签到过程中出错: {str(e)}\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
                 )
@@ -453,8 +633,8 @@ class deepfloodsign(_PluginBase):
             }
             random_param = "true" if self._random_choice else "false"
             url = f"https://www.deepflood.com/api/attendance?random={random_param}"
-            proxies = self._get_proxies()
-            response = self._smart_post(url=url, headers=headers, data=b'', proxies=proxies, timeout=30)
+            response = self._transport.post(url, headers=headers, data=b'', timeout=30)
+            result["sent_at"] = getattr(response, "sent_at", None)
             try:
                 logger.info(f"签到响应状态码: {response.status_code}")
                 ct = response.headers.get('Content-Type') or response.headers.get('content-type')
@@ -465,38 +645,35 @@ class deepfloodsign(_PluginBase):
             try:
                 data = response.json()
                 msg = data.get('message', '')
+                label = DEEPFLOOD_MESSAGE.classify(msg)
                 if data.get('success') is True:
                     result.update({"success": True, "signed": True, "message": msg})
                     gain = data.get('gain', 0)
                     current = data.get('current', 0)
                     if gain:
                         result.update({"gain": gain, "current": current})
-                elif "鸡腿" in msg:
+                elif label == "signed":
                     result.update({"success": True, "signed": True, "message": msg})
-                elif "已完成签到" in msg:
+                elif label == "already_signed":
                     result.update({"success": True, "already_signed": True, "message": msg})
-                elif msg == "USER NOT FOUND" or data.get('status') == 404:
-                    result.update({"message": "Cookie已失效，请更新"})
-                elif "签到" in msg and ("成功" in msg or "完成" in msg):
-                    result.update({"success": True, "signed": True, "message": msg})
+                elif label == "cookie_invalid" or data.get('status') == 404:
+                    result.update({"message": "Cookie已失效，请更新", "cookie_invalid": True})
                 else:
                     result.update({"message": msg or f"未知响应: {response.status_code}"})
             except Exception:
                 text = response.text or ""
                 snippet = text[:400] if len(text) > 400 else text
                 logger.warning(f"非JSON签到响应文本片段: {snippet}")
-                self.save_data('last_sign_response', {
-                    'status_code': getattr(response, 'status_code', None),
-                    'content_type': response.headers.get('Content-Type', ''),
-                    'text_snippet': snippet
-                })
                 try:
                     warm = self._scraper_warmup_and_attach_user_cookie()
                     if warm:
                         logger.info("尝试使用 cloudscraper 预热后携带用户Cookie再次POST")
-                        headers_retry = dict(headers)
+                        # 预热会话的 UA 由 cloudscraper 按其浏览器配置给出，不用请求头里声明的 Chrome
+                        headers_retry = backend_headers("cloudscraper", headers)
                         headers_retry.pop('Cookie', None)
-                        resp_retry = warm.post(url, headers=headers_retry, timeout=30)
+                        result["sent_at"] = time.time()
+                        resp_retry = warm.post(url, headers=headers_retry,
+                                               timeout=self._transport.timeouts(url, "cloudscraper"))
                         ct_retry = resp_retry.headers.get('Content-Type', '')
                         if 'application/json' in (ct_retry or '').lower():
                             data = resp_retry.json()
@@ -508,19 +685,20 @@ class deepfloodsign(_PluginBase):
                                 if gain:
                                     result.update({"gain": gain, "current": current})
                                 return result
-                            elif "已完成签到" in msg:
+                            elif DEEPFLOOD_MESSAGE.classify(msg) == "already_signed":
                                 result.update({"success": True, "already_signed": True, "message": msg})
                                 return result
                 except Exception as e2:
                     logger.warning(f"预热+重试失败: {str(e2)}")
-                if any(k in text for k in ["鸡腿", "签到成功", "签到完成", "success"]):
+                label = DEEPFLOOD_PAGE.classify(text)
+                if label == "signed":
                     result.update({"success": True, "signed": True, "message": text[:80]})
-                elif "已完成签到" in text:
+                elif label == "already_signed":
                     result.update({"success": True, "already_signed": True, "message": text[:80]})
-                elif "Cannot GET /api/attendance" in text:
+                elif label == "waf_get":
                     result.update({"message": "服务端拒绝GET，需要POST；可能被WAF拦截"})
-                elif any(k in text for k in ["登录", "注册", "你好啊，陌生人"]):
-                    result.update({"message": "未登录或Cookie失效，返回登录页"})
+                elif label == "cookie_invalid":
+                    result.update({"message": "未登录或Cookie失效，返回登录页", "cookie_invalid": True})
                 else:
                     result.update({"message": f"非JSON响应({response.status_code})"})
             return result
@@ -529,65 +707,74 @@ class deepfloodsign(_PluginBase):
             return {"success": False, "message": f"API签到出错: {str(e)}"}
 
     def _scraper_warmup_and_attach_user_cookie(self):
-        try:
-            if not (HAS_CLOUDSCRAPER and self._scraper):
-                return None
-            proxies = self._get_proxies()
-            if proxies:
-                self._scraper.proxies = self._normalize_proxies(proxies) or {}
-            self._scraper.get('https://www.deepflood.com/board', timeout=30)
-            base = self._cookie or ''
-            try:
-                for part in base.split(';'):
-                    kv = part.strip().split('=', 1)
-                    if len(kv) == 2:
-                        name, value = kv[0].strip(), kv[1].strip()
-                        if name and value:
-                            self._scraper.cookies.set(name, value, domain='www.deepflood.com')
-            except Exception:
-                pass
-            return self._scraper
-        except Exception as e:
-            logger.warning(f"cloudscraper 预热失败: {str(e)}")
-            return None
-    
-    def _get_proxies(self):
+        return self._transport.warmup('https://www.deepflood.com/board', self._cookie, 'www.deepflood.com')
+
+    def _cookie_digest(self) -> str:
+        return hashlib.sha1((self._cookie or "").encode("utf-8")).hexdigest()[:16]
+
+    def _save_cookie_probe(self, valid: bool):
         """
-        获取代理设置
+        缓存 Cookie 有效性判定，绑定当前 Cookie 摘要
         """
-        if not self._use_proxy:
-            logger.info("未启用代理")
-            return None
-        try:
-            if hasattr(settings, 'PROXY') and settings.PROXY:
-                norm = self._normalize_proxies(settings.PROXY)
-                if norm:
-                    return norm
-            logger.warning("系统代理未配置或无效")
+        self.save_data('cookie_probe', {
+            'valid': valid,
+            'checked_at': time.time(),
+            'cookie': self._cookie_digest()
+        })
+
+    def _cookie_probe_verdict(self) -> Optional[bool]:
+        """
+        读取未过期的 Cookie 预检结果，无有效结果时返回 None
+        """
+        probe = self.get_data('cookie_probe') or {}
+        if not probe or probe.get('cookie') != self._cookie_digest():
             return None
-        except Exception as e:
-            logger.error(f"获取代理设置出错: {str(e)}")
+        if time.time() - float(probe.get('checked_at') or 0) > self._probe_ttl:
             return None
+        return probe.get('valid')
 
-    def _normalize_proxies(self, proxies_input):
+    def probe_cookie(self) -> Optional[bool]:
         """
-        归一化代理配置为 requests 兼容格式 {"http": url, "https": url}
-        支持字符串或字典输入。
+        签到窗口前的轻量 Cookie 预检：请求需登录的未读消息接口
+        返回 True/False，网络异常等无法判定时返回 None
         """
+        if not self._cookie:
+            return None
+        headers = {
+            'Accept': '*/*',
+            'Referer': 'https://www.deepflood.com/board',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36',
+            'Cookie': self._cookie
+        }
         try:
-            if not proxies_input:
-                return None
-            if isinstance(proxies_input, str):
-                return {"http": proxies_input, "https": proxies_input}
-            if isinstance(proxies_input, dict):
-                http_url = proxies_input.get("http") or proxies_input.get("HTTP") or proxies_input.get("https") or proxies_input.get("HTTPS")
-                https_url = proxies_input.get("https") or proxies_input.get("HTTPS") or proxies_input.get("http") or proxies_input.get("HTTP")
-                if not http_url and not https_url:
-                    return None
-                return {"http": http_url or https_url, "https": https_url or http_url}
+            resp = self._transport.get("https://www.deepflood.com/api/notification/unread-count",
+                                       headers=headers, timeout=15)
         except Exception as e:
-            logger.warning(f"代理归一化失败，将忽略代理: {str(e)}")
-        return None
+            logger.warning(f"Cookie 预检请求失败，暂不判定: {str(e)}")
+            return None
+        verdict = None
+        try:
+            data = resp.json()
+            if data.get('success') is True:
+                verdict = True
+            elif data.get('message') == "USER NOT FOUND" or data.get('status') == 404:
+                verdict = False
+        except Exception:
+            text = (resp.text or "")[:2000]
+            if any(k in text for k in ["登录", "注册", "你好啊，陌生人"]):
+                verdict = False
+        if verdict is None:
+            logger.info(f"Cookie 预检无法判定 (状态码 {getattr(resp, 'status_code', None)})")
+            return None
+        self._save_cookie_probe(verdict)
+        logger.info(f"Cookie 预检完成: {'有效' if verdict else '已失效'}")
+        if not verdict and self._notify:
+            self._post_notification(
+                title="【deepflood论坛Cookie已失效】",
+                text=f"签到前预检发现Cookie已失效，请尽快在设置中更新Cookie\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            )
+        return verdict
+
     def _wait_random_interval(self):
         """
         在请求前随机等待，模拟人类行为
@@ -600,145 +787,31 @@ class deepfloodsign(_PluginBase):
             if max_delay >= min_delay and min_delay > 0:
                 delay = random.uniform(min_delay, max_delay)
                 logger.info(f"请求前随机等待 {delay:.2f} 秒...")
-                time.sleep(delay)
+                cancellable_sleep(delay)
             else:
                 logger.warning(f"延迟参数无效: min_delay={min_delay}, max_delay={max_delay}，跳过随机等待")
         except Exception as e:
             logger.debug(f"随机等待失败（忽略）：{str(e)}")
 
-    def _smart_post(self, url, headers=None, data=None, json=None, proxies=None, timeout=30):
-        """
-        统一的POST请求适配器：
-        1) curl_cffi (impersonate Chrome)
-        2) cloudscraper
-        3) requests
-        """
-        last_error = None
-
-        # 1) cloudscraper 优先
-        if HAS_CLOUDSCRAPER and self._scraper:
-            try:
-                logger.info("使用 cloudscraper 发送请求")
-                if proxies:
-                    self._scraper.proxies = self._normalize_proxies(proxies) or {}
-                    if self._scraper.proxies:
-                        logger.info(f"cloudscraper 已应用代理: {self._scraper.proxies}")
-                resp = self._scraper.post(url, headers=headers, data=data, json=json, timeout=timeout) if not self._verify_ssl else self._scraper.post(url, headers=headers, data=data, json=json, timeout=timeout, verify=True)
-                ct = resp.headers.get('Content-Type') or resp.headers.get('content-type') or ''
-                if resp.status_code in (400, 403) or ('text/html' in ct.lower()):
-                    logger.info("cloudscraper 返回非预期，尝试 curl_cffi 回退")
-                else:
-                    return resp
-            except Exception as e:
-                last_error = e
-                logger.warning(f"cloudscraper 请求失败，将回退：{str(e)}")
-
-        # 2) curl_cffi 次选
-        if HAS_CURL_CFFI:
-            try:
-                logger.info("使用 curl_cffi 发送请求 (Chrome-110 仿真)")
-                session = curl_requests.Session(impersonate="chrome110")
-                if proxies:
-                    session.proxies = self._normalize_proxies(proxies) or {}
-                    if session.proxies:
-                        logger.info(f"curl_cffi 已应用代理: {session.proxies}")
-                resp = session.post(url, headers=headers, data=data, json=json, timeout=timeout) if not self._verify_ssl else session.post(url, headers=headers, data=data, json=json, timeout=timeout, verify=True)
-                ct = resp.headers.get('Content-Type') or resp.headers.get('content-type') or ''
-                if resp.status_code in (400, 403) or ('text/html' in ct.lower()):
-                    if proxies:
-                        try:
-                            logger.info("curl_cffi 返回非预期，尝试无代理回退")
-                            resp2 = session.post(url, headers=headers, data=data, json=json, timeout=timeout) if not self._verify_ssl else session.post(url, headers=headers, data=data, json=json, timeout=timeout, verify=True)
-                            ct2 = resp2.headers.get('Content-Type') or resp2.headers.get('content-type') or ''
-                            if resp2.status_code not in (400, 403) and ('text/html' not in ct2.lower()):
-                                return resp2
-                        except Exception as e2:
-                            logger.warning(f"无代理回退失败：{str(e2)}")
-                    logger.info("curl_cffi 返回非预期，尝试 requests 回退")
-                else:
-                    return resp
-            except Exception as e:
-                last_error = e
-                logger.warning(f"curl_cffi 请求失败，将回退：{str(e)}")
-
-        # 3) requests 兜底
-        try:
-            norm = self._normalize_proxies(proxies)
-            resp = requests.post(url, headers=headers, data=data, json=json, proxies=norm, timeout=timeout) if not self._verify_ssl else requests.post(url, headers=headers, data=data, json=json, proxies=norm, timeout=timeout, verify=True)
-            ct = resp.headers.get('Content-Type') or resp.headers.get('content-type') or ''
-            if resp.status_code in (400, 403) or ('text/html' in ct.lower()):
-                logger.warning("requests 返回非预期，不再继续使用 requests")
-                raise Exception("requests non-JSON/non-200")
-            return resp
-        except Exception as e:
-            if last_error:
-                logger.error(f"此前错误：{str(last_error)}")
-            raise
-
-    def _smart_get(self, url, headers=None, proxies=None, timeout=30):
-        """
-        统一的GET请求适配器（顺序同 _smart_post）
-        """
-        last_error = None
-        if HAS_CLOUDSCRAPER and self._scraper:
-            try:
-                if proxies:
-                    self._scraper.proxies = self._normalize_proxies(proxies) or {}
-                    if self._scraper.proxies:
-                        logger.info(f"cloudscraper 已应用代理: {self._scraper.proxies}")
-                resp = self._scraper.get(url, headers=headers, timeout=timeout) if not self._verify_ssl else self._scraper.get(url, headers=headers, timeout=timeout, verify=True)
-                ct = resp.headers.get('Content-Type') or resp.headers.get('content-type') or ''
-                if resp.status_code in (400, 403) or ('text/html' in ct.lower()):
-                    logger.info("cloudscraper GET 返回非预期，尝试 curl_cffi 回退")
-                else:
-                    return resp
-            except Exception as e:
-                last_error = e
-                logger.warning(f"cloudscraper GET 失败，将回退：{str(e)}")
-        if HAS_CURL_CFFI:
-            try:
-                session = curl_requests.Session(impersonate="chrome110")
-                if proxies:
-                    session.proxies = self._normalize_proxies(proxies) or {}
-                    if session.proxies:
-                        logger.info(f"curl_cffi 已应用代理: {session.proxies}")
-                resp = session.get(url, headers=headers, timeout=timeout) if not self._verify_ssl else session.get(url, headers=headers, timeout=timeout, verify=True)
-                ct = resp.headers.get('Content-Type') or resp.headers.get('content-type') or ''
-                if resp.status_code in (400, 403) or ('text/html' in ct.lower()):
-                    if proxies:
-                        try:
-                            logger.info("curl_cffi GET 返回非预期，尝试无代理回退")
-                            resp2 = session.get(url, headers=headers, timeout=timeout) if not self._verify_ssl else session.get(url, headers=headers, timeout=timeout, verify=True)
-                            ct2 = resp2.headers.get('Content-Type') or resp2.headers.get('content-type') or ''
-                            if resp2.status_code not in (400, 403) and ('text/html' not in ct2.lower()):
-                                return resp2
-                        except Exception as e2:
-                            logger.warning(f"无代理回退失败：{str(e2)}")
-                    logger.info("curl_cffi GET 返回非预期，尝试 requests 回退")
-                else:
-                    return resp
-            except Exception as e:
-                last_error = e
-                logger.warning(f"curl_cffi GET 失败，将回退：{str(e)}")
-        try:
-            norm = self._normalize_proxies(proxies)
-            if norm:
-                logger.info(f"requests 已应用代理: {norm}")
-            if self._verify_ssl:
-                return requests.get(url, headers=headers, proxies=norm, timeout=timeout, verify=True)
-            return requests.get(url, headers=headers, proxies=norm, timeout=timeout)
-        except Exception as e:
-            logger.error(f"requests GET 失败：{str(e)}")
-            if last_error:
-                logger.error(f"此前错误：{str(last_error)}")
-            raise
-
     def _fetch_user_info(self, member_id: str) -> dict:
         """
         拉取 deepflood 用户信息（可选）
         """
         if not member_id:
             return {}
+        url, headers = self._user_info_request(member_id)
+        resp = self._transport.get(url, headers=headers, timeout=30)
+        try:
+            data = resp.json()
+            detail = data.get("detail") or {}
+            if detail:
+                self.save_data('last_user_info', detail)
+            return detail
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _user_info_request(member_id: str) -> Tuple[str, dict]:
         url = f"https://www.deepflood.com/api/account/getInfo/{member_id}?readme=1"
         headers = {
             "Accept": "*/*",
@@ -754,54 +827,15 @@ class deepfloodsign(_PluginBase):
             "Sec-Fetch-Site": "same-origin",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
         }
-        proxies = self._get_proxies()
-        resp = self._smart_get(url=url, headers=headers, proxies=proxies, timeout=30)
-        try:
-            data = resp.json()
-            detail = data.get("detail") or {}
-            if detail:
-                self.save_data('last_user_info', detail)
-            return detail
-        except Exception:
-            return {}
+        return url, headers
 
     def _fetch_attendance_record(self) -> dict:
         """
         拉取签到记录页面作为兜底，获取签到奖励信息
         """
         try:
-            url = "https://www.deepflood.com/api/attendance/board?page=1"
-            headers = {
-                "Accept": "*/*",
-                "Accept-Encoding": "gzip, deflate, br, zstd",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-                "Origin": "https://www.deepflood.com",
-                "Referer": "https://www.deepflood.com/board",
-                "Sec-CH-UA": '"Chromium";v="136", "Not:A-Brand";v="24", "Google Chrome";v="136"',
-                "Sec-CH-UA-Mobile": "?0",
-                "Sec-CH-UA-Platform": '"Windows"',
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-                "Cookie": self._cookie
-            }
-            proxies = self._get_proxies()
-            resp = self._smart_get(url=url, headers=headers, proxies=proxies, timeout=30)
-            
-            # 处理可能的压缩响应
-            content_encoding = resp.headers.get('content-encoding', '').lower()
-            if content_encoding == 'br':
-                try:
-                    import brotli
-                    decompressed_content = brotli.decompress(resp.content)
-                    response_text = decompressed_content.decode('utf-8')
-                except ImportError:
-                    response_text = resp.text
-                except Exception:
-                    response_text = resp.text
-            else:
-                response_text = resp.text
+            url, headers = self._attendance_request()
+            resp = self._transport.get(url, headers=headers, timeout=30)
             
             try:
                 logger.info(f"签到记录响应状态码: {resp.status_code}")
@@ -812,28 +846,20 @@ class deepfloodsign(_PluginBase):
                 pass
             data = None
             try:
-                data = resp.json()
+                data = decode_json(resp)
             except Exception:
+                snippet = (resp.text or "")[:400]
+                logger.warning(f"签到记录非JSON响应文本片段: {snippet}")
+                cached = self.get_data('last_attendance_record') or {}
                 try:
-                    data = json.loads(response_text or "")
+                    if cached and cached.get('created_at'):
+                        sh_tz = FORUM_TZ
+                        rec_dt = datetime.fromisoformat(cached['created_at'].replace('Z', '+00:00')).astimezone(sh_tz)
+                        if rec_dt.date() == datetime.now(sh_tz).date():
+                            return cached
                 except Exception:
-                    snippet = (resp.text or "")[:400]
-                    logger.warning(f"签到记录非JSON响应文本片段: {snippet}")
-                    self.save_data('last_attendance_response', {
-                        'status_code': getattr(resp, 'status_code', None),
-                        'content_type': resp.headers.get('Content-Type', ''),
-                        'text_snippet': snippet
-                    })
-                    cached = self.get_data('last_attendance_record') or {}
-                    try:
-                        if cached and cached.get('created_at'):
-                            sh_tz = pytz.timezone('Asia/Shanghai')
-                            rec_dt = datetime.fromisoformat(cached['created_at'].replace('Z', '+00:00')).astimezone(sh_tz)
-                            if rec_dt.date() == datetime.now(sh_tz).date():
-                                return cached
-                    except Exception:
-                        pass
-                    return {}
+                    pass
+                return {}
             record = data.get("record", {})
             if record:
                 # 获取用户排名信息
@@ -866,31 +892,66 @@ class deepfloodsign(_PluginBase):
             logger.warning(f"获取签到记录失败: {str(e)}")
             return {}
 
+    def _attendance_request(self) -> Tuple[str, dict]:
+        url = "https://www.deepflood.com/api/attendance/board?page=1"
+        headers = {
+            "Accept": "*/*",
+            "Accept-Encoding": "gzip, deflate, br, zstd",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            "Origin": "https://www.deepflood.com",
+            "Referer": "https://www.deepflood.com/board",
+            "Sec-CH-UA": '"Chromium";v="136", "Not:A-Brand";v="24", "Google Chrome";v="136"',
+            "Sec-CH-UA-Mobile": "?0",
+            "Sec-CH-UA-Platform": '"Windows"',
+            "Sec-Fetch-Dest": "empty",
+            "Sec-Fetch-Mode": "cors",
+            "Sec-Fetch-Site": "same-origin",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+            "Cookie": self._cookie
+        }
+        return url, headers
+
+    def _credit_page_request(self, page: int) -> Tuple[str, dict]:
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36',
+            'origin': 'https://www.deepflood.com',
+            'referer': 'https://www.deepflood.com/board',
+            'Cookie': self._cookie
+        }
+        return f'https://www.deepflood.com/api/account/credit/page-{page}', headers
+
     def _save_sign_history(self, sign_data):
         """
-        保存签到历史记录
+        保存签到历史记录，加锁保证读-改-写不会丢失并发写入
+        """
+        with self._data_lock:
+            self._write_sign_history(sign_data)
+
+    def _write_sign_history(self, sign_data):
+        """
+        追加签到历史记录并清理过期记录
         """
         try:
-            logger.info(f"开始保存签到历史记录，输入数据: {sign_data}")
-            logger.info(f"输入数据类型: {type(sign_data)}")
+            logger.debug(f"开始保存签到历史记录，输入数据: {sign_data}")
+            logger.debug(f"输入数据类型: {type(sign_data)}")
             
             # 读取现有历史
             history = self.get_data('sign_history') or []
-            logger.info(f"读取到现有历史记录数量: {len(history)}")
+            logger.debug(f"读取到现有历史记录数量: {len(history)}")
             
             # 确保日期格式正确
             if "date" not in sign_data:
                 sign_data["date"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                logger.info(f"添加日期字段: {sign_data['date']}")
+                logger.debug(f"添加日期字段: {sign_data['date']}")
                 
             history.append(sign_data)
-            logger.info(f"添加新记录后历史记录数量: {len(history)}")
+            logger.debug(f"添加新记录后历史记录数量: {len(history)}")
             
             # 清理旧记录
             try:
-                logger.info(f"开始清理旧记录，_history_days: {self._history_days} (类型: {type(self._history_days)})")
+                logger.debug(f"开始清理旧记录，_history_days: {self._history_days} (类型: {type(self._history_days)})")
                 retention_days = int(self._history_days) if self._history_days is not None else 30
-                logger.info(f"计算得到保留天数: {retention_days}")
+                logger.debug(f"计算得到保留天数: {retention_days}")
             except (ValueError, TypeError) as e:
                 retention_days = 30
                 logger.warning(f"history_days 类型转换失败: {str(e)}，使用默认值 30")
@@ -898,27 +959,27 @@ class deepfloodsign(_PluginBase):
             now = datetime.now()
             valid_history = []
             
-            logger.info(f"开始遍历 {len(history)} 条历史记录进行清理...")
+            logger.debug(f"开始遍历 {len(history)} 条历史记录进行清理...")
             for i, record in enumerate(history):
                 try:
-                    logger.info(f"处理第 {i+1} 条记录: {record}")
+                    logger.debug(f"处理第 {i+1} 条记录: {record}")
                     # 尝试将记录日期转换为datetime对象
                     record_date = datetime.strptime(record["date"], '%Y-%m-%d %H:%M:%S')
                     # 检查是否在保留期内
                     days_diff = (now - record_date).days
-                    logger.info(f"记录日期: {record_date}, 距今天数: {days_diff}, 保留天数: {retention_days}")
+                    logger.debug(f"记录日期: {record_date}, 距今天数: {days_diff}, 保留天数: {retention_days}")
                     if days_diff < retention_days:
                         valid_history.append(record)
-                        logger.info(f"保留此记录")
+                        logger.debug(f"保留此记录")
                     else:
-                        logger.info(f"删除过期记录")
+                        logger.debug(f"删除过期记录")
                 except (ValueError, KeyError) as e:
                     # 如果记录日期格式不正确，尝试修复
                     logger.warning(f"历史记录日期格式无效: {record.get('date', '无日期')}, 错误: {str(e)}")
                     # 添加新的日期并保留记录
                     record["date"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     valid_history.append(record)
-                    logger.info(f"修复日期后保留此记录")
+                    logger.debug(f"修复日期后保留此记录")
             
             logger.info(f"清理完成，有效记录数量: {len(valid_history)}")
             
@@ -932,6 +993,26 @@ class deepfloodsign(_PluginBase):
             logger.error(f"输入数据: {sign_data}")
             logger.error(f"当前 _history_days: {self._history_days} (类型: {type(self._history_days)})")
 
+    def _apply_history_retention(self):
+        """
+        按保留天数立即清理历史记录（history_days 变化时调用，不必等到下次签到写入）
+        """
+        retention_days = int(self._history_days or 30)
+        now = datetime.now()
+        with self._data_lock:
+            history = self.get_data('sign_history') or []
+            kept = []
+            for record in history:
+                try:
+                    if (now - datetime.strptime(record["date"], '%Y-%m-%d %H:%M:%S')).days >= retention_days:
+                        continue
+                except (ValueError, KeyError, TypeError):
+                    pass
+                kept.append(record)
+            if len(kept) != len(history):
+                self.save_data(key="sign_history", value=kept)
+                logger.info(f"历史保留天数调整为 {retention_days}，清理 {len(history) - len(kept)} 条过期记录")
+
     def clear_sign_history(self):
         """
         清除所有签到历史记录
@@ -941,10 +1022,13 @@ class deepfloodsign(_PluginBase):
             self.save_data(key="sign_history", value=[])
             # 清空最后签到时间
             self.save_data(key="last_sign_date", value="")
+            self.save_data(key="last_success", value={})
             # 清空用户信息
             self.save_data(key="last_user_info", value="")
             # 清空签到记录
             self.save_data(key="last_attendance_record", value="")
+            # 清空请求诊断记录
+            self.save_data(key="exchanges", value={})
             logger.info("已清空所有签到相关数据")
         except Exception as e:
             logger.error(f"清除签到历史记录失败: {str(e)}", exc_info=True)
@@ -953,8 +1037,8 @@ class deepfloodsign(_PluginBase):
         """
         发送签到通知
         """
-        logger.info(f"开始发送签到通知，参数: sign_dict={sign_dict}, result={result}")
-        logger.info(f"user_info 类型: {type(user_info)}, attendance_record 类型: {type(attendance_record)}")
+        logger.debug(f"开始发送签到通知，参数: sign_dict={sign_dict}, result={result}")
+        logger.debug(f"user_info 类型: {type(user_info)}, attendance_record 类型: {type(attendance_record)}")
         
         if not self._notify:
             logger.info("通知未启用，跳过")
@@ -972,7 +1056,7 @@ class deepfloodsign(_PluginBase):
             gain_info = ""
             rank_info = ""
             try:
-                logger.info(f"开始构建奖励信息，result: {result}")
+                logger.debug(f"开始构建奖励信息，result: {result}")
                 if result.get("gain"):
                     gain_info = f"🎁 获得: {result.get('gain')}个鸡腿"
                 elif attendance_record and attendance_record.get("gain"):
@@ -1034,7 +1118,7 @@ class deepfloodsign(_PluginBase):
             gain_info = ""
             rank_info = ""
             try:
-                logger.info(f"开始构建已签到状态的奖励信息，attendance_record: {attendance_record}")
+                logger.debug(f"开始构建已签到状态的奖励信息，attendance_record: {attendance_record}")
                 today_gain = None
                 if attendance_record and attendance_record.get("gain"):
                     today_gain = attendance_record.get('gain')
@@ -1067,7 +1151,7 @@ class deepfloodsign(_PluginBase):
                     try:
                         cached = self.get_data('last_attendance_record') or {}
                         if cached and cached.get('created_at'):
-                            sh_tz = pytz.timezone('Asia/Shanghai')
+                            sh_tz = FORUM_TZ
                             rec_dt = datetime.fromisoformat(cached['created_at'].replace('Z', '+00:00')).astimezone(sh_tz)
                             if rec_dt.date() == datetime.now(sh_tz).date():
                                 if cached.get('rank'):
@@ -1128,11 +1212,10 @@ class deepfloodsign(_PluginBase):
             # 获取签到记录信息（如果有的话）
             record_info = ""
             try:
-                logger.info(f"开始构建失败状态的记录信息，attendance_record: {attendance_record}")
+                logger.debug(f"开始构建失败状态的记录信息，attendance_record: {attendance_record}")
                 if attendance_record and attendance_record.get("created_at"):
                     record_date = datetime.fromisoformat(attendance_record["created_at"].replace('Z', '+00:00'))
-                    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                    if record_date.date() == today.date():
+                    if record_date.astimezone(FORUM_TZ).date() == self._forum_now().date():
                         record_info = f"📊 签到记录: 今日已获得{attendance_record.get('gain', 0)}个鸡腿"
                         
                         # 添加排名信息
@@ -1175,72 +1258,253 @@ class deepfloodsign(_PluginBase):
         logger.info(f"准备发送通知，标题: {title}")
         logger.info(f"通知内容长度: {len(text)}")
         try:
-            self.post_message(
-                mtype=NotificationType.SiteMessage,
+            self._post_notification(
                 title=title,
                 text=text
             )
-            logger.info("通知发送成功")
+            logger.info("通知已加入发送队列")
         except Exception as e:
             logger.error(f"通知发送失败: {str(e)}")
             logger.error(f"错误类型: {type(e)}")
     
+    def _background_key(self, kind: str, day: str = None) -> str:
+        """
+        后台任务的去重 key，按账号（Cookie 摘要）区分；签后补充再带上签到日期
+        """
+        key = f"deepflood_{kind}:{self._cookie_digest()}"
+        return f"{key}:{day}" if day else key
+
+    def _submit_enrichment(self, sign_dict: dict, result: dict, attendance_record: dict = None):
+        """
+        提交签后补充任务；与详情页触发的刷新使用不同的 key，不会被排队中的刷新或其他账号的任务吞掉
+        """
+        key = self._background_key("enrich", (sign_dict.get("date") or "")[:10])
+        return background.submit(key, self._enrich_after_sign, sign_dict, result, attendance_record,
+                                 profile=current_profile())
+
+    def _enrich_after_sign(self, sign_dict: dict, result: dict, attendance_record: dict = None,
+                           profile: RunProfile = None):
+        """
+        后台补充签到结果：用户信息、签到排名、收益统计，并发送成功通知
+        传入签到时的 RunProfile 时，后台阶段继续记入同一份耗时剖析
+        """
+        with profiled(profile):
+            self._enrich(sign_dict, result, attendance_record)
+        if profile is not None:
+            self._save_timing(sign_dict.get("date"), profile)
+
+    def _enrich(self, sign_dict: dict, result: dict, attendance_record: dict = None):
+        if self._http2:
+            # 互不依赖的补充请求在同一 HTTP/2 连接上并发预取，随后的逐个获取直接取用预取结果
+            calls = [self._credit_page_request(1)]
+            if attendance_record is None:
+                calls.insert(0, self._attendance_request())
+            if self._member_id:
+                calls.insert(0, self._user_info_request(self._member_id))
+            with span("HTTP/2 预取"):
+                self._transport.prefetch(calls)
+        user_info = None
+        try:
+            if self._member_id:
+                with span("用户信息"):
+                    user_info = self._fetch_user_info(self._member_id)
+        except Exception as e:
+            logger.warning(f"获取用户信息失败: {str(e)}")
+        if attendance_record is None:
+            try:
+                with span("签到记录"):
+                    attendance_record = self._fetch_attendance_record()
+            except Exception as e:
+                logger.warning(f"获取签到记录失败: {str(e)}")
+
+        # 回填奖励和排名到对应的历史记录
+        if attendance_record and attendance_record.get("gain"):
+            fields = {"gain": attendance_record.get("gain")}
+            if attendance_record.get("rank"):
+                fields["rank"] = attendance_record.get("rank")
+                fields["total_signers"] = attendance_record.get("total_signers")
+            sign_dict.update(fields)
+            with span("保存记录"):
+                self._update_sign_history(sign_dict.get("date"), fields)
+
+        if self._notify:
+            try:
+                with span("发送通知"):
+                    self._send_sign_notification(sign_dict, result, user_info, attendance_record or {})
+            except Exception as e:
+                logger.error(f"签到成功通知发送失败: {str(e)}")
+        with span("收益统计"):
+            self._refresh_signin_stats()
+
+    def _refresh_signin_stats(self):
+        try:
+            stats = self._get_signin_stats(self._stats_days)
+            if stats:
+                self.save_data('last_signin_stats', stats)
+        except Exception as e:
+            logger.warning(f"获取收益统计失败: {str(e)}")
+        self.save_data('enriched_at', time.time())
+
+    def _refresh_if_stale(self):
+        """
+        详情页打开时，缓存的用户信息/收益统计过期则提交后台刷新，不阻塞页面
+        """
+        if not (self._enabled and self._cookie):
+            return
+        enriched_at = float(self.get_data('enriched_at') or 0)
+        if time.time() - enriched_at < self._enrich_ttl:
+            return
+        # 本账号今天的签后补充还在排队时，它本身就会刷新缓存
+        if (background.pending(self._background_key("refresh"))
+                or background.pending(self._background_key("enrich", datetime.now().strftime('%Y-%m-%d')))):
+            return
+        logger.info("缓存的用户信息/收益统计已过期，后台刷新")
+
+        def refresh():
+            with self._cancel_token().running():
+                if self._member_id:
+                    try:
+                        self._fetch_user_info(self._member_id)
+                    except Exception as e:
+                        logger.warning(f"获取用户信息失败: {str(e)}")
+                self._refresh_signin_stats()
+
+        background.submit(self._background_key("refresh"), refresh)
+
+    def _save_timing(self, date: str, profile: RunProfile):
+        """
+        把耗时剖析写入对应历史记录；签到线程和后台补充任务都会写，在锁内取快照以保留较完整的一份
+        """
+        with self._data_lock:
+            self._update_sign_history(date, {"timing": profile.to_dict()})
+
+    def _update_sign_history(self, date: str, fields: dict):
+        """
+        按时间定位历史记录并更新字段
+        """
+        if not date:
+            return
+        with self._data_lock:
+            history = self.get_data('sign_history') or []
+            for record in reversed(history):
+                if record.get("date") == date:
+                    record.update(fields)
+                    self.save_data(key="sign_history", value=history)
+                    return
+
+    def _send_message(self, title: str, text: str):
+        self.post_message(
+            mtype=NotificationType.SiteMessage,
+            title=title,
+            text=text
+        )
+
+    def _post_notification(self, title: str, text: str):
+        """
+        通知入队，由后台线程合并去重后发送；队列未初始化时直接发送
+        """
+        if self._notify_queue:
+            self._notify_queue.put(title, text)
+        else:
+            self._send_message(title, text)
+
+    @staticmethod
+    def _forum_now() -> datetime:
+        return datetime.now(FORUM_TZ)
+
     def _save_last_sign_date(self):
         """
-        保存最后一次成功签到的日期和时间
+        保存最后一次成功签到的日期和时间，并写入按论坛日索引的成功标记
         """
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         self.save_data('last_sign_date', now)
-        logger.info(f"记录签到成功时间: {now}")
-        
-    def _is_already_signed_today(self):
+        forum_now = self._forum_now()
+        self.save_data('last_success', {
+            'day': forum_now.strftime('%Y-%m-%d'),
+            'time': forum_now.isoformat(timespec='seconds'),
+            'skips': 0
+        })
+        logger.info(f"记录签到成功时间: {now}（论坛日 {forum_now.strftime('%Y-%m-%d')}）")
+
+    def _is_already_signed_today(self) -> bool:
         """
-        检查今天是否已经成功签到过
-        只有当今天已经成功签到时才返回True
+        按论坛日（北京时间零点重置）判断今天是否已经成功签到
         """
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        # 获取历史记录
-        history = self.get_data('sign_history') or []
-        
-        # 检查今天的签到记录
-        today_records = [
-            record for record in history 
-            if record.get("date", "").startswith(today) 
-            and record.get("status") in ["签到成功", "已签到"]
-        ]
-        
-        if today_records:
-            return True
-            
-        # 获取最后一次签到的日期和时间
+        today = self._forum_now().strftime('%Y-%m-%d')
+        marker = self.get_data('last_success') or {}
+        if marker.get('day'):
+            return marker['day'] == today
+
+        # 兼容旧版本：仅有本地时间记录的最后签到时间
         last_sign_date = self.get_data('last_sign_date')
         if last_sign_date:
             try:
-                last_sign_datetime = datetime.strptime(last_sign_date, '%Y-%m-%d %H:%M:%S')
-                last_sign_day = last_sign_datetime.strftime('%Y-%m-%d')
-                
-                # 如果最后一次签到是今天且是成功的
-                if last_sign_day == today:
-                    return True
+                last_sign_datetime = datetime.strptime(last_sign_date, '%Y-%m-%d %H:%M:%S').astimezone(FORUM_TZ)
+                return last_sign_datetime.strftime('%Y-%m-%d') == today
             except Exception as e:
                 logger.error(f"解析最后签到日期时出错: {str(e)}")
-        
         return False
 
+    def _record_skip(self) -> dict:
+        """
+        记录一次因今日已签到而跳过的触发，只更新成功标记中的计数，不写入历史
+        """
+        with self._data_lock:
+            marker = self.get_data('last_success') or {}
+            marker['skips'] = int(marker.get('skips') or 0) + 1
+            marker['last_skip'] = self._forum_now().isoformat(timespec='seconds')
+            self.save_data('last_success', marker)
+        self._retry_count = 0
+        logger.info(f"论坛日 {marker.get('day', '')} 已签到，跳过本次触发（今日第 {marker['skips']} 次跳过）")
+        return {
+            "date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "status": "已签到（跳过）",
+            "message": f"今日已签到，跳过重复触发 {marker['skips']} 次"
+        }
+
     def get_state(self) -> bool:
         return self._enabled
 
+    def batch_enabled(self) -> bool:
+        return bool(self._enabled and self._batch_sign)
+
+    def sign_account(self, account: str) -> Any:
+        return self.sign()
+
+    def batch_sign(self):
+        """
+        统一签到入口：由首个触发的插件跑完所有参与统一签到的站点
+        """
+        return orchestrator.run(trigger=self.plugin_name)
+
+    def _spread_offset(self) -> int:
+        return spread_offset(f"{self.site_name}:{self._cookie_digest()}", self._spread_window)
+
     def get_service(self) -> List[Dict[str, Any]]:
         if self._enabled and self._cron:
-            logger.info(f"注册定时服务: {self._cron}")
+            offset = self._spread_offset()
+            logger.info(f"注册定时服务: {self._cron}" + (f"，错峰推迟 {offset} 秒" if offset else ""))
             return [{
                 "id": "deepfloodsign",
                 "name": "deepflood论坛签到",
-                "trigger": CronTrigger.from_crontab(self._cron),
-                "func": self.sign,
+                # 按服务器时钟偏差校正触发时刻
+                "trigger": OffsetCronTrigger(self._cron, offset, adjust=server_clock(self.site_host)),
+                "func": self.batch_sign if self.batch_enabled() else self.sign,
+                "kwargs": {}
+            }, {
+                "id": "deepfloodsign_probe",
+                "name": "deepflood论坛Cookie预检",
+                "trigger": OffsetCronTrigger(self._cron, offset - self._probe_ahead),
+                "func": self.probe_cookie,
                 "kwargs": {}
-            }]
+            }] + ([{
+                "id": "deepfloodsign_race",
+                "name": "deepflood论坛抢签",
+                "trigger": OffsetCronTrigger("0 0 * * *", -self._race_lead, timezone=FORUM_TZ,
+                                             adjust=server_clock(self.site_host)),
+                "func": self.race_sign,
+                "kwargs": {}
+            }] if self._race_mode else [])
         return []
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
@@ -1372,6 +1636,22 @@ class deepfloodsign(_PluginBase):
                                     }
                                 ]
                             },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'batch_sign',
+                                            'label': '统一签到',
+                                        }
+                                    }
+                                ]
+                            },
                             {
                                 'component': 'VCol',
                                 'props': {
@@ -1388,6 +1668,56 @@ class deepfloodsign(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'http2',
+                                            'label': 'HTTP/2 复用',
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'race_mode',
+                                            'label': '零点抢签',
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'race_lead',
+                                            'label': '抢签预热提前量(秒)',
+                                            'type': 'number',
+                                            'placeholder': '10'
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     },
@@ -1398,7 +1728,7 @@ class deepfloodsign(_PluginBase):
                                 'component': 'VCol',
                                 'props': {
                                     'cols': 12,
-                                    'md': 6
+                                    'md': 4
                                 },
                                 'content': [
                                     {
@@ -1416,7 +1746,7 @@ class deepfloodsign(_PluginBase):
                                 'component': 'VCol',
                                 'props': {
                                     'cols': 12,
-                                    'md': 6
+                                    'md': 4
                                 },
                                 'content': [
                                     {
@@ -1429,6 +1759,22 @@ class deepfloodsign(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'isolate_scraper',
+                                            'label': 'cloudscraper 独立进程',
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     },
@@ -1526,6 +1872,24 @@ class deepfloodsign(_PluginBase):
                                     }
                                 ]
                             },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'spread_window',
+                                            'label': '错峰窗口(秒)',
+                                            'type': 'number',
+                                            'placeholder': '0'
+                                        }
+                                    }
+                                ]
+                            },
 
                         ]
                     },
@@ -1543,7 +1907,7 @@ class deepfloodsign(_PluginBase):
                                         'props': {
                                             'type': 'info',
                                             'variant': 'tonal',
-                                            'text': f'【使用教程】\n1. 登录deepflood论坛网站，按F12打开开发者工具\n2. 在"网络"或"应用"选项卡中复制Cookie\n3. 粘贴Cookie到上方输入框\n4. 设置签到时间，建议早上8点(0 8 * * *)\n5. 启用插件并保存\n\n【功能说明】\n• 随机奖励：开启则使用随机奖励，关闭则使用固定奖励\n• 使用代理：开启则使用系统配置的代理服务器访问deepflood\n• 验证SSL证书：关闭可能解决SSL连接问题，但会降低安全性\n• 失败重试：设置签到失败后的最大重试次数，将在5-15分钟后随机重试\n• 随机延迟：请求前随机等待，降低被风控概率\n• 用户信息：配置成员ID后，通知中展示用户名/等级/鸡腿\n• 立即运行一次：手动触发一次签到\n• 清除历史记录：勾选后保存配置，插件将清空所有签到历史、用户信息等数据，使用后会自动关闭\n\n【环境状态】\n• curl_cffi: {curl_cffi_status}；cloudscraper: {cloudscraper_status}'
+                                            'text': f'【使用教程】\n1. 登录deepflood论坛网站，按F12打开开发者工具\n2. 在"网络"或"应用"选项卡中复制Cookie\n3. 粘贴Cookie到上方输入框\n4. 设置签到时间，建议早上8点(0 8 * * *)\n5. 启用插件并保存\n\n【功能说明】\n• 随机奖励：开启则使用随机奖励，关闭则使用固定奖励\n• 使用代理：开启则使用系统配置的代理服务器访问deepflood\n• 验证SSL证书：关闭可能解决SSL连接问题，但会降低安全性\n• 失败重试：设置签到失败后的最大重试次数，将在5-15分钟后随机重试\n• 随机延迟：请求前随机等待，降低被风控概率\n• 用户信息：配置成员ID后，通知中展示用户名/等级/鸡腿\n• 立即运行一次：手动触发一次签到\n• 清除历史记录：勾选后保存配置，插件将清空所有签到历史、用户信息等数据，使用后会自动关闭\n• 统一签到：与其他开启统一签到的签到插件合并为一次调度，由最先触发的插件在同一窗口内跑完所有站点\n• 错峰窗口：按账号在窗口内固定推迟触发时间，避免多账号同一秒请求触发风控，0 表示不错峰\n• HTTP/2 复用：需要 curl_cffi，签到后的用户信息、签到排名、收益统计在同一连接上并发获取\n• 零点抢签：论坛日切换（上海时间零点）前按提前量预热连接，零点整直接发出签到请求以争取排名，历史记录中显示发出时刻偏差\n• cloudscraper 独立进程：Cloudflare 挑战改在子进程中求解，不与 MoviePilot 争抢 CPU，单次任务超时后自动重启子进程\n\n【环境状态】\n• curl_cffi: {curl_cffi_status}；cloudscraper: {cloudscraper_status}'
                                         }
                                     }
                                 ]
@@ -1567,13 +1931,21 @@ class deepfloodsign(_PluginBase):
             "max_delay": 12,
             "member_id": "",
             "clear_history": False,
-            "stats_days": 30
+            "stats_days": 30,
+            "batch_sign": False,
+            "spread_window": 0,
+            "http2": False,
+            "race_mode": False,
+            "race_lead": 10,
+            "isolate_scraper": False
         }
 
     def get_page(self) -> List[dict]:
         """
         构建插件详情页面，展示签到历史
         """
+        # 缓存过期时后台刷新，本次先展示缓存
+        self._refresh_if_stale()
         # 读取缓存的用户信息
         user_info = self.get_data('last_user_info') or {}
         # 获取签到历史
@@ -1672,7 +2044,8 @@ class deepfloodsign(_PluginBase):
                     # 消息列
                     {
                         'component': 'td',
-                        'text': history.get('message', '-')
+                        'text': history.get('message', '-') + (
+                            f"（抢签 {history['race_delta'] * 1000:+.0f}ms）" if history.get('race_delta') is not None else '')
                     }
                 ]
             })
@@ -1801,7 +2174,13 @@ class deepfloodsign(_PluginBase):
                 }
             ]
 
-        return user_info_card + stats_card + [
+        # 最近一次带耗时剖析的签到
+        timing = next((h.get("timing") for h in historys if h.get("timing")), None)
+        timing_cards = timing_card(timing, '⏱️ 最近一次签到耗时') if timing else []
+
+        diagnostics = exchanges_card(self.site_host)
+
+        return clock_alert(self.site_host) + user_info_card + stats_card + timing_cards + diagnostics + [
             # 标题
             {
                 'component': 'VCard',
@@ -1853,43 +2232,150 @@ class deepfloodsign(_PluginBase):
     def stop_service(self):
         """
         退出插件，停止定时任务
+        进行中的签到在下一个检查点（等待、请求尝试、分页）退出，最多等待 _stop_timeout 秒
         """
-        try:
-            if self._scheduler:
-                self._scheduler.remove_all_jobs()
-                if self._scheduler.running:
-                    self._scheduler.shutdown()
-                self._scheduler = None
-        except Exception as e:
-            logger.error(f"退出插件失败: {str(e)}")
+        orchestrator.unregister(self)
+        # 停止后的下一次加载按全量处理
+        self._applied_config = None
+        if self._cancel:
+            self._cancel.cancel("插件停止")
+            if not self._cancel.join(timeout=self._stop_timeout):
+                logger.warning(f"仍有 {self._cancel.active} 个签到任务在等待当前请求返回，将在请求结束后退出")
+        if self._notify_queue:
+            self._notify_queue.flush(timeout=5)
+        for job_id in ("deepflood_onlyonce_job", "deepflood_retry_job"):
+            try:
+                self.unregister_scheduler(id=job_id)
+            except Exception:
+                pass
+        self._scheduled_retry = None
+        # 归还共享传输层，同账号同配置已无其他实例使用时关闭连接
+        release_transport(self._transport)
+        self._transport = None
 
     def get_command(self) -> List[Dict[str, Any]]:
         return []
 
     def get_api(self) -> List[Dict[str, Any]]:
-        return [] 
+        return [
+            self.exchanges_api(),
+            {
+                "path": "/export/history",
+                "endpoint": self.export_history,
+                "methods": ["GET"],
+                "summary": "导出签到历史",
+                "description": "fmt=csv|ndjson，start/end 为 YYYY-MM-DD（含），gzip=true 时压缩传输",
+            },
+            {
+                "path": "/export/ledger",
+                "endpoint": self.export_ledger,
+                "methods": ["GET"],
+                "summary": "导出鸡腿收支明细",
+                "description": "按页从论坛拉取并边取边输出，参数同 /export/history",
+            },
+        ]
+
+    def export_history(self, fmt: str = "csv", start: str = None, end: str = None, gzip: bool = False):
+        """
+        导出签到历史，按日期逐条过滤、边编码边输出
+        """
+        try:
+            start_day, end_day = parse_day(start), parse_day(end)
+        except ValueError:
+            return schemas.Response(success=False, message="日期格式应为 YYYY-MM-DD")
+        if fmt not in EXPORT_FORMATS:
+            return schemas.Response(success=False, message=f"不支持的格式: {fmt}")
+        return stream_export(self._iter_history(start_day, end_day), fmt, self._history_fields,
+                             f"deepflood_history_{self._export_suffix()}", compress=gzip)
+
+    def export_ledger(self, fmt: str = "csv", start: str = None, end: str = None, gzip: bool = False):
+        """
+        流式导出鸡腿收支明细，逐页请求论坛接口，页内记录按时间倒序
+        """
+        try:
+            start_day, end_day = parse_day(start), parse_day(end)
+        except ValueError:
+            return schemas.Response(success=False, message="日期格式应为 YYYY-MM-DD")
+        if fmt not in EXPORT_FORMATS:
+            return schemas.Response(success=False, message=f"不支持的格式: {fmt}")
+        if not self._cookie:
+            return schemas.Response(success=False, message="未配置Cookie")
+        return stream_export(self._iter_credit_records(start_day, end_day), fmt,
+                             ("time", "amount", "balance", "description"),
+                             f"deepflood_ledger_{self._export_suffix()}", compress=gzip)
+
+    def _export_suffix(self) -> str:
+        return f"{self._cookie_digest()[:8]}_{datetime.now().strftime('%Y%m%d')}"
+
+    def _iter_history(self, start_day=None, end_day=None):
+        """
+        生成日期范围内的签到历史；历史作为一条插件数据整体存取，在开始输出时才读取，过滤不另建列表
+        """
+        for record in self.get_data('sign_history') or []:
+            try:
+                day = datetime.strptime(record["date"], '%Y-%m-%d %H:%M:%S').date()
+            except (ValueError, KeyError, TypeError):
+                continue
+            if in_range(day, start_day, end_day):
+                yield record
+
+    def _iter_credit_records(self, start_day=None, end_day=None):
+        """
+        逐页生成收支记录；越过 start_day 后停止翻页，请求失败时结束（已输出的部分保留）
+        """
+        for page in range(1, self._export_max_pages + 1):
+            url, headers = self._credit_page_request(page)
+            try:
+                data = decode_json(self._transport.get(url, headers=headers, timeout=30))
+            except Exception as e:
+                logger.warning(f"导出收支明细第 {page} 页失败，导出提前结束: {str(e)}")
+                return
+            records = data.get('data') if isinstance(data, dict) and data.get('success') else None
+            if not records:
+                return
+            for record in records:
+                try:
+                    amount, balance, description, timestamp = record
+                    record_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).astimezone(FORUM_TZ)
+                except (ValueError, TypeError, AttributeError):
+                    continue
+                if start_day and record_time.date() < start_day:
+                    return
+                if end_day and record_time.date() > end_day:
+                    continue
+                yield {"time": record_time.isoformat(timespec='seconds'), "amount": amount,
+                       "balance": balance, "description": description}
+
+    def _log_request_rate(self):
+        """
+        输出当前各 host 的实际请求速率，便于调整限速参数
+        """
+        for host, stat in admission.stats().items():
+            logger.info(f"请求速率 {host}: 近1分钟 {stat['requests']} 次 "
+                        f"({stat['rate_per_min']}/分钟，上限 {stat['limit_per_min']}/分钟)，累计排队 {stat['waited']}s")
+        for key, stat in latency.stats().items():
+            if key.startswith(self.site_host):
+                logger.info(f"请求延迟 {key}: p50 {stat['p50']}s，p99 {stat['p99']}s")
+        skew = clock.stats().get(self.site_host)
+        if skew:
+            logger.info(f"服务器时钟偏差 {self.site_host}: {skew['offset']:+.3f}s ±{skew['uncertainty']:.3f}s"
+                        f"（{skew['samples']} 个样本）")
 
     def _get_signin_stats(self, days: int = 30) -> dict:
         if not self._cookie:
             return {}
         if days <= 0:
             days = 1
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36',
-            'origin': 'https://www.deepflood.com',
-            'referer': 'https://www.deepflood.com/board',
-            'Cookie': self._cookie
-        }
-        tz = pytz.timezone('Asia/Shanghai')
+        tz = FORUM_TZ
         now_shanghai = datetime.now(tz)
         query_start_time = now_shanghai - timedelta(days=days)
         all_records = []
         page = 1
-        proxies = self._get_proxies()
         try:
             while page <= 20:
-                url = f'https://www.deepflood.com/api/account/credit/page-{page}'
-                resp = self._smart_get(url=url, headers=headers, proxies=proxies, timeout=30)
+                check_cancelled()
+                url, headers = self._credit_page_request(page)
+                resp = self._transport.get(url, headers=headers, timeout=30)
                 data = {}
                 try:
                     data = resp.json()
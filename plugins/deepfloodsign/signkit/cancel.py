@@ -0,0 +1,121 @@
+"""
+协作式取消
+插件每次 init 持有一个 CancelToken，签到运行期间绑定到当前线程；
+等待、请求回退链、分页循环在检查点调用 check_cancelled / cancellable_sleep，
+stop_service 取消令牌后最多等待有限时间即返回，正在进行的运行在下一个检查点退出。
+Cancelled 继承 BaseException（与 asyncio.CancelledError 一致），不会被各处的 except Exception 吞掉
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+_local = threading.local()
+
+
+class Cancelled(BaseException):
+    pass
+
+
+class CancelToken:
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = ""
+        # 正在进行（绑定了本令牌）的运行数
+        self._active = 0
+        self._cond = threading.Condition()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = ""):
+        self.reason = reason or self.reason
+        self._event.set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled(self.reason or "已取消")
+
+    def sleep(self, seconds: float):
+        """
+        可被取消打断的等待
+        """
+        if seconds > 0 and self._event.wait(seconds):
+            raise Cancelled(self.reason or "已取消")
+        self.check()
+
+    @contextmanager
+    def running(self):
+        """
+        把令牌绑定到当前线程并计入进行中的运行，供 join 等待
+        """
+        previous = getattr(_local, "token", None)
+        _local.token = self
+        with self._cond:
+            self._active += 1
+        try:
+            yield self
+        finally:
+            _local.token = previous
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def join(self, timeout: float) -> bool:
+        """
+        等待进行中的运行退出，返回是否已全部退出
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._active:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    @property
+    def active(self) -> int:
+        with self._cond:
+            return self._active
+
+
+def current_token() -> Optional[CancelToken]:
+    return getattr(_local, "token", None)
+
+
+@contextmanager
+def bound(token: Optional[CancelToken]):
+    """
+    在其他线程中沿用提交方的令牌；token 为空时不做任何事
+    """
+    if token is None:
+        yield
+        return
+    with token.running():
+        yield
+
+
+def is_cancelled() -> bool:
+    token = current_token()
+    return token is not None and token.cancelled
+
+
+def check_cancelled():
+    token = current_token()
+    if token is not None:
+        token.check()
+
+
+def cancellable_sleep(seconds: float):
+    """
+    当前线程绑定了令牌时可被取消打断，否则等同 time.sleep
+    """
+    token = current_token()
+    if token is None:
+        if seconds > 0:
+            time.sleep(seconds)
+        return
+    token.sleep(seconds)
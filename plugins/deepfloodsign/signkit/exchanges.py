@@ -0,0 +1,170 @@
+"""
+请求/响应诊断环形缓冲
+按 endpoint（方法 + host + 路径，数字归一）各保留最近 N 次交互：耗时、后端、代理、状态、请求/响应头，
+正文截断后压缩存放，内存占用固定；插件在每次运行结束时持久化本站点的部分
+"""
+import base64
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# 路径中的数字（页码、用户 ID 等）归一，同类请求落在同一个 endpoint
+_DIGITS = re.compile(r'\d+')
+# 不落盘的敏感请求/响应头
+_REDACT = {"cookie", "set-cookie", "authorization", "x-csrf-token"}
+
+
+def endpoint_key(method: str, url: str) -> str:
+    parts = urlsplit(url)
+    return f"{method} {parts.hostname or ''}{_DIGITS.sub('{n}', parts.path)}"
+
+
+def _host_of(key: str) -> str:
+    return key.split(" ", 1)[-1].split("/", 1)[0]
+
+
+def _redact(headers) -> Dict[str, str]:
+    return {k: ("***" if k.lower() in _REDACT else str(v)) for k, v in dict(headers or {}).items()}
+
+
+def pack_body(content: Optional[bytes], limit: int) -> Optional[str]:
+    if not content:
+        return None
+    return base64.b64encode(zlib.compress(content[:limit], 6)).decode("ascii")
+
+
+def unpack_body(packed: Optional[str]) -> str:
+    if not packed:
+        return ""
+    try:
+        return zlib.decompress(base64.b64decode(packed)).decode("utf-8", errors="replace")
+    except Exception:
+        return ""
+
+
+class ExchangeLog:
+
+    def __init__(self, per_endpoint: int = 10, body_limit: int = 8192, max_endpoints: int = 32):
+        self.per_endpoint = per_endpoint
+        self.body_limit = body_limit
+        self.max_endpoints = max_endpoints
+        self._entries: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any], url: str, request_headers: Optional[dict] = None, resp=None,
+            stream: bool = False) -> Dict[str, Any]:
+        """
+        记录一次交互并返回该条记录；record 为传输层的请求记录，流式响应不读取正文
+        """
+        entry = {k: record.get(k) for k in ("time", "backend", "proxy", "status", "elapsed", "bytes", "queued", "error")}
+        entry["url"] = url
+        entry["request_headers"] = _redact(request_headers)
+        entry["response_headers"] = _redact(resp.headers if resp is not None else None)
+        entry["body"] = None if resp is None or stream else pack_body(resp.content, self.body_limit)
+        key = endpoint_key(record.get("method") or "GET", url)
+        with self._lock:
+            ring = self._entries.pop(key, None) or deque(maxlen=self.per_endpoint)
+            ring.append(entry)
+            # 最近使用的 endpoint 移到末尾，超出上限时淘汰最久未用的
+            self._entries[key] = ring
+            while len(self._entries) > self.max_endpoints:
+                self._entries.popitem(last=False)
+        return entry
+
+    def entries(self, host: str = None, endpoint: str = None, decode: bool = False) -> List[Dict[str, Any]]:
+        """
+        按时间倒序返回交互记录；decode 时把正文解压为文本
+        """
+        with self._lock:
+            items = [(key, dict(entry)) for key, ring in self._entries.items() for entry in ring]
+        result = []
+        for key, entry in items:
+            if endpoint and key != endpoint:
+                continue
+            if host and _host_of(key) != host:
+                continue
+            entry["endpoint"] = key
+            if decode:
+                entry["body"] = unpack_body(entry["body"])
+            result.append(entry)
+        return sorted(result, key=lambda x: x.get("time") or 0, reverse=True)
+
+    def dump(self, host: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        导出指定 host 的记录用于持久化（正文保持压缩）
+        """
+        with self._lock:
+            return {key: list(ring) for key, ring in self._entries.items()
+                    if _host_of(key) == host}
+
+    def load(self, data: Optional[Dict[str, List[Dict[str, Any]]]]):
+        """
+        恢复持久化的记录，已存在的 endpoint 不覆盖
+        """
+        if not data:
+            return
+        with self._lock:
+            for key, items in data.items():
+                if key not in self._entries:
+                    self._entries[key] = deque(items or [], maxlen=self.per_endpoint)
+            while len(self._entries) > self.max_endpoints:
+                self._entries.popitem(last=False)
+
+
+def exchanges_card(host: str, limit: int = 20) -> List[dict]:
+    """
+    详情页展示最近的请求记录，正文只显示开头一段
+    """
+    items = exchanges.entries(host=host, decode=True)[:limit]
+    if not items:
+        return []
+    rows = []
+    for item in items:
+        status = item.get("error") or item.get("status") or "-"
+        rows.append({
+            'component': 'tr',
+            'content': [
+                {'component': 'td', 'props': {'class': 'text-caption'},
+                 'text': time.strftime('%m-%d %H:%M:%S', time.localtime(item.get("time") or 0))},
+                {'component': 'td', 'props': {'class': 'text-caption'}, 'text': item["endpoint"]},
+                {'component': 'td', 'props': {'class': 'text-caption'},
+                 'text': f'{item.get("backend")} {"代理" if item.get("proxy") else "直连"}'},
+                {'component': 'td', 'props': {'class': 'text-caption'}, 'text': str(status)[:60]},
+                {'component': 'td', 'props': {'class': 'text-caption'}, 'text': f'{(item.get("elapsed") or 0) * 1000:.0f}ms'},
+                {'component': 'td', 'props': {'class': 'text-caption', 'style': 'max-width: 360px; word-break: break-all'},
+                 'text': (item.get("body") or "")[:200] or '-'},
+            ]
+        })
+    return [{
+        'component': 'VCard',
+        'props': {'variant': 'outlined', 'class': 'mb-4'},
+        'content': [
+            {'component': 'VCardTitle', 'props': {'class': 'text-h6'}, 'text': '🔍 最近请求记录'},
+            {
+                'component': 'VCardText',
+                'content': [{
+                    'component': 'VTable',
+                    'props': {'hover': True, 'density': 'compact'},
+                    'content': [
+                        {'component': 'thead', 'content': [{'component': 'tr', 'content': [
+                            {'component': 'th', 'text': '时间'},
+                            {'component': 'th', 'text': '接口'},
+                            {'component': 'th', 'text': '后端'},
+                            {'component': 'th', 'text': '状态'},
+                            {'component': 'th', 'text': '耗时'},
+                            {'component': 'th', 'text': '正文'},
+                        ]}]},
+                        {'component': 'tbody', 'content': rows}
+                    ]
+                }]
+            }
+        ]
+    }]
+
+
+# 进程内共享的诊断记录
+exchanges = ExchangeLog()
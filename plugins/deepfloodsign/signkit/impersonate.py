@@ -0,0 +1,110 @@
+"""
+curl_cffi 仿真指纹选择
+- 按 host 记住最近一次通过的仿真目标，下次请求直接使用，减少回退往返
+- 请求头中的 User-Agent / Client Hints 按所选目标生成，避免指纹与请求头版本不一致
+- 其他后端不声明 Chrome：UA 由后端会话自身给出，与其 TLS 指纹一致
+"""
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 候选仿真目标（均为 Chrome 桌面版，与插件请求头声明的浏览器一致），按优先级排列
+CANDIDATES = ("chrome136", "chrome131", "chrome124", "chrome120", "chrome110")
+DEFAULT_PROFILE = CANDIDATES[0]
+
+_VERSION = re.compile(r'chrome(\d+)')
+
+# 由后端决定的客户端标识请求头（小写）
+_CLIENT_KEYS = ("user-agent", "sec-ch-ua", "sec-ch-ua-mobile", "sec-ch-ua-platform")
+
+
+def client_headers(profile: str) -> Dict[str, str]:
+    """
+    生成与仿真目标一致的 User-Agent 及 Client Hints
+    """
+    match = _VERSION.match(profile or "")
+    if not match:
+        return {}
+    version = match.group(1)
+    return {
+        "User-Agent": f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      f"(KHTML, like Gecko) Chrome/{version}.0.0.0 Safari/537.36",
+        "Sec-CH-UA": f'"Chromium";v="{version}", "Not:A-Brand";v="24", "Google Chrome";v="{version}"',
+        "Sec-CH-UA-Mobile": "?0",
+        "Sec-CH-UA-Platform": '"Windows"',
+    }
+
+
+def apply_client_headers(headers: Optional[dict], profile: str) -> dict:
+    """
+    用仿真目标对应的值替换请求头中已有的 UA / Client Hints（不区分大小写），UA 缺失时补上
+    """
+    result = dict(headers or {})
+    lower = {key.lower(): key for key in result}
+    for key, value in client_headers(profile).items():
+        if key.lower() in lower:
+            result[lower[key.lower()]] = value
+        elif key == "User-Agent":
+            result[key] = value
+    return result
+
+
+def backend_headers(backend: str, headers: Optional[dict], profile: str = DEFAULT_PROFILE) -> dict:
+    """
+    按实际发出请求的后端生成请求头：curl_cffi 的 UA / Client Hints 与仿真目标一致；
+    cloudscraper、requests 去掉调用方给出的 UA / Client Hints，由会话的默认值（cloudscraper 按其浏览器配置，
+    requests 为自身 UA）补上，不在非浏览器指纹上声明 Chrome
+    """
+    if backend.startswith("curl_cffi"):
+        return apply_client_headers(headers, profile)
+    return {key: value for key, value in (headers or {}).items() if key.lower() not in _CLIENT_KEYS}
+
+
+class ImpersonationProfiles:
+
+    def __init__(self, candidates: tuple = CANDIDATES, max_tries: int = 3):
+        self.candidates_all = tuple(candidates)
+        # 单次请求最多尝试的仿真目标数
+        self.max_tries = max_tries
+        self._chosen: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, default: str = DEFAULT_PROFILE) -> str:
+        with self._lock:
+            item = self._chosen.get(host)
+        return item["profile"] if item else default
+
+    def candidates(self, host: str, default: str = DEFAULT_PROFILE) -> List[str]:
+        """
+        本次请求的尝试顺序：已记住的目标优先，其余按候选顺序补足
+        """
+        first = self.get(host, default)
+        ordered = [first] + [p for p in self.candidates_all if p != first]
+        return ordered[:self.max_tries]
+
+    def remember(self, host: str, profile: str):
+        with self._lock:
+            item = self._chosen.get(host)
+            if item and item["profile"] == profile:
+                item["hits"] += 1
+                return
+            self._chosen[host] = {"profile": profile, "hits": 1, "updated": time.time()}
+
+    def load(self, host: str, item: Optional[Dict[str, Any]]):
+        """
+        恢复持久化的选择；已不在候选列表中的目标忽略
+        """
+        if not item or item.get("profile") not in self.candidates_all:
+            return
+        with self._lock:
+            self._chosen.setdefault(host, dict(item, hits=item.get("hits", 0)))
+
+    def snapshot(self, host: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._chosen.get(host)
+            return dict(item) if item else None
+
+
+# 进程内共享的仿真目标选择
+impersonation = ImpersonationProfiles()
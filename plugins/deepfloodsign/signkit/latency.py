@@ -0,0 +1,104 @@
+"""
+自适应超时
+- LatencyTracker：按 host/后端 记录成功请求耗时，由分位数推导连接、读取超时
+- run_deadline：单次签到运行的总时限，回退链在剩余时间内尝试
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+_local = threading.local()
+
+
+class LatencyTracker:
+    """
+    样本不足时使用调用方给出的超时；样本足够后
+    读取超时 = p99 × factor，连接超时 = p50 × factor，各自限定在上下限之间
+    """
+
+    def __init__(self, size: int = 50, min_samples: int = 5, factor: float = 3.0,
+                 connect_bounds: Tuple[float, float] = (3.0, 10.0),
+                 read_bounds: Tuple[float, float] = (5.0, 60.0)):
+        self.size = size
+        self.min_samples = min_samples
+        self.factor = factor
+        self.connect_bounds = connect_bounds
+        self.read_bounds = read_bounds
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, backend: str, elapsed: float):
+        with self._lock:
+            self._samples.setdefault((host, backend), deque(maxlen=self.size)).append(elapsed)
+
+    def percentile(self, host: str, backend: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get((host, backend)) or ())
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+    def timeouts(self, host: str, backend: str, default: float) -> Tuple[float, float]:
+        """
+        返回 (连接超时, 读取超时)；default 为调用方给出的超时，同时作为读取超时上限
+        """
+        p50 = self.percentile(host, backend, 0.5)
+        p99 = self.percentile(host, backend, 0.99)
+        if p50 is None or p99 is None:
+            return min(self.connect_bounds[1], default), default
+        connect = min(max(p50 * self.factor, self.connect_bounds[0]), self.connect_bounds[1])
+        read = min(max(p99 * self.factor, self.read_bounds[0]), self.read_bounds[1], default)
+        return round(connect, 2), round(read, 2)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            keys = list(self._samples)
+        result = {}
+        for host, backend in keys:
+            p50 = self.percentile(host, backend, 0.5)
+            if p50 is None:
+                continue
+            result[f"{host}/{backend}"] = {"p50": round(p50, 3),
+                                           "p99": round(self.percentile(host, backend, 0.99), 3)}
+        return result
+
+
+@contextmanager
+def run_deadline(seconds: Optional[float]):
+    """
+    为当前线程设置运行时限（秒），嵌套时取更早的时限；seconds 为空或 <= 0 表示不限
+    """
+    previous = getattr(_local, "deadline", None)
+    deadline = previous
+    if seconds and seconds > 0:
+        deadline = time.monotonic() + seconds
+        if previous is not None:
+            deadline = min(deadline, previous)
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def start_deadline(seconds: Optional[float]):
+    """
+    在已有 run_deadline 作用域内从此刻起重新计时，用于把签到前的随机等待排除在时限之外
+    """
+    _local.deadline = time.monotonic() + seconds if seconds and seconds > 0 else None
+
+
+def remaining() -> Optional[float]:
+    """
+    当前运行剩余秒数，未设置时限时返回 None
+    """
+    deadline = getattr(_local, "deadline", None)
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+# 进程内共享，所有插件对同一 host/后端 的观测合并统计
+latency = LatencyTracker()
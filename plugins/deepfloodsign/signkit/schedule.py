@@ -0,0 +1,76 @@
+"""
+调度辅助
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+
+from .cancel import cancellable_sleep
+from .clock import clock
+
+
+class OffsetCronTrigger(BaseTrigger):
+    """
+    在 Cron 触发时间基础上整体偏移（秒），负数表示提前触发
+    adjust 在每次计算触发时间时调用，返回额外偏移秒数（如按服务器时钟偏差校正）
+    """
+
+    def __init__(self, crontab: str, offset: float, timezone=None, adjust: Optional[Callable[[], float]] = None):
+        self._cron = CronTrigger.from_crontab(crontab, timezone=timezone)
+        self._base = offset
+        self._adjust = adjust
+        # 已给出的触发时间 -> 对应的 Cron 时间；偏移随时钟校正变化，不能用当前偏移反推上次的 Cron 时间
+        self._slots: Dict[datetime, datetime] = {}
+
+    @property
+    def _offset(self) -> timedelta:
+        extra = 0.0
+        if self._adjust:
+            try:
+                extra = float(self._adjust() or 0)
+            except Exception:
+                extra = 0.0
+        return timedelta(seconds=self._base + extra)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        offset = self._offset
+        if previous_fire_time:
+            slot = self._slots.get(previous_fire_time, previous_fire_time - offset)
+            next_slot = self._cron.get_next_fire_time(slot, slot)
+        else:
+            next_slot = self._cron.get_next_fire_time(None, now - offset)
+        if not next_slot:
+            return None
+        # 当前偏移只作用于新的 Cron 时间
+        fire_time = next_slot + offset
+        if len(self._slots) >= 8:
+            self._slots.pop(next(iter(self._slots)))
+        self._slots[fire_time] = next_slot
+        return fire_time
+
+    def __str__(self):
+        return f"{self._cron} offset={self._offset}"
+
+
+def server_clock(host: str) -> Callable[[], float]:
+    """
+    生成 OffsetCronTrigger 的 adjust：服务器时钟快 θ 秒时，本机提前 θ 秒触发
+    """
+    return lambda: -clock.offset(host)
+
+
+def sleep_until(target: float, spin: float = 0.02):
+    """
+    睡眠到指定的 time.time() 时刻：先粗睡，最后 spin 秒内短间隔轮询，误差在毫秒级
+    """
+    while True:
+        left = target - time.time()
+        if left <= 0:
+            return
+        if left > spin * 2:
+            cancellable_sleep(left - spin)
+        else:
+            time.sleep(min(left, 0.001))
@@ -0,0 +1,54 @@
+"""
+单飞执行：同一 key 同时只跑一次，运行期间到达的调用等待并复用其结果
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def running(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Tuple[Any, bool]:
+        """
+        执行 func 或等待同 key 正在进行的调用
+        返回 (结果, 是否复用了其他调用的结果)；等待超时抛出 TimeoutError
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"等待进行中的任务超时: {key}")
+            if call.error:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+# 进程内共享，插件重载前后的同一账号也不会并发签到
+singleflight = SingleFlight()
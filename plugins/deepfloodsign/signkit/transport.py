@@ -0,0 +1,588 @@
+"""
+签到插件共用的 HTTP 传输层
+- 连接池复用的 requests / curl_cffi / cloudscraper 会话
+- 按顺序回退的仿真后端链（Cloudflare 防护兜底）
+- 系统代理读取与归一化
+- 响应解码（brotli 兜底）
+- 请求级耗时与流量统计
+- HTTP/2 模式：curl_cffi 会话协商 h2，同源的独立 GET 可预取并在同一连接上并发
+- 进程隔离：cloudscraper 后端可改由子进程执行，挑战求解不占用主进程 GIL
+"""
+import asyncio
+import importlib
+import importlib.util
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.log import logger
+
+from .admission import admission
+from .cancel import check_cancelled
+from .clock import clock
+from .exchanges import exchanges
+from .impersonate import DEFAULT_PROFILE, apply_client_headers, backend_headers, impersonation
+from .isolate import scraper_pool
+from .latency import latency, remaining
+from .profile import current_profile
+
+
+
+def _has_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except Exception:
+        return False
+
+
+# 只探测是否安装，不在导入插件时加载重量级后端
+# cloudscraper 作为 Cloudflare 备用方案，curl_cffi 用于仿真浏览器指纹
+HAS_CLOUDSCRAPER = _has_module("cloudscraper")
+HAS_CURL_CFFI = _has_module("curl_cffi")
+
+_backend_modules: Dict[str, Any] = {}
+_backend_lock = threading.Lock()
+
+
+def load_backend(backend: str):
+    """
+    首次使用时导入后端模块并缓存：cloudscraper 返回模块本身，curl_cffi 返回其 requests 子模块
+    """
+    with _backend_lock:
+        if backend not in _backend_modules:
+            if backend == "cloudscraper":
+                _backend_modules[backend] = importlib.import_module("cloudscraper")
+            elif backend == "curl_cffi":
+                _backend_modules[backend] = importlib.import_module("curl_cffi.requests")
+            else:
+                _backend_modules[backend] = requests
+        return _backend_modules[backend]
+
+# 默认回退顺序
+DEFAULT_BACKENDS = ("cloudscraper", "curl_cffi", "requests")
+
+# 请求令牌的默认最长排队时间（秒）
+ADMIT_TIMEOUT = 60.0
+
+# 按配置共享的传输层实例及其使用者计数
+_shared: Dict[tuple, "Transport"] = {}
+_shared_refs: Dict[tuple, int] = {}
+_shared_lock = threading.Lock()
+
+
+def normalize_proxies(proxies_input) -> Optional[Dict[str, str]]:
+    """
+    归一化代理配置为 requests 兼容格式 {"http": url, "https": url}
+    支持字符串或字典输入。
+    """
+    try:
+        if not proxies_input:
+            return None
+        if isinstance(proxies_input, str):
+            return {"http": proxies_input, "https": proxies_input}
+        if isinstance(proxies_input, dict):
+            http_url = proxies_input.get("http") or proxies_input.get("HTTP") or proxies_input.get("https") or proxies_input.get("HTTPS")
+            https_url = proxies_input.get("https") or proxies_input.get("HTTPS") or proxies_input.get("http") or proxies_input.get("HTTP")
+            if not http_url and not https_url:
+                return None
+            return {"http": http_url or https_url, "https": https_url or http_url}
+    except Exception as e:
+        logger.warning(f"代理归一化失败，将忽略代理: {str(e)}")
+    return None
+
+
+def system_proxies() -> Optional[Dict[str, str]]:
+    """
+    读取 MoviePilot 系统代理设置
+    """
+    try:
+        if getattr(settings, 'PROXY', None):
+            return normalize_proxies(settings.PROXY)
+    except Exception as e:
+        logger.error(f"获取代理设置出错: {str(e)}")
+    return None
+
+
+def decode_text(resp) -> str:
+    """
+    获取响应文本，后端未自动解压 brotli 时手动解压
+    """
+    encoding = (resp.headers.get('content-encoding') or '').lower()
+    if encoding == 'br':
+        try:
+            import brotli
+            return brotli.decompress(resp.content).decode('utf-8')
+        except Exception:
+            pass
+    return resp.text or ""
+
+
+def decode_json(resp) -> Any:
+    """
+    解析 JSON 响应，失败时基于解码后的文本再尝试一次
+    """
+    try:
+        return resp.json()
+    except Exception:
+        return json.loads(decode_text(resp) or "")
+
+
+def is_unexpected(resp, expect_json: bool = True) -> bool:
+    """
+    判断响应是否需要换后端：400/403，或期望 JSON 却返回了 HTML
+    """
+    if resp.status_code in (400, 403):
+        return True
+    if expect_json:
+        ct = resp.headers.get('Content-Type') or resp.headers.get('content-type') or ''
+        return 'text/html' in ct.lower()
+    return False
+
+
+class Transport:
+    """
+    带连接池和多后端回退的 HTTP 客户端，每个账号持有一个（会话 Cookie 不跨账号共享）
+    """
+
+    def __init__(self, use_proxy: bool = True, verify_ssl: bool = True,
+                 backends: tuple = DEFAULT_BACKENDS, impersonate: str = DEFAULT_PROFILE,
+                 log_prefix: str = "", history_size: int = 200, http2: bool = False,
+                 isolate_scraper: bool = False):
+        self.use_proxy = use_proxy
+        self.verify_ssl = verify_ssl
+        self.http2 = http2
+        self.isolate_scraper = isolate_scraper
+        self.backends = tuple(backends)
+        self.impersonate = impersonate
+        self.log_prefix = log_prefix
+        self.records: deque = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        # 会话在首次请求时才创建；创建失败的后端记入 _unavailable 后不再尝试
+        self._sessions: Dict[str, Any] = {}
+        self._unavailable: set = set()
+        # prefetch 预取的响应，按线程暂存，供随后同 URL 的 GET 直接取用
+        self._prefetched = threading.local()
+        # HTTP/2 预取复用同一个 AsyncSession 及其事件循环，连接在多次预取之间保持；同一时刻只有一个线程在预取
+        self._h2_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._h2_session = None
+        self._h2_lock = threading.Lock()
+
+    # ---------------------------------------------------------------- 会话
+
+    def _create_session(self, backend: str):
+        if backend == "cloudscraper" and self.isolate_scraper:
+            # 会话状态（请求头、Cookie）留在主进程，请求本身在子进程执行；cloudscraper 只在子进程中导入
+            return scraper_pool.session(f"{id(self):x}")
+        module = load_backend(backend)
+        if backend == "cloudscraper":
+            try:
+                return module.create_scraper(browser="chrome")
+            except Exception:
+                return module.create_scraper()
+        if backend == "curl_cffi":
+            if self.http2:
+                return module.Session(impersonate=self.impersonate, http_version="v2")
+            return module.Session(impersonate=self.impersonate)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _session(self, backend: str):
+        """
+        获取（必要时创建）指定后端的复用会话
+        """
+        with self._lock:
+            session = self._sessions.get(backend)
+            if session is None:
+                try:
+                    session = self._create_session(backend)
+                except Exception as e:
+                    self._unavailable.add(backend)
+                    logger.warning(f"{self.log_prefix}{backend} 初始化失败: {str(e)}")
+                    raise
+                self._sessions[backend] = session
+            return session
+
+    def available_backends(self) -> List[str]:
+        result = []
+        for backend in self.backends:
+            if backend in self._unavailable:
+                continue
+            if backend == "cloudscraper" and not HAS_CLOUDSCRAPER:
+                continue
+            if backend == "curl_cffi" and not HAS_CURL_CFFI:
+                continue
+            result.append(backend)
+        return result
+
+    @property
+    def proxies(self) -> Optional[Dict[str, str]]:
+        return system_proxies() if self.use_proxy else None
+
+    def close(self):
+        """
+        关闭所有会话（含 HTTP/2 预取会话及其事件循环），释放连接
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        with self._h2_lock:
+            loop, session = self._h2_loop, self._h2_session
+            self._h2_loop = self._h2_session = None
+        if loop is not None:
+            try:
+                if session is not None:
+                    loop.run_until_complete(session.close())
+            except Exception:
+                pass
+            finally:
+                loop.close()
+
+    # ---------------------------------------------------------------- 请求
+
+    def get(self, url: str, headers: dict = None, timeout: float = 30, **kwargs):
+        return self.request("GET", url, headers=headers, timeout=timeout, **kwargs)
+
+    def post(self, url: str, headers: dict = None, data=None, json=None, timeout: float = 30, **kwargs):
+        return self.request("POST", url, headers=headers, data=data, json=json, timeout=timeout, **kwargs)
+
+    def timeouts(self, url: str, backend: str, timeout: float = 30) -> Tuple[float, float]:
+        """
+        按观测到的延迟分位数推导 (连接超时, 读取超时)，并受当前运行剩余时间约束
+        """
+        connect, read = latency.timeouts(urlsplit(url).hostname or "", backend, timeout)
+        left = remaining()
+        if left is not None:
+            connect, read = min(connect, left), min(read, left)
+        return connect, read
+
+    def request(self, method: str, url: str, headers: dict = None, timeout: float = 30,
+                expect_json: bool = True, stream: bool = False, **kwargs):
+        """
+        按后端顺序发送请求，返回首个符合预期的响应；
+        全部不符合预期时返回最后一个响应，全部异常时抛出最后的异常
+        timeout 为读取超时上限，实际超时按延迟分位数自适应；设置了运行时限时，超出后不再尝试后续后端
+        """
+        if method == "GET":
+            resp = self._take_prefetched(url)
+            if resp is not None and not is_unexpected(resp, expect_json):
+                return resp
+        proxies = self.proxies
+        host = urlsplit(url).hostname or ""
+        last_resp = None
+        last_error = None
+        for backend in self.available_backends():
+            attempts = [(proxies, None)]
+            if backend == "curl_cffi":
+                # 先用该 host 记住的仿真目标，返回非预期时换候选目标；代理下仍失败再直连一次
+                profiles = impersonation.candidates(host, self.impersonate)
+                attempts = [(proxies, profile) for profile in profiles]
+                if proxies:
+                    attempts.append((None, profiles[0]))
+            for index, (attempt_proxies, profile) in enumerate(attempts):
+                # 插件停止时不再发起新的尝试
+                check_cancelled()
+                left = remaining()
+                if left is not None and left < 1:
+                    logger.warning(f"{self.log_prefix}已超出本次运行时限，停止尝试 {backend} {method}")
+                    if last_resp is not None:
+                        return last_resp
+                    raise last_error or TimeoutError("已超出本次运行时限")
+                # UA / Client Hints 按本次尝试的后端及仿真目标生成，与 TLS 指纹一致
+                options = dict(kwargs, headers=backend_headers(backend, headers, profile))
+                if profile:
+                    options["impersonate"] = profile
+                try:
+                    resp = self._send(backend, method, url, timeout=self.timeouts(url, backend, timeout),
+                                      proxies=attempt_proxies, stream=stream, **options)
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"{self.log_prefix}{backend} {method} 失败，将回退：{str(e)}")
+                    break
+                if not is_unexpected(resp, expect_json):
+                    if profile:
+                        impersonation.remember(host, profile)
+                    return resp
+                if last_resp is not None:
+                    try:
+                        last_resp.close()
+                    except Exception:
+                        pass
+                last_resp = resp
+                if index + 1 < len(attempts):
+                    next_proxies, next_profile = attempts[index + 1]
+                    hint = "，尝试无代理回退" if attempt_proxies and not next_proxies else f"，改用仿真目标 {next_profile}"
+                else:
+                    hint = "，尝试下一个后端"
+                logger.info(f"{self.log_prefix}{backend}{f'({profile})' if profile else ''} {method} "
+                            f"返回非预期 ({resp.status_code}){hint}")
+        if last_resp is not None:
+            return last_resp
+        if last_error:
+            raise last_error
+        raise RuntimeError("没有可用的请求后端")
+
+    def _new_record(self, backend: str, method: str, url: str, proxies: Optional[dict]) -> Dict[str, Any]:
+        return {
+            "time": time.time(),
+            "host": urlsplit(url).hostname or "",
+            "method": method,
+            "backend": backend,
+            "proxy": bool(proxies),
+            "status": None,
+            "elapsed": 0.0,
+            "bytes": 0,
+            "queued": 0.0,
+            # 排队结束、请求真正发出的时刻（time.time()）
+            "sent_at": None,
+            "error": None,
+        }
+
+    def _admit(self, record: Dict[str, Any], left: Optional[float] = None):
+        """
+        按 host 令牌桶限速，避免多账号/多插件同时打满站点和代理；
+        left 为本次运行剩余秒数（由发起请求的线程传入），排队不超过该时间，时限内拿不到令牌时按超出时限处理
+        """
+        timeout = ADMIT_TIMEOUT if left is None else max(0.0, min(left, ADMIT_TIMEOUT))
+        try:
+            record["queued"] = round(admission.acquire(record["host"], timeout=timeout), 3)
+        except TimeoutError:
+            if left is not None and left < ADMIT_TIMEOUT:
+                raise TimeoutError(f"已超出本次运行时限（{record['host']} 请求令牌排队）")
+            raise
+        if record["queued"] >= 1:
+            logger.info(f"{self.log_prefix}{record['host']} 请求排队 {record['queued']:.2f}s")
+
+    def _finish_record(self, record: Dict[str, Any], url: str, start: float, resp=None, stream: bool = False,
+                       request_headers: Optional[dict] = None):
+        record["elapsed"] = round(time.monotonic() - start, 3)
+        if resp is not None:
+            record["status"] = resp.status_code
+            if resp.status_code < 500:
+                latency.observe(record["host"], record["backend"], record["elapsed"])
+            # 顺带采样服务器 Date 头，估计时钟偏差
+            received = time.time()
+            clock.observe(record["host"], received - record["elapsed"], received, resp.headers.get("Date"))
+            # 调用方（如抢签）按实际发出时刻计算偏差，不含令牌排队和回退链中前面的尝试
+            try:
+                resp.sent_at = record["sent_at"]
+            except AttributeError:
+                pass
+            if not stream:
+                record["bytes"] = len(resp.content or b"")
+        self.records.append(record)
+        entry = exchanges.add(record, url, request_headers, resp, stream=stream)
+        if stream and resp is not None:
+            self._count_streamed(resp, record, entry)
+        profile = current_profile()
+        if profile is not None:
+            # 每次后端尝试单独成段，便于区分回退链、代理与直连的耗时
+            profile.add(f"{record['method']} {urlsplit(url).path}", start, record["elapsed"],
+                        backend=record["backend"], proxy="代理" if record["proxy"] else "直连",
+                        status=record["status"], error=record["error"],
+                        queued=record["queued"] or None)
+
+    @staticmethod
+    def _count_streamed(resp, record: Dict[str, Any], entry: Dict[str, Any]):
+        """
+        流式响应的字节数随调用方读取逐块累计到请求记录和诊断记录，提前停止读取时即为实际读取量
+        """
+        iter_content = resp.iter_content
+
+        def counted(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                record["bytes"] += len(chunk)
+                entry["bytes"] = record["bytes"]
+                yield chunk
+
+        try:
+            resp.iter_content = counted
+        except AttributeError:
+            pass
+
+    def _send(self, backend: str, method: str, url: str, proxies: Optional[dict] = None, **kwargs):
+        session = self._session(backend)
+        record = self._new_record(backend, method, url, proxies)
+        start = time.monotonic()
+        resp = None
+        try:
+            self._admit(record, remaining())
+            start = time.monotonic()
+            record["sent_at"] = time.time()
+            resp = session.request(method, url, proxies=proxies or {}, verify=self.verify_ssl, **kwargs)
+            return resp
+        except Exception as e:
+            record["error"] = str(e)[:200]
+            raise
+        finally:
+            self._finish_record(record, url, start, resp, stream=bool(kwargs.get("stream")),
+                                request_headers=kwargs.get("headers"))
+
+    # ---------------------------------------------------------------- HTTP/2
+
+    def prefetch(self, calls: List[Tuple[str, dict]], timeout: float = 30) -> int:
+        """
+        HTTP/2 模式下并发预取多个同源 GET：首个请求建立连接，其余请求在该连接上多路复用；
+        响应暂存到当前线程，随后对同一 URL 的 get() 直接取用，不符合预期时照常走回退链。
+        未开启 HTTP/2 或 curl_cffi 不可用时不做任何事。返回成功预取的数量
+        """
+        if not self.http2 or not calls or "curl_cffi" not in self.available_backends():
+            return 0
+        check_cancelled()
+        try:
+            with self._h2_lock:
+                if self._h2_loop is None:
+                    self._h2_loop = asyncio.new_event_loop()
+                results = self._h2_loop.run_until_complete(self._multiplex(calls, timeout))
+        except Exception as e:
+            logger.warning(f"{self.log_prefix}HTTP/2 预取失败，改为逐个请求: {str(e)}")
+            return 0
+        # 每次预取替换上一批未取用的响应
+        store = self._prefetched.responses = {}
+        now = time.monotonic()
+        for (url, _), resp in zip(calls, results):
+            if isinstance(resp, Exception):
+                logger.info(f"{self.log_prefix}预取 {url} 失败: {str(resp)}")
+                continue
+            store[url] = (now, resp)
+        return len(store)
+
+    async def _multiplex(self, calls: List[Tuple[str, dict]], timeout: float) -> List[Any]:
+        if self._h2_session is None:
+            # 在预取事件循环上创建，会话绑定到该循环
+            self._h2_session = load_backend("curl_cffi").AsyncSession(impersonate=self.impersonate,
+                                                                      http_version="v2")
+        session = self._h2_session
+        proxies = self.proxies
+        left = remaining()
+
+        async def fetch(url: str, headers: dict):
+            record = self._new_record("curl_cffi/h2", "GET", url, proxies)
+            # 令牌桶的等待是同步的，放到线程里避免阻塞事件循环上其他流；运行时限是线程局部的，需显式传入。
+            # 线程池随本次预取结束，事件循环常驻也不会留下空闲线程
+            await asyncio.get_running_loop().run_in_executor(admit_pool, self._admit, record, left)
+            start = time.monotonic()
+            record["sent_at"] = time.time()
+            resp = None
+            profile = impersonation.get(record["host"], self.impersonate)
+            try:
+                resp = await session.request("GET", url, headers=apply_client_headers(headers, profile),
+                                             impersonate=profile, proxies=proxies or {}, verify=self.verify_ssl,
+                                             timeout=self.timeouts(url, "curl_cffi/h2", timeout))
+                return resp
+            except Exception as e:
+                record["error"] = str(e)[:200]
+                raise
+            finally:
+                self._finish_record(record, url, start, resp, request_headers=headers)
+
+        with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="signkit-admit") as admit_pool:
+            first, rest = calls[0], calls[1:]
+            results: List[Any] = list(await asyncio.gather(fetch(*first), return_exceptions=True))
+            results += await asyncio.gather(*(fetch(url, headers) for url, headers in rest),
+                                            return_exceptions=True)
+            return results
+
+    def _take_prefetched(self, url: str, max_age: float = 60):
+        store = getattr(self._prefetched, "responses", None)
+        item = store.pop(url, None) if store else None
+        if item is None or time.monotonic() - item[0] > max_age:
+            return None
+        return item[1]
+
+    # ---------------------------------------------------------------- Cloudflare
+
+    def warmup(self, warm_url: str, cookie: str, domain: str):
+        """
+        cloudscraper 先访问页面取得 clearance，再把用户 Cookie 写入会话
+        返回可直接复用的 scraper，失败返回 None
+        """
+        if "cloudscraper" not in self.available_backends():
+            return None
+        try:
+            scraper = self._session("cloudscraper")
+            scraper.get(warm_url, proxies=self.proxies or {}, verify=self.verify_ssl,
+                        timeout=self.timeouts(warm_url, "cloudscraper"))
+            for part in (cookie or '').split(';'):
+                kv = part.strip().split('=', 1)
+                if len(kv) == 2:
+                    name, value = kv[0].strip(), kv[1].strip()
+                    if name and value:
+                        scraper.cookies.set(name, value, domain=domain)
+            return scraper
+        except Exception as e:
+            logger.warning(f"{self.log_prefix}cloudscraper 预热失败: {str(e)}")
+            return None
+
+    # ---------------------------------------------------------------- 统计
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按 host/后端 汇总请求次数、失败次数、平均耗时和流量
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        for record in list(self.records):
+            key = f"{record['host']}/{record['backend']}"
+            item = result.setdefault(key, {"count": 0, "errors": 0, "elapsed": 0.0, "bytes": 0})
+            item["count"] += 1
+            item["elapsed"] += record["elapsed"]
+            item["bytes"] += record["bytes"]
+            if record["error"] or (record["status"] or 0) >= 400:
+                item["errors"] += 1
+        for item in result.values():
+            item["avg_ms"] = round(item.pop("elapsed") / item["count"] * 1000, 1)
+        return result
+
+
+def shared_transport(use_proxy: bool = True, verify_ssl: bool = True,
+                     backends: tuple = DEFAULT_BACKENDS, log_prefix: str = "",
+                     http2: bool = False, account: str = "", isolate_scraper: bool = False) -> Transport:
+    """
+    获取按账号和配置共享的传输层，同一账号的插件实例、配置重载之间复用同一组连接池
+    会话带有 Cookie 罐（服务端下发的会话 Cookie、预热时写入的用户 Cookie、clearance），
+    因此必须按 account（Cookie 摘要）区分，不同账号互不可见
+    每次取得都要以 release_transport 归还，最后一个使用者归还时关闭
+    """
+    key = (bool(use_proxy), bool(verify_ssl), tuple(backends), log_prefix, bool(http2), account,
+           bool(isolate_scraper))
+    with _shared_lock:
+        transport = _shared.get(key)
+        if transport is None:
+            transport = Transport(use_proxy=use_proxy, verify_ssl=verify_ssl,
+                                  backends=backends, log_prefix=log_prefix, http2=http2,
+                                  isolate_scraper=isolate_scraper)
+            _shared[key] = transport
+        _shared_refs[key] = _shared_refs.get(key, 0) + 1
+        return transport
+
+
+def release_transport(transport: Optional[Transport]):
+    """
+    归还 shared_transport 取得的传输层；没有其他使用者时从共享表移除并关闭会话（含隔离的 cloudscraper 子进程）
+    """
+    if transport is None:
+        return
+    with _shared_lock:
+        key = next((k for k, v in _shared.items() if v is transport), None)
+        if key is None:
+            return
+        _shared_refs[key] -= 1
+        if _shared_refs[key] > 0:
+            return
+        del _shared[key], _shared_refs[key]
+    transport.close()
@@ -1,29 +1,76 @@
 import re
-import requests
-from typing import Any, List, Dict, Tuple
-from apscheduler.triggers.cron import CronTrigger
+import time
+import random
+import codecs
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, List, Dict, Tuple, Optional
+from apscheduler.triggers.date import DateTrigger
 from app.plugins import _PluginBase
 from app.core.event import eventmanager, Event
 from app.schemas.types import EventType
 from app.log import logger
+from .signkit import (ENSHAN_SIGN, CancelToken, Cancelled, NotificationQueue, OffsetCronTrigger,
+                      RunProfile, SignSite, Transport, admission, check_cancelled, clock_alert,
+                      exchanges_card, orchestrator, profiled, release_transport, reload_plan, run_deadline,
+                      server_clock, shared_transport, singleflight, span, spread_offset, timing_card)
 
-class EnshanSignin(_PluginBase):
+
+class EnshanSignin(_PluginBase, SignSite):
     # 插件元数据
     plugin_name = "恩山论坛签到"
     plugin_desc = "恩山无线论坛(Right.com.cn)每日自动签到"
     plugin_icon = "https://raw.githubusercontent.com/kimjioo/MoviePilot-Plugins/main/icon/enshan.ico"
-    plugin_version = "1.3"
+    plugin_version = "1.4.0"
     plugin_author = "kimjioo"
     author_url = "https://github.com/kimjioo"
     plugin_config_prefix = "enshansignin_"
     plugin_order = 10
     auth_level = 2
+    # 统一签到站点信息
+    site_name = "enshan"
+    site_host = "www.right.com.cn"
 
     # 私有属性
     _enabled = False
     _cookie = ""
     _cron = ""
     _notify = False
+    _use_proxy = False
+    _batch_sign = False
+    _spread_window = 0
+    _transport: Optional[Transport] = None
+    _notify_queue: Optional[NotificationQueue] = None
+    _cancel: Optional[CancelToken] = None
+    # 上次生效的配置，表单保存时与之比较做增量重载
+    _applied_config: Optional[Dict[str, Any]] = None
+    # 配置项变化时需要重建的部分，空元组表示直接生效；未登记的配置项变化时全量重载
+    _reload_effects = {
+        "enabled": ("lifecycle", "schedule"),
+        "cookie": ("lifecycle", "schedule", "transport"),
+        "cron": ("schedule",),
+        "spread_window": ("schedule",),
+        "batch_sign": ("batch", "schedule"),
+        "use_proxy": ("transport",),
+        "notify": (),
+    }
+
+    # 论坛地址
+    _base_url = "https://www.right.com.cn/forum"
+    # 流式扫描：分块大小及跨块保留长度
+    _scan_chunk_size = 4096
+    _scan_overlap = 64
+    # 单次扫描匹配 formhash 与登录状态标记
+    _scan_pattern = re.compile(r'formhash=([a-zA-Z0-9]+)|(退出)|(登录)')
+    # Cookie 预检提前量及结果有效期（秒）
+    _probe_ahead = 3600
+    _probe_ttl = 6 * 3600
+    # 频繁限制退避：每日重试上限、基础间隔及单次间隔上限（秒）
+    _retry_limit = 4
+    _retry_base = 300
+    _retry_cap = 3600
+    _run_deadline = 60  # 单次签到请求链的总时限（秒）
+    _stop_timeout = 5  # 停止插件时等待进行中签到退出的上限（秒）
 
     def init_plugin(self, config: dict = None):
         """
@@ -34,30 +81,104 @@ class EnshanSignin(_PluginBase):
             self._cookie = config.get("cookie")
             self._cron = config.get("cron") or "0 9 * * *"
             self._notify = config.get("notify")
+            self._use_proxy = config.get("use_proxy", False)
+            self._batch_sign = config.get("batch_sign", False)
+            try:
+                self._spread_window = max(0, int(config.get("spread_window") or 0))
+            except (ValueError, TypeError):
+                self._spread_window = 0
+
+        # 与上次生效的配置比较，只重建变化项涉及的部分
+        current = self._config_dict()
+        plan = reload_plan(self._applied_config, current, self._reload_effects)
+        logger.info(f"【恩山签到】配置重载: {plan}")
+        if "lifecycle" in plan:
+            # 停止现有任务
+            self.stop_service()
+            self._cancel = CancelToken()
+        self._applied_config = current
+
+        if "transport" in plan or not self._transport:
+            # 共用传输层：requests 直连优先，遇到 Cloudflare 拦截再换仿真后端；按账号区分，会话 Cookie 不跨账号共享
+            previous = self._transport
+            self._transport = shared_transport(use_proxy=self._use_proxy,
+                                               backends=("requests", "curl_cffi", "cloudscraper"),
+                                               log_prefix="【恩山签到】", account=self._cookie_digest())
+            release_transport(previous)
+            self.restore_impersonation()
+            self.restore_exchanges()
+        if not self._notify_queue:
+            self._notify_queue = NotificationQueue(send=self._send_event, digest_title="恩山签到：")
 
-        # 停止现有任务
-        self.stop_service()
+        if "batch" in plan or "lifecycle" in plan:
+            orchestrator.unregister(self)
+            if self.batch_enabled():
+                orchestrator.register(self)
+        if "schedule" in plan:
+            # 仅重建签到与预检任务，待执行的重试任务保留；全量加载时从持久化状态恢复重试
+            self._register_jobs(restore_retry="lifecycle" in plan)
 
-        if self._enabled and self._cookie:
+    def _config_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._enabled,
+            "cookie": self._cookie,
+            "cron": self._cron,
+            "notify": self._notify,
+            "use_proxy": self._use_proxy,
+            "batch_sign": self._batch_sign,
+            "spread_window": self._spread_window,
+        }
+
+    def _register_jobs(self, restore_retry: bool = False):
+        for job_id in ("enshan_signin_job", "enshan_probe_job"):
             try:
-                self.register_scheduler(
-                    id="enshan_signin_job",
-                    func=self.sign_in,
-                    trigger=CronTrigger.from_crontab(self._cron)
-                )
-                logger.info(f"【恩山签到】任务已加载，下次运行时间: {self._cron}")
-            except Exception as e:
-                logger.error(f"【恩山签到】定时任务注册失败: {e}")
+                self.unregister_scheduler(id=job_id)
+            except Exception:
+                pass
+        if not (self._enabled and self._cookie):
+            return
+        # 按账号确定性错峰，避免与其他账号/插件同一秒触发
+        offset = spread_offset(f"{self.site_name}:{self._cookie_digest()}", self._spread_window)
+        try:
+            self.register_scheduler(
+                id="enshan_signin_job",
+                func=self.batch_sign if self.batch_enabled() else self.sign_in,
+                # 按服务器时钟偏差校正触发时刻
+                trigger=OffsetCronTrigger(self._cron, offset, adjust=server_clock(self.site_host))
+            )
+            self.register_scheduler(
+                id="enshan_probe_job",
+                func=self.probe_cookie,
+                trigger=OffsetCronTrigger(self._cron, offset - self._probe_ahead)
+            )
+            if restore_retry:
+                self._restore_retry()
+            logger.info(f"【恩山签到】任务已加载，下次运行时间: {self._cron}"
+                        + (f"，错峰推迟 {offset} 秒" if offset else ""))
+        except Exception as e:
+            logger.error(f"【恩山签到】定时任务注册失败: {e}")
 
     def get_state(self) -> bool:
         return self._enabled and bool(self._cookie)
 
+    def batch_enabled(self) -> bool:
+        return bool(self._enabled and self._cookie and self._batch_sign)
+
+    def sign_account(self, account: str) -> Any:
+        return self.sign_in()
+
+    def batch_sign(self):
+        """
+        统一签到入口：由首个触发的插件跑完所有参与统一签到的站点
+        """
+        return orchestrator.run(trigger=self.plugin_name)
+
     @staticmethod
     def get_command() -> List[Dict[str, Any]]:
         return []
 
     def get_api(self) -> List[Dict[str, Any]]:
-        return []
+        return [self.exchanges_api()]
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         """
@@ -96,6 +217,34 @@ class EnshanSignin(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'use_proxy',
+                                            'label': '使用代理',
+                                            'hint': '使用系统配置的代理访问恩山'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 4},
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'batch_sign',
+                                            'label': '统一签到',
+                                            'hint': '与其他签到插件合并为一次调度'
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     },
@@ -137,6 +286,22 @@ class EnshanSignin(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {'cols': 12, 'md': 6},
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'spread_window',
+                                            'label': '错峰窗口(秒)',
+                                            'type': 'number',
+                                            'placeholder': '0',
+                                            'hint': '按账号在窗口内固定推迟触发，0 表示不错峰'
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     }
@@ -146,19 +311,50 @@ class EnshanSignin(_PluginBase):
             "enabled": False,
             "cookie": "",
             "cron": "0 9 * * *",
-            "notify": False
+            "notify": False,
+            "use_proxy": False,
+            "batch_sign": False,
+            "spread_window": 0
         }
 
     def get_page(self) -> List[dict]:
-        return []
+        page = clock_alert(self.site_host)
+        last_run = self.get_data("last_run") or {}
+        if last_run.get("timing"):
+            page += timing_card(last_run["timing"],
+                                f'⏱️ 最近一次签到耗时 {last_run.get("date", "")} {last_run.get("outcome") or ""}')
+        page += exchanges_card(self.site_host)
+        return page
 
     def stop_service(self):
-        try:
-            self.unregister_scheduler(id="enshan_signin_job")
-        except Exception:
-            pass
+        orchestrator.unregister(self)
+        # 停止后的下一次加载按全量处理
+        self._applied_config = None
+        # 进行中的签到在下一次请求尝试或读取下一块页面时退出
+        if self._cancel:
+            self._cancel.cancel("插件停止")
+            if not self._cancel.join(timeout=self._stop_timeout):
+                logger.warning("【恩山签到】签到仍在等待当前请求返回，将在请求结束后退出")
+        if self._notify_queue:
+            self._notify_queue.flush(timeout=5)
+        for job_id in ("enshan_signin_job", "enshan_probe_job", "enshan_retry_job"):
+            try:
+                self.unregister_scheduler(id=job_id)
+            except Exception:
+                pass
+        release_transport(self._transport)
+        self._transport = None
 
     def send_notification(self, title, text):
+        """
+        通知入队，由后台线程合并去重后经事件总线发送
+        """
+        if self._notify_queue:
+            self._notify_queue.put(title, text)
+        else:
+            self._send_event(title, text)
+
+    def _send_event(self, title, text):
         """
         使用事件总线发送系统通知
         """
@@ -173,44 +369,173 @@ class EnshanSignin(_PluginBase):
         except Exception as e:
             logger.error(f"【恩山签到】发送通知失败: {e}")
 
+    def _headers(self) -> Dict[str, str]:
+        # 不指定 User-Agent：由传输层按实际使用的后端给出，与其 TLS 指纹一致
+        return {
+            "Cookie": self._cookie,
+            "Host": "www.right.com.cn",
+            "Referer": "https://www.right.com.cn/forum/forum.php"
+        }
+
+    def _cookie_digest(self) -> str:
+        return hashlib.sha1((self._cookie or "").encode("utf-8")).hexdigest()[:16]
+
+    def _save_cookie_probe(self, valid: bool):
+        """
+        缓存 Cookie 有效性判定，绑定当前 Cookie 摘要
+        """
+        self.save_data("cookie_probe", {
+            "valid": valid,
+            "checked_at": time.time(),
+            "cookie": self._cookie_digest()
+        })
+
+    def _cookie_probe_verdict(self) -> Optional[bool]:
+        """
+        读取未过期的 Cookie 预检结果，无有效结果时返回 None
+        """
+        probe = self.get_data("cookie_probe") or {}
+        if not probe or probe.get("cookie") != self._cookie_digest():
+            return None
+        if time.time() - float(probe.get("checked_at") or 0) > self._probe_ttl:
+            return None
+        return probe.get("valid")
+
+    def probe_cookie(self) -> Optional[bool]:
+        """
+        签到窗口前的轻量 Cookie 预检，流式扫描签到页顶栏即可判定
+        """
+        if not self._cookie:
+            return None
+        try:
+            scan = self._scan_page(f"{self._base_url}/plugin.php?id=dsu_paulsign:sign")
+        except Exception as e:
+            logger.warning(f"【恩山签到】Cookie 预检请求失败，暂不判定: {e}")
+            return None
+        if scan["logout"]:
+            verdict = True
+        elif scan["login"]:
+            verdict = False
+        else:
+            logger.info("【恩山签到】Cookie 预检无法判定")
+            return None
+        self._save_cookie_probe(verdict)
+        logger.info(f"【恩山签到】Cookie 预检完成: {'有效' if verdict else '已失效'}")
+        if not verdict:
+            self.send_notification("恩山Cookie已失效", "签到前预检发现Cookie已失效，请尽快重新配置。")
+        return verdict
+
     def sign_in(self):
         """
-        执行签到逻辑
+        执行签到；同一账号已有签到在进行时等待并复用其结果
+        """
+        outcome, shared = singleflight.do(f"{self.site_name}:{self._cookie_digest()}", self._profiled_sign_in)
+        if shared:
+            logger.info(f"【恩山签到】复用进行中签到的结果: {outcome}")
+        return outcome
+
+    def _profiled_sign_in(self):
+        """
+        在耗时剖析下执行签到，并保存本次运行的阶段耗时
+        """
+        profile = RunProfile()
+        if self._cancel is None:
+            self._cancel = CancelToken()
+        with self._cancel.running(), profiled(profile):
+            try:
+                outcome = self._sign_in()
+            except Cancelled as e:
+                logger.warning(f"【恩山签到】已取消: {str(e)}")
+                outcome = "cancelled"
+        if self._cookie:
+            self.save_data("last_run", {
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "outcome": outcome,
+                "timing": profile.to_dict(),
+            })
+            self.save_impersonation()
+            self.save_exchanges()
+        return outcome
+
+    def _sign_in(self):
+        """
+        执行签到逻辑，按结果分类决定是否退避重试
         """
         if not self._cookie:
-            return
+            return None
 
         logger.info("【恩山签到】开始执行...")
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Cookie": self._cookie,
-            "Host": "www.right.com.cn",
-            "Referer": "https://www.right.com.cn/forum/forum.php"
-        }
+        # Cookie 预检已判定失效时，直接提示更新
+        if self._cookie_probe_verdict() is False:
+            logger.error("【恩山签到】Cookie 预检结果为失效，跳过本次签到")
+            self.send_notification("恩山签到失败", "Cookie已失效，请重新配置。")
+            self._clear_retry()
+            return "cookie_invalid"
 
-        session = requests.Session()
-        session.headers.update(headers)
+        with run_deadline(self._run_deadline):
+            outcome, detail = self._do_sign()
 
+        with span("结果处理"):
+            self._handle_outcome(outcome, detail)
+
+        stat = admission.stats().get(self.site_host)
+        if stat:
+            logger.info(f"【恩山签到】请求速率: 近1分钟 {stat['requests']} 次 "
+                        f"({stat['rate_per_min']}/分钟，上限 {stat['limit_per_min']}/分钟)，累计排队 {stat['waited']}s")
+        return outcome
+
+    def _handle_outcome(self, outcome: str, detail: str):
+        """
+        按签到结果更新重试状态并发送通知
+        """
+        if outcome == "success":
+            logger.info("【恩山签到】成功")
+            self._clear_retry()
+            if not self._notify:
+                self.send_notification("恩山签到成功", "今日签到任务已完成。")
+        elif outcome == "cookie_invalid":
+            logger.error("【恩山签到】Cookie已失效")
+            self._clear_retry()
+            self.send_notification("恩山签到失败", "Cookie已失效，请重新配置。")
+        elif outcome in ("rate_limited", "error"):
+            logger.warning(f"【恩山签到】{'操作频繁' if outcome == 'rate_limited' else '请求出错'}: {detail}")
+            delay = self._schedule_retry()
+            if delay is None:
+                self.send_notification("恩山签到失败", f"{detail}，今日重试次数已用完。")
+            elif outcome == "error":
+                self.send_notification("恩山签到出错", f"{detail}，将在 {delay // 60} 分钟后重试。")
+        else:
+            logger.error(f"【恩山签到】未知响应: {detail}")
+            self._clear_retry()
+            self.send_notification("恩山签到异常", f"响应: {detail}")
+
+    def _do_sign(self) -> Tuple[str, str]:
+        """
+        执行一次签到请求
+        返回 (分类, 说明)，分类为 success / rate_limited / cookie_invalid / error / unknown
+        """
         try:
-            # 1. 获取 formhash
-            index_url = "https://www.right.com.cn/forum/forum.php"
-            resp = session.get(index_url, timeout=30)
-            
-            if "登录" in resp.text and "退出" not in resp.text:
-                logger.error("【恩山签到】Cookie已失效")
-                self.send_notification("恩山签到失败", "Cookie已失效，请重新配置。")
-                return
-
-            match = re.search(r'formhash=([a-zA-Z0-9]+)', resp.text)
-            if not match:
-                logger.error("【恩山签到】无法获取 formhash")
-                return
-            
-            formhash = match.group(1)
+            # 1. 获取 formhash（优先轻量页面，流式扫描命中即断开）
+            scan = None
+            for page_url in (f"{self._base_url}/plugin.php?id=dsu_paulsign:sign",
+                             f"{self._base_url}/forum.php"):
+                with span("扫描页面"):
+                    scan = self._scan_page(page_url)
+                if scan["formhash"] or scan["login"]:
+                    break
+
+            if scan["login"] and not scan["logout"]:
+                self._save_cookie_probe(False)
+                return "cookie_invalid", "Cookie已失效"
+
+            if not scan["formhash"]:
+                return "unknown", "无法获取 formhash"
+
+            formhash = scan["formhash"]
 
             # 2. 签到
-            sign_url = f"https://www.right.com.cn/forum/plugin.php?id=dsu_paulsign:sign&operation=qiandao&infloat=1&inajax=1"
+            sign_url = f"{self._base_url}/plugin.php?id=dsu_paulsign:sign&operation=qiandao&infloat=1&inajax=1"
             data = {
                 "formhash": formhash,
                 "qdxq": "kx",
@@ -219,20 +544,131 @@ class EnshanSignin(_PluginBase):
                 "fastreply": "0"
             }
 
-            sign_resp = session.post(sign_url, data=data, timeout=30)
-            res_text = sign_resp.text
+            with span("签到请求"):
+                sign_resp = self._transport.post(sign_url, headers=self._headers(), data=data,
+                                                 timeout=30, expect_json=False)
+                res_text = sign_resp.text
 
             # 3. 结果判断
-            if "恭喜你签到成功" in res_text or "已经签到" in res_text:
-                logger.info("【恩山签到】成功")
-                if not self._notify:
-                    self.send_notification("恩山签到成功", "今日签到任务已完成。")
-            elif "请稍后再试" in res_text:
-                logger.warning("【恩山签到】操作频繁")
-            else:
-                logger.error(f"【恩山签到】未知响应: {res_text[:50]}")
-                self.send_notification("恩山签到异常", f"响应: {res_text[:50]}")
+            label = ENSHAN_SIGN.classify(res_text)
+            if label == "success":
+                self._save_cookie_probe(True)
+                return "success", "今日签到任务已完成"
+            if label == "rate_limited":
+                return "rate_limited", "操作频繁，请稍后再试"
+            return "unknown", res_text[:50]
+
+        except Exception as e:
+            return "error", str(e)
+
+    def _retry_state(self) -> Dict[str, Any]:
+        """
+        读取当日重试状态，跨天自动归零
+        """
+        state = self.get_data("retry_state") or {}
+        if state.get("date") != datetime.now().strftime("%Y-%m-%d"):
+            return {"date": datetime.now().strftime("%Y-%m-%d"), "count": 0, "next_run": None}
+        return state
 
+    def _clear_retry(self):
+        try:
+            self.unregister_scheduler(id="enshan_retry_job")
+        except Exception:
+            pass
+        self.save_data("retry_state", {})
+
+    def _schedule_retry(self) -> Optional[int]:
+        """
+        指数退避并加抖动安排重试，返回延迟秒数；超出当日上限返回 None
+        """
+        state = self._retry_state()
+        if state["count"] >= self._retry_limit:
+            logger.warning(f"【恩山签到】今日重试已达上限 ({self._retry_limit})")
+            self.save_data("retry_state", dict(state, next_run=None))
+            return None
+        backoff = min(self._retry_base * (2 ** state["count"]), self._retry_cap)
+        delay = int(random.uniform(backoff / 2, backoff))
+        run_date = datetime.now() + timedelta(seconds=delay)
+        state.update(count=state["count"] + 1, next_run=run_date.strftime("%Y-%m-%d %H:%M:%S"))
+        self.save_data("retry_state", state)
+        self._register_retry(run_date)
+        logger.info(f"【恩山签到】将在 {delay} 秒后重试 ({state['count']}/{self._retry_limit})")
+        return delay
+
+    def _register_retry(self, run_date: datetime):
+        try:
+            self.unregister_scheduler(id="enshan_retry_job")
+        except Exception:
+            pass
+        try:
+            self.register_scheduler(
+                id="enshan_retry_job",
+                func=self.sign_in,
+                trigger=DateTrigger(run_date=run_date)
+            )
         except Exception as e:
-            logger.error(f"【恩山签到】请求出错: {e}")
-            self.send_notification("恩山签到出错", str(e))
+            logger.error(f"【恩山签到】重试任务注册失败: {e}")
+
+    def _restore_retry(self):
+        """
+        重启后恢复当日未执行的重试任务
+        """
+        state = self._retry_state()
+        if not state.get("next_run"):
+            return
+        try:
+            run_date = datetime.strptime(state["next_run"], "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return
+        run_date = max(run_date, datetime.now() + timedelta(seconds=60))
+        self._register_retry(run_date)
+        logger.info(f"【恩山签到】已恢复重试任务，计划时间: {run_date.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def _scan_page(self, url: str) -> Dict[str, Any]:
+        """
+        流式读取页面，单次扫描提取 formhash 及登录状态，全部命中后立即关闭连接
+        """
+        scan = {"formhash": None, "logout": False, "login": False, "bytes": 0, "total": None}
+        resp = self._transport.get(url, headers=self._headers(), timeout=30, stream=True, expect_json=False)
+        try:
+            length = resp.headers.get("Content-Length")
+            scan["total"] = int(length) if length and length.isdigit() else None
+            # 未声明 charset 时按 utf-8 解码，避免 requests 默认的 ISO-8859-1 误判中文
+            charset = re.search(r'charset=([\w-]+)', resp.headers.get("Content-Type", ""))
+            try:
+                decoder = codecs.getincrementaldecoder(charset.group(1) if charset else "utf-8")(errors="ignore")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+            tail = ""
+            # 紧贴窗口末尾的 formhash 可能被块边界截断，等下一块补全后再采用
+            trailing = None
+            for chunk in resp.iter_content(chunk_size=self._scan_chunk_size):
+                check_cancelled()
+                if not chunk:
+                    continue
+                scan["bytes"] += len(chunk)
+                window = tail + decoder.decode(chunk)
+                for match in self._scan_pattern.finditer(window):
+                    if match.group(1):
+                        if match.end() < len(window):
+                            scan["formhash"] = match.group(1)
+                        else:
+                            trailing = match.group(1)
+                    elif match.group(2):
+                        scan["logout"] = True
+                    else:
+                        scan["login"] = True
+                # 已登录且拿到 formhash，无需继续读取
+                if scan["formhash"] and scan["logout"]:
+                    break
+                tail = window[-self._scan_overlap:]
+            else:
+                # 读到页面末尾，末尾的匹配已是完整的
+                if not scan["formhash"] and trailing:
+                    scan["formhash"] = trailing
+        finally:
+            resp.close()
+        logger.info(f"【恩山签到】扫描 {url} 读取 {scan['bytes']} 字节"
+                    f"（页面总长 {scan['total'] if scan['total'] is not None else '未知'}），"
+                    f"formhash={'已获取' if scan['formhash'] else '未获取'}")
+        return scan
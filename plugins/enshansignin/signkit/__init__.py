@@ -0,0 +1,34 @@
+"""
+签到插件公共组件
+插件市场按插件目录单独安装，本包随 deepfloodsign、enshansignin 各带一份（插件内以 .signkit 引用），
+两份内容须保持一致（tests/test_signkit_copies.py 校验）；需全进程唯一的实例经 shared.py 在副本间共享
+"""
+from .admission import Admission, TokenBucket, admission, spread_offset
+from .background import BackgroundTasks, background
+from .cancel import (CancelToken, Cancelled, cancellable_sleep, check_cancelled, current_token,
+                     is_cancelled)
+from .classify import DEEPFLOOD_MESSAGE, DEEPFLOOD_PAGE, ENSHAN_SIGN, Classifier
+from .clock import ClockSkew, clock, clock_alert
+from .exchanges import ExchangeLog, exchanges, exchanges_card
+from .export import FORMATS as EXPORT_FORMATS, in_range, parse_day, stream_export
+from .impersonate import ImpersonationProfiles, backend_headers, client_headers, impersonation
+from .isolate import RemoteScraper, ScraperPool, scraper_pool
+from .latency import LatencyTracker, latency, run_deadline, start_deadline
+from .notify import NotificationDispatcher, NotificationQueue, dispatcher as notify_dispatcher
+from .orchestrator import SignOrchestrator, SignSite, orchestrator
+from .profile import RunProfile, current_profile, profiled, span, timing_card
+from .reload import ReloadPlan, reload_plan
+from .schedule import OffsetCronTrigger, server_clock, sleep_until
+from .shared import API_VERSION, shared
+from .singleflight import SingleFlight, singleflight
+from .transport import (
+    HAS_CLOUDSCRAPER,
+    HAS_CURL_CFFI,
+    Transport,
+    decode_json,
+    decode_text,
+    normalize_proxies,
+    release_transport,
+    shared_transport,
+    system_proxies,
+)
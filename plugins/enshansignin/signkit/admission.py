@@ -0,0 +1,118 @@
+"""
+请求准入控制
+- spread_offset：按账号确定性错峰，避免所有任务在同一秒触发
+- TokenBucket / Admission：按 host 的令牌桶限速，并统计实际请求速率
+"""
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from .cancel import cancellable_sleep
+
+
+def spread_offset(key: str, window: int) -> int:
+    """
+    根据账号标识计算 [0, window) 内的固定偏移秒数，同一账号每天偏移一致
+    """
+    if not key or not window or window <= 0:
+        return 0
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % int(window)
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = 60.0) -> float:
+        """
+        取得一个令牌，返回等待的秒数；超时仍未取得时抛出 TimeoutError
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else timeout
+            if now - start + wait > timeout:
+                raise TimeoutError("等待请求令牌超时")
+            cancellable_sleep(wait)
+
+
+class Admission:
+    """
+    按 host 维护令牌桶，并记录最近一段时间的放行情况
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, period: int = 60):
+        self.rate = rate
+        self.burst = burst
+        self.period = period
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._admitted: Dict[str, deque] = {}
+        self._waited: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, rate: float, burst: int):
+        """
+        单独设置某个 host 的限速
+        """
+        with self._lock:
+            self._buckets[host] = TokenBucket(rate, burst)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+                self._admitted[host] = deque(maxlen=1000)
+                self._waited[host] = 0.0
+            return bucket
+
+    def acquire(self, host: str, timeout: float = 60.0) -> float:
+        """
+        请求放行前调用，返回等待秒数
+        """
+        waited = self._bucket(host).acquire(timeout)
+        with self._lock:
+            self._admitted.setdefault(host, deque(maxlen=1000)).append(time.monotonic())
+            self._waited[host] = self._waited.get(host, 0.0) + waited
+        return waited
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各 host 最近 period 秒内的实际请求速率（次/分钟）及累计排队时间
+        """
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for host, admitted in self._admitted.items():
+                recent = sum(1 for t in admitted if now - t <= self.period)
+                result[host] = {
+                    "requests": recent,
+                    "rate_per_min": round(recent * 60 / self.period, 2),
+                    "limit_per_min": round((self._buckets[host].rate if host in self._buckets else self.rate) * 60, 2),
+                    "waited": round(self._waited.get(host, 0.0), 2),
+                }
+        return result
+
+
+# 进程内共享的准入控制，所有插件的同 host 请求共用令牌桶
+admission = Admission()
@@ -0,0 +1,55 @@
+"""
+低优先级后台任务
+签到关键路径之外的补充请求（用户信息、排名、收益统计）交给单个后台线程串行执行，
+同一 key 已在排队时不重复提交
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.log import logger
+
+from .cancel import Cancelled, bound, check_cancelled, current_token
+
+
+class BackgroundTasks:
+
+    def __init__(self, name: str = "signkit-bg"):
+        self._name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, func: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        提交后台任务；同 key 任务尚未完成时返回已有的 Future
+        任务沿用提交方线程的取消令牌，插件停止时一并取消
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None and not future.done():
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self._name)
+            future = self._executor.submit(self._run, key, current_token(), func, *args, **kwargs)
+            self._pending[key] = future
+            return future
+
+    def pending(self, key: str) -> bool:
+        with self._lock:
+            future = self._pending.get(key)
+            return future is not None and not future.done()
+
+    def _run(self, key: str, token, func: Callable, *args, **kwargs):
+        try:
+            with bound(token):
+                check_cancelled()
+                return func(*args, **kwargs)
+        except Cancelled as e:
+            logger.info(f"后台任务 {key} 已取消: {str(e)}")
+        except Exception as e:
+            logger.warning(f"后台任务 {key} 执行失败: {str(e)}")
+
+
+# 进程内共享的后台任务队列
+background = BackgroundTasks()
@@ -0,0 +1,79 @@
+"""
+响应分类
+规则表按优先级排列，编译为一个带命名分组的正则，对正文前 limit 个字符做一遍扫描，
+所有命中中取表中最靠前的规则，判定顺序由规则表显式决定。
+模式应尽量是短字面量，组合条件用前瞻表达（如 签到(?=.*?成功)），避免一个匹配吞掉后面的另一个。
+各分支都以普通字符开头时，整体前加首字符集合的前瞻，引擎可跳过不可能命中的位置
+"""
+import re
+from typing import Iterable, Optional, Sequence, Set, Tuple
+
+_SPECIAL = set("\\.^$*+?{}[]()|")
+
+
+def _first_chars(patterns: Iterable[str]) -> Optional[Set[str]]:
+    """
+    按 | 粗略切分，收集各段首字符；切分可能落在分组内部，得到的是超集，不影响正确性。
+    任一段以元字符开头时无法确定，返回 None
+    """
+    chars = set()
+    for pattern in patterns:
+        for part in pattern.split("|"):
+            if not part or part[0] in _SPECIAL:
+                return None
+            chars.add(part[0])
+    return chars
+
+
+class Classifier:
+
+    def __init__(self, rules: Sequence[Tuple[str, str]], limit: int = 4096, default: str = "unknown"):
+        self.rules = tuple(rules)
+        self.limit = limit
+        self.default = default
+        body = "|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern) in enumerate(self.rules))
+        first = _first_chars(pattern for _, pattern in self.rules)
+        if first:
+            body = f"(?=[{re.escape(''.join(sorted(first)))}])(?:{body})"
+        self._pattern = re.compile(body, re.S)
+
+    def match(self, text: Optional[str]) -> Tuple[str, Optional[str]]:
+        """
+        返回 (类别, 命中的片段)，无命中时返回 (default, None)
+        """
+        best, hit = None, None
+        for m in self._pattern.finditer((text or "")[:self.limit]):
+            index = int(m.lastgroup[1:])
+            if best is None or index < best:
+                best, hit = index, m.group(0)
+                if best == 0:
+                    break
+        if best is None:
+            return self.default, None
+        return self.rules[best][0], hit
+
+    def classify(self, text: Optional[str]) -> str:
+        return self.match(text)[0]
+
+
+# deepflood 签到接口 JSON 中的 message
+DEEPFLOOD_MESSAGE = Classifier([
+    ("signed", r"鸡腿"),
+    ("already_signed", r"已完成签到"),
+    ("cookie_invalid", r"USER NOT FOUND"),
+    ("signed", r"签到(?=.*?(?:成功|完成))"),
+], limit=512)
+
+# deepflood 签到接口返回的非 JSON 页面
+DEEPFLOOD_PAGE = Classifier([
+    ("signed", r"鸡腿|签到成功|签到完成|success"),
+    ("already_signed", r"已完成签到"),
+    ("waf_get", r"Cannot GET /api/attendance"),
+    ("cookie_invalid", r"登录|注册|你好啊，陌生人"),
+])
+
+# 恩山签到提交后的 ajax 响应
+ENSHAN_SIGN = Classifier([
+    ("success", r"恭喜你签到成功|已经签到"),
+    ("rate_limited", r"请稍后再试"),
+])
@@ -0,0 +1,96 @@
+"""
+服务器时钟偏差估计
+响应的 Date 头精度为 1 秒，单个样本只能确定偏差所在区间：
+服务器在 [发出, 收到] 之间某一时刻生成 Date，且 Date 是向下取整的秒，
+因此 偏差 ∈ [Date - 收到时刻, Date + 1 - 发出时刻]。
+对同一 host 的多个样本取区间交集，样本落在不同的亚秒相位时区间迅速收窄；
+交集为空说明本机时钟跳变或漂移，丢弃旧样本重新开始
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ClockSkew:
+
+    def __init__(self, max_age: float = 6 * 3600, max_uncertainty: float = 2.0):
+        # 超过 max_age 的交集不再收窄，重新开始，以跟上缓慢漂移
+        self.max_age = max_age
+        # 不确定度超过该值时不用于调度
+        self.max_uncertainty = max_uncertainty
+        self._bounds: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, sent: float, received: float, date_header: Optional[str]):
+        """
+        记录一个样本；sent/received 为 time.time() 时刻
+        """
+        if not host or not date_header:
+            return
+        try:
+            server = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            return
+        low, high = server - received, server + 1 - sent
+        with self._lock:
+            item = self._bounds.get(host)
+            if item and received - item["since"] <= self.max_age:
+                new_low, new_high = max(item["low"], low), min(item["high"], high)
+                if new_low <= new_high:
+                    item.update(low=new_low, high=new_high, samples=item["samples"] + 1, updated=received)
+                    return
+            self._bounds[host] = {"low": low, "high": high, "samples": 1, "since": received, "updated": received}
+
+    def estimate(self, host: str) -> Optional[Tuple[float, float]]:
+        """
+        返回 (偏差, 不确定度)，偏差为正表示服务器时钟比本机快；无样本时返回 None
+        """
+        with self._lock:
+            item = self._bounds.get(host)
+            if not item:
+                return None
+            return (item["low"] + item["high"]) / 2, (item["high"] - item["low"]) / 2
+
+    def offset(self, host: str) -> float:
+        """
+        用于调度的偏差：估计足够可信时返回偏差，否则返回 0
+        """
+        estimate = self.estimate(host)
+        if not estimate or estimate[1] > self.max_uncertainty:
+            return 0.0
+        return estimate[0]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = dict(self._bounds)
+        now = time.time()
+        return {host: {"offset": round((item["low"] + item["high"]) / 2, 3),
+                       "uncertainty": round((item["high"] - item["low"]) / 2, 3),
+                       "samples": item["samples"],
+                       "age": round(now - item["updated"], 1)}
+                for host, item in items.items()}
+
+
+def clock_alert(host: str) -> List[dict]:
+    """
+    详情页展示当前偏差估计及是否已用于校正定时任务
+    """
+    skew = clock.stats().get(host)
+    if not skew:
+        return []
+    applied = "定时任务已按偏差校正" if clock.offset(host) else "不确定度过大，暂未校正"
+    return [{
+        'component': 'VAlert',
+        'props': {
+            'type': 'info',
+            'variant': 'tonal',
+            'class': 'mb-2',
+            'text': f'{host} 服务器时钟偏差 {skew["offset"]:+.2f}s ±{skew["uncertainty"]:.2f}s'
+                    f'（{skew["samples"]} 个样本），{applied}'
+        }
+    }]
+
+
+# 进程内共享，所有插件对同一 host 的样本合并估计
+clock = ClockSkew()
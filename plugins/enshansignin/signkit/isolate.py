@@ -0,0 +1,235 @@
+"""
+cloudscraper 进程隔离
+Cloudflare JS 挑战的求解是纯 Python 计算，放在 MoviePilot 进程里会在签到时刻与下载、刮削、界面争抢 GIL。
+开启后 cloudscraper 后端改由子进程（scraper_worker.py，独立解释器，不导入 MoviePilot）执行：
+- ScraperPool：小进程池，任务经 stdin/stdout 的 JSON 行传递，每个任务有超时，超时即杀掉子进程并按需重启
+- RemoteScraper：主进程侧的会话替身，接口与 requests.Session 的常用部分一致，
+  默认请求头和 Cookie 保存在主进程，每个任务带入、随结果带回，子进程重启不丢 clearance
+"""
+import atexit
+import base64
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+import requests
+from requests.cookies import RequestsCookieJar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from app.log import logger
+
+from .cancel import Cancelled, current_token
+from .latency import remaining
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraper_worker.py")
+
+
+class _Worker:
+    """
+    一个 cloudscraper 子进程；同一时刻只处理一个任务
+    """
+
+    def __init__(self):
+        self.proc = subprocess.Popen([sys.executable, "-u", WORKER_PATH],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, bufsize=1, encoding="utf-8")
+        self._replies: queue.Queue = queue.Queue()
+        threading.Thread(target=self._read, name="scraper-worker-reader", daemon=True).start()
+
+    def _read(self):
+        try:
+            for line in self.proc.stdout:
+                self._replies.put(line)
+        except Exception:
+            pass
+        # 子进程退出
+        self._replies.put(None)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def call(self, task: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self.proc.stdin.write(json.dumps(task) + "\n")
+        self.proc.stdin.flush()
+        token = current_token()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self._replies.get(timeout=min(0.5, max(0.0, deadline - time.monotonic())))
+                break
+            except queue.Empty:
+                # 与线程内的请求不同，子进程中的挑战求解可以随时终止
+                if token is not None and token.cancelled:
+                    self.kill()
+                    raise Cancelled(token.reason or "已取消")
+                if time.monotonic() >= deadline:
+                    self.kill()
+                    raise TimeoutError(f"cloudscraper 子进程任务超时（{timeout:.0f}s），已终止")
+        if line is None:
+            raise RuntimeError(f"cloudscraper 子进程已退出（{self.proc.poll()}）")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error") or "cloudscraper 子进程任务失败")
+        return reply["result"]
+
+    def kill(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class ScraperPool:
+
+    def __init__(self, size: int = 1, task_timeout: float = 60):
+        self.size = size
+        self.task_timeout = task_timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._stats = {"tasks": 0, "timeouts": 0, "started": 0}
+        # 未关闭的 RemoteScraper，全部关闭后结束空闲子进程
+        self._sessions: set = set()
+
+    def _take(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+            self._stats["started"] += 1
+        return _Worker()
+
+    def run(self, task: Dict[str, Any], timeout: float = None) -> Dict[str, Any]:
+        """
+        在空闲子进程中执行一个任务；timeout 同时限制排队等待和执行时间
+        """
+        timeout = timeout or self.task_timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("cloudscraper 子进程繁忙")
+        worker = None
+        try:
+            worker = self._take()
+            self._stats["tasks"] += 1
+            return worker.call(task, timeout)
+        except TimeoutError:
+            self._stats["timeouts"] += 1
+            raise
+        finally:
+            if worker is not None:
+                if worker.alive():
+                    with self._lock:
+                        self._idle.append(worker)
+                else:
+                    logger.warning("cloudscraper 子进程已退出，下次任务时重新启动")
+            self._slots.release()
+
+    def session(self, session_id: str) -> "RemoteScraper":
+        with self._lock:
+            self._sessions.add(session_id)
+        return RemoteScraper(self, session_id)
+
+    def release(self, session_id: str):
+        """
+        会话关闭；最后一个会话关闭时结束空闲子进程，下次任务再按需启动
+        """
+        with self._lock:
+            self._sessions.discard(session_id)
+            if self._sessions:
+                return
+        self.close()
+
+    def close(self):
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.kill()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, idle=len(self._idle))
+
+
+def _to_response(result: Dict[str, Any]) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = result["status"]
+    resp.url = result.get("url") or ""
+    resp.reason = result.get("reason") or ""
+    resp.headers = CaseInsensitiveDict(result.get("headers") or [])
+    resp._content = base64.b64decode(result.get("content") or "")
+    resp._content_consumed = True
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    return resp
+
+
+def _encode_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    options = {}
+    for key in ("headers", "params", "json", "proxies", "verify", "allow_redirects"):
+        if kwargs.get(key) is not None:
+            options[key] = dict(kwargs[key]) if key in ("headers", "proxies") else kwargs[key]
+    timeout = kwargs.get("timeout")
+    if timeout is not None:
+        options["timeout"] = list(timeout) if isinstance(timeout, tuple) else timeout
+    data = kwargs.get("data")
+    if isinstance(data, (bytes, str)):
+        options["data_b64"] = base64.b64encode(data.encode("utf-8") if isinstance(data, str) else data).decode("ascii")
+    elif data is not None:
+        options["data"] = data
+    return options
+
+
+class RemoteScraper:
+    """
+    子进程中 cloudscraper 会话的替身；流式请求会被整体读回
+    """
+
+    def __init__(self, pool: ScraperPool, session_id: str):
+        self.pool = pool
+        self.session_id = session_id
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict()
+        self.cookies = RequestsCookieJar()
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        with self._lock:
+            task = {
+                "session": self.session_id,
+                "method": method,
+                "url": url,
+                "headers": dict(self.headers),
+                "cookies": [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+                            for c in self.cookies],
+                "options": _encode_options(kwargs),
+            }
+            timeout = self.pool.task_timeout
+            left = remaining()
+            if left is not None:
+                timeout = max(1.0, min(timeout, left))
+            result = self.pool.run(task, timeout)
+            self.headers = CaseInsensitiveDict(result.get("session_headers") or {})
+            self.cookies.clear()
+            for cookie in result.get("cookies") or []:
+                self.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain") or "",
+                                 path=cookie.get("path") or "/")
+        return _to_response(result)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.pool.release(self.session_id)
+
+
+# 进程内共享，一个子进程即可满足签到场景
+scraper_pool = ScraperPool()
+atexit.register(scraper_pool.close)
@@ -0,0 +1,157 @@
+"""
+异步通知队列
+签到线程只负责入队，由进程内唯一的发送线程在短窗口内合并、去重后统一发送：
+- NotificationQueue：每个插件实例一个，保存待发送的通知及合并规则
+- NotificationDispatcher：所有队列共用一个线程，哪个队列的窗口到期就发送哪个，空闲一段时间后线程退出
+"""
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.log import logger
+
+from .shared import shared
+
+# 去重时忽略数字（重试次数、分钟数、时间戳等）
+_DIGITS = re.compile(r'\d+')
+
+
+class NotificationDispatcher:
+    """
+    通知发送线程：按各队列首条通知入队时间 + 窗口排期，到期后取出该队列的全部通知合并发送
+    """
+
+    def __init__(self, idle_exit: float = 60.0):
+        self.idle_exit = idle_exit
+        self._due: Dict["NotificationQueue", float] = {}
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def schedule(self, channel: "NotificationQueue", due: float):
+        """
+        排期发送；队列已在排期中时保持原到期时间，窗口内后续的通知随之合并
+        """
+        with self._cond:
+            self._due.setdefault(channel, due)
+            if not (self._worker and self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._run, name="signkit-notify", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+
+    def cancel(self, channel: "NotificationQueue"):
+        """
+        撤销队列的排期，由调用方自行发送
+        """
+        with self._cond:
+            self._due.pop(channel, None)
+
+    def _next_ready(self) -> Optional[List["NotificationQueue"]]:
+        """
+        等待并取出到期的队列；空闲超过 idle_exit 时返回 None，线程退出
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [channel for channel, due in self._due.items() if due <= now]
+                if ready:
+                    for channel in ready:
+                        del self._due[channel]
+                    return ready
+                if self._due:
+                    self._cond.wait(min(self._due.values()) - now)
+                elif not self._cond.wait(self.idle_exit) and not self._due:
+                    # 退出前在锁内确认无排期，避免与 schedule 竞争丢消息
+                    self._worker = None
+                    return None
+
+    def _run(self):
+        while True:
+            ready = self._next_ready()
+            if ready is None:
+                return
+            for channel in ready:
+                channel.drain()
+
+
+# 进程内共享的通知发送线程，各插件自带的 signkit 副本取到同一个
+dispatcher = shared("notify_dispatcher", NotificationDispatcher)
+
+
+class NotificationQueue:
+    """
+    有界通知队列：窗口期内的多条消息合并为一条摘要，同类消息只保留最新一条
+    """
+
+    def __init__(self, send: Callable[[str, str], None], digest_title: str,
+                 window: float = 5.0, maxsize: int = 100):
+        self._send = send
+        self.digest_title = digest_title
+        self.window = window
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._pending: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        # 同一队列同时只有一次发送，保证先入队的先发出
+        self._sending = threading.Lock()
+
+    def put(self, title: str, text: str):
+        """
+        入队一条通知，不阻塞调用方；队列满时丢弃并计数
+        """
+        with self._lock:
+            if len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                logger.warning(f"通知队列已满，丢弃通知: {title}")
+                return
+            self._pending.append((title or "", text or ""))
+        dispatcher.schedule(self, time.monotonic() + self.window)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        立即发送已入队的通知（插件停止时调用）：从发送线程的排期中取回本队列自行发送，
+        发送线程正在发送本队列时只等它完成；返回是否在超时前完成
+        """
+        dispatcher.cancel(self)
+        return self.drain(timeout)
+
+    def drain(self, timeout: float = -1) -> bool:
+        """
+        取出全部待发送通知合并发送；timeout 为等待本队列进行中发送的最长秒数，-1 表示一直等待
+        """
+        if not self._sending.acquire(timeout=timeout):
+            return False
+        try:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._dispatch(batch)
+        finally:
+            self._sending.release()
+        return True
+
+    def _dispatch(self, batch: List[Tuple[str, str]]):
+        merged: Dict[str, List] = {}
+        for title, text in batch:
+            key = _DIGITS.sub("#", f"{title}\n{text}")
+            if key in merged:
+                merged[key][2] += 1
+                merged[key][0], merged[key][1] = title, text
+            else:
+                merged[key] = [title, text, 1]
+        items = list(merged.values())
+        if len(items) == 1:
+            title, text, count = items[0]
+            if count > 1:
+                text = f"{text}\n（同类通知 {count} 条已合并）"
+        else:
+            title = f"{self.digest_title}{len(items)} 条通知"
+            parts = []
+            for item_title, item_text, count in items:
+                suffix = f"（×{count}）" if count > 1 else ""
+                parts.append(f"▶ {item_title}{suffix}\n{item_text}")
+            text = "\n\n".join(parts)
+        try:
+            self._send(title, text)
+        except Exception as e:
+            logger.error(f"发送通知失败: {str(e)}")
@@ -0,0 +1,228 @@
+"""
+统一签到调度
+- SignSite：签到插件接入统一调度所需实现的基类
+- SignOrchestrator：用有界线程池跑完所有站点/账号，按 host 限制并发，每个账号每个签到日只跑一次
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.log import logger
+
+from .exchanges import exchanges
+from .impersonate import impersonation
+from .shared import shared
+
+
+class SignSite:
+    """
+    签到站点基类，与 _PluginBase 一同继承
+    """
+    # 站点名称及主机名（用于按 host 限制并发）
+    site_name: str = ""
+    site_host: str = ""
+    # 站点签到日在该时区的零点切换
+    site_tz = ZoneInfo("Asia/Shanghai")
+
+    def batch_enabled(self) -> bool:
+        """
+        是否参与统一签到
+        """
+        return False
+
+    def sign_accounts(self) -> List[str]:
+        """
+        需要签到的账号标识列表，单账号插件返回 ["default"]
+        """
+        return ["default"]
+
+    def sign_day(self) -> str:
+        """
+        当前所处的签到日（站点时区）
+        """
+        return datetime.now(tz=self.site_tz).strftime('%Y-%m-%d')
+
+    def sign_account(self, account: str) -> Any:
+        """
+        为单个账号执行签到，返回结果（会写入报告的 outcome 字段）
+        """
+        raise NotImplementedError
+
+    def restore_impersonation(self):
+        """
+        恢复持久化的仿真目标选择
+        """
+        try:
+            impersonation.load(self.site_host, self.get_data('impersonation'))
+        except Exception as e:
+            logger.warning(f"恢复仿真目标失败: {str(e)}")
+
+    def save_impersonation(self):
+        """
+        仿真目标选择有变化时持久化
+        """
+        item = impersonation.snapshot(self.site_host)
+        if not item:
+            return
+        try:
+            saved = self.get_data('impersonation') or {}
+            if saved.get("profile") != item["profile"]:
+                logger.info(f"{self.site_host} 仿真目标更新为 {item['profile']}")
+                self.save_data('impersonation', item)
+        except Exception as e:
+            logger.warning(f"保存仿真目标失败: {str(e)}")
+
+    def restore_exchanges(self):
+        """
+        恢复持久化的请求诊断记录
+        """
+        try:
+            exchanges.load(self.get_data('exchanges'))
+        except Exception as e:
+            logger.warning(f"恢复请求记录失败: {str(e)}")
+
+    def save_exchanges(self):
+        """
+        持久化本站点的请求诊断记录（正文已压缩），每次运行结束时调用一次
+        """
+        try:
+            self.save_data('exchanges', exchanges.dump(self.site_host))
+        except Exception as e:
+            logger.warning(f"保存请求记录失败: {str(e)}")
+
+    def exchanges_api(self) -> Dict[str, Any]:
+        """
+        get_api 中注册的请求诊断接口
+        """
+        return {
+            "path": "/exchanges",
+            "endpoint": self.get_exchanges,
+            "methods": ["GET"],
+            "summary": "最近请求记录",
+            "description": "按时间倒序返回最近的请求/响应记录，可按 endpoint 过滤",
+        }
+
+    def get_exchanges(self, endpoint: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        return exchanges.entries(host=self.site_host, endpoint=endpoint, decode=True)[:limit]
+
+    def save_batch_report(self, report: Dict[str, Any]):
+        """
+        保存统一签到报告，默认写入插件数据
+        """
+        try:
+            self.save_data('batch_report', report)
+        except Exception as e:
+            logger.warning(f"保存统一签到报告失败: {str(e)}")
+
+
+class SignOrchestrator:
+    """
+    统一签到调度器：首个触发的插件负责跑完所有已注册站点，
+    同一签到日内其他插件的触发会跳过已完成的站点/账号
+    """
+
+    def __init__(self, max_workers: int = 4, per_host: int = 1):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._sites: Dict[int, SignSite] = {}
+        # (站点, 账号) -> 最近一次跑过的签到日
+        self._last_run: Dict[Tuple[str, str], str] = {}
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def register(self, site: SignSite):
+        with self._lock:
+            self._sites[id(site)] = site
+
+    def unregister(self, site: SignSite):
+        with self._lock:
+            self._sites.pop(id(site), None)
+
+    def _host_limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def _pending_tasks(self) -> List[Tuple[SignSite, str, str]]:
+        with self._lock:
+            sites = list(self._sites.values())
+        tasks = []
+        for site in sites:
+            try:
+                if not site.batch_enabled():
+                    continue
+                accounts = site.sign_accounts()
+                day = site.sign_day()
+            except Exception as e:
+                logger.warning(f"读取站点 {site.site_name} 账号失败: {str(e)}")
+                continue
+            for account in accounts:
+                if self._last_run.get((site.site_name, account)) == day:
+                    continue
+                tasks.append((site, account, day))
+        return tasks
+
+    def run(self, trigger: str = "") -> Optional[Dict[str, Any]]:
+        """
+        执行一次统一签到；已有批次在运行时直接返回 None
+        """
+        if not self._run_lock.acquire(blocking=False):
+            logger.info(f"统一签到正在进行，忽略触发: {trigger}")
+            return None
+        try:
+            tasks = self._pending_tasks()
+            if not tasks:
+                logger.info(f"本签到日已无待签到站点，触发来源: {trigger}")
+                return None
+            started = time.monotonic()
+            logger.info(f"统一签到开始，触发来源: {trigger}，共 {len(tasks)} 个任务")
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks)),
+                                    thread_name_prefix="signkit") as pool:
+                entries = list(pool.map(lambda task: self._run_task(*task, started), tasks))
+            report = {
+                "date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "trigger": trigger,
+                "elapsed": round(time.monotonic() - started, 3),
+                "tasks": entries,
+            }
+            self._log_report(report)
+            self.last_report = report
+            for site in {id(task[0]): task[0] for task in tasks}.values():
+                site.save_batch_report(report)
+            return report
+        finally:
+            self._run_lock.release()
+
+    def _run_task(self, site: SignSite, account: str, day: str, started: float) -> Dict[str, Any]:
+        entry = {"site": site.site_name, "host": site.site_host, "account": account,
+                 "queued": 0.0, "elapsed": 0.0, "outcome": None}
+        with self._host_limit(site.site_host):
+            begin = time.monotonic()
+            entry["queued"] = round(begin - started, 3)
+            try:
+                result = site.sign_account(account)
+                entry["outcome"] = result.get("status") if isinstance(result, dict) else result
+            except Exception as e:
+                logger.error(f"统一签到 {site.site_name}/{account} 出错: {str(e)}", exc_info=True)
+                entry["outcome"] = f"出错: {str(e)}"
+            entry["elapsed"] = round(time.monotonic() - begin, 3)
+        self._last_run[(site.site_name, account)] = day
+        return entry
+
+    @staticmethod
+    def _log_report(report: Dict[str, Any]):
+        lines = [f"统一签到完成，共 {len(report['tasks'])} 个任务，总耗时 {report['elapsed']:.2f}s"]
+        for entry in sorted(report["tasks"], key=lambda x: x["queued"]):
+            lines.append(f"  {entry['site']}/{entry['account']} 排队 {entry['queued']:.2f}s "
+                         f"耗时 {entry['elapsed']:.2f}s 结果: {entry['outcome']}")
+        logger.info("\n".join(lines))
+
+
+# 进程内共享的调度器实例，各插件自带的 signkit 副本取到同一个
+orchestrator = shared("orchestrator", SignOrchestrator)
@@ -0,0 +1,151 @@
+"""
+签到耗时剖析
+一次签到运行对应一个 RunProfile，各阶段用 span() 记录起止时间；
+传输层的每次后端尝试会自动记入当前线程绑定的 RunProfile
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_local = threading.local()
+
+
+class RunProfile:
+    """
+    单次运行的阶段耗时记录，偏移量均相对运行开始时刻
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, elapsed: float, **attrs):
+        """
+        记录一个已结束的阶段，start 为 time.monotonic() 时刻
+        """
+        span = {"name": name, "start": round(start - self.started, 3), "elapsed": round(elapsed, 3)}
+        span.update({k: v for k, v in attrs.items() if v is not None})
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.monotonic() - start, **attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda x: x["start"])
+        total = max((s["start"] + s["elapsed"] for s in spans), default=0.0)
+        return {"total": round(total, 3), "spans": spans}
+
+
+def current_profile() -> Optional[RunProfile]:
+    return getattr(_local, "profile", None)
+
+
+@contextmanager
+def profiled(profile: Optional[RunProfile]):
+    """
+    在当前线程绑定 RunProfile，退出时恢复原绑定；后台线程可传入同一实例继续记录
+    """
+    previous = current_profile()
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    在当前线程的 RunProfile 中记录一个阶段，未绑定时不做任何事
+    """
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    with profile.span(name, **attrs):
+        yield
+
+
+def slowest(timing: Dict[str, Any], n: int = 3) -> List[Dict[str, Any]]:
+    return sorted((timing or {}).get("spans") or [], key=lambda x: x["elapsed"], reverse=True)[:n]
+
+
+def timing_card(timing: Dict[str, Any], title: str) -> List[dict]:
+    """
+    构建耗时瀑布图卡片：每个阶段一行，进度条按起止偏移绘制
+    """
+    spans = (timing or {}).get("spans") or []
+    if not spans:
+        return []
+    total = timing.get("total") or max(s["start"] + s["elapsed"] for s in spans) or 1
+    top = {id(s) for s in slowest(timing)}
+    rows = []
+    for s in spans:
+        detail = " ".join(str(s[k]) for k in ("backend", "proxy", "status", "error") if k in s)
+        rows.append({
+            'component': 'tr',
+            'content': [
+                {'component': 'td', 'props': {'class': 'text-caption'}, 'text': s["name"]},
+                {'component': 'td', 'props': {'class': 'text-caption'}, 'text': detail or '-'},
+                {'component': 'td', 'props': {'class': 'text-caption'}, 'text': f'+{s["start"] * 1000:.0f}ms'},
+                {
+                    'component': 'td',
+                    'props': {'class': 'text-caption'},
+                    'content': [{
+                        'component': 'VChip',
+                        'props': {'size': 'small', 'variant': 'outlined',
+                                  'color': 'error' if id(s) in top else 'default'},
+                        'text': f'{s["elapsed"] * 1000:.0f}ms'
+                    }]
+                },
+                {
+                    'component': 'td',
+                    'props': {'style': 'min-width: 160px'},
+                    'content': [{
+                        'component': 'VProgressLinear',
+                        # 左边距表示起始偏移，条宽表示阶段耗时
+                        'props': {
+                            'model-value': 100,
+                            'color': 'error' if id(s) in top else 'primary',
+                            'height': 8,
+                            'style': f'margin-left: {s["start"] / total * 100:.1f}%; '
+                                     f'width: {max(1.0, s["elapsed"] / total * 100):.1f}%',
+                        }
+                    }]
+                },
+            ]
+        })
+    return [{
+        'component': 'VCard',
+        'props': {'variant': 'outlined', 'class': 'mb-4'},
+        'content': [
+            {'component': 'VCardTitle', 'props': {'class': 'text-h6'},
+             'text': f'{title}（总耗时 {total:.2f}s）'},
+            {
+                'component': 'VCardText',
+                'content': [{
+                    'component': 'VTable',
+                    'props': {'hover': True, 'density': 'compact'},
+                    'content': [
+                        {'component': 'thead', 'content': [{'component': 'tr', 'content': [
+                            {'component': 'th', 'text': '阶段'},
+                            {'component': 'th', 'text': '详情'},
+                            {'component': 'th', 'text': '开始'},
+                            {'component': 'th', 'text': '耗时'},
+                            {'component': 'th', 'text': '瀑布'},
+                        ]}]},
+                        {'component': 'tbody', 'content': rows}
+                    ]
+                }]
+            }
+        ]
+    }]
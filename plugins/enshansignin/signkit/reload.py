@@ -0,0 +1,45 @@
+"""
+按配置差异增量重载
+插件用一张表把配置项映射到变化时需要重建的部分（传输层、定时任务、统一签到、历史保留……），
+表单保存时只重建变化项涉及的部分，预热的会话、clearance、进行中的签到和待执行的重试得以保留。
+首次加载、或 stop_service 之后的加载没有可比较的旧配置，按全量处理
+"""
+from typing import Any, Iterable, Mapping, Optional, Set
+
+
+class ReloadPlan:
+
+    def __init__(self, full: bool, changed: Set[str], parts: Set[str]):
+        self.full = full
+        self.changed = changed
+        self.parts = parts
+
+    def __contains__(self, part: str) -> bool:
+        return self.full or part in self.parts
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self.changed)
+
+    def __str__(self):
+        if self.full:
+            return "全量加载"
+        if not self.changed:
+            return "配置无变化"
+        parts = "、".join(sorted(self.parts)) or "无需重建"
+        return f"变化项 {', '.join(sorted(self.changed))} → {parts}"
+
+
+def reload_plan(previous: Optional[Mapping[str, Any]], current: Mapping[str, Any],
+                effects: Mapping[str, Iterable[str]]) -> ReloadPlan:
+    """
+    比较新旧配置，返回需要重建的部分；effects 中未登记的配置项变化时按全量处理
+    """
+    if previous is None:
+        return ReloadPlan(True, set(current), set())
+    changed = {key for key in set(previous) | set(current) if previous.get(key) != current.get(key)}
+    parts: Set[str] = set()
+    for key in changed:
+        if key not in effects:
+            return ReloadPlan(True, changed, set())
+        parts.update(effects[key])
+    return ReloadPlan(False, changed, parts)
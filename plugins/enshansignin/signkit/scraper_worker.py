@@ -0,0 +1,72 @@
+"""
+cloudscraper 子进程
+由 isolate.ScraperPool 以独立解释器启动，只依赖标准库和 cloudscraper，不导入 MoviePilot。
+stdin/stdout 每行一个 JSON：读入任务，写回结果；Cloudflare 挑战的计算只占用本进程的 GIL。
+scraper 按会话 ID 缓存，默认请求头和 Cookie 每次由主进程带入并随结果带回，进程重启后可恢复
+"""
+import base64
+import json
+import sys
+import traceback
+
+_scrapers = {}
+
+
+def _scraper(task: dict):
+    import cloudscraper
+    session_id = task.get("session") or ""
+    scraper = _scrapers.get(session_id)
+    if scraper is None:
+        try:
+            scraper = cloudscraper.create_scraper(browser="chrome")
+        except Exception:
+            scraper = cloudscraper.create_scraper()
+        _scrapers[session_id] = scraper
+    if task.get("headers"):
+        scraper.headers.clear()
+        scraper.headers.update(task["headers"])
+    scraper.cookies.clear()
+    for cookie in task.get("cookies") or []:
+        scraper.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain") or "",
+                            path=cookie.get("path") or "/")
+    return scraper
+
+
+def _handle(task: dict) -> dict:
+    scraper = _scraper(task)
+    options = task.get("options") or {}
+    if isinstance(options.get("timeout"), list):
+        options["timeout"] = tuple(options["timeout"])
+    if options.get("data_b64") is not None:
+        options["data"] = base64.b64decode(options.pop("data_b64"))
+    resp = scraper.request(task["method"], task["url"], **options)
+    return {
+        "status": resp.status_code,
+        "url": resp.url,
+        "reason": resp.reason,
+        "headers": list(resp.headers.items()),
+        "content": base64.b64encode(resp.content or b"").decode("ascii"),
+        "session_headers": dict(scraper.headers),
+        "cookies": [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+                    for c in scraper.cookies],
+    }
+
+
+def main():
+    # 协议独占原始 stdout，第三方库的 print 改写到 stderr
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            reply = {"ok": True, "result": _handle(json.loads(line))}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}",
+                     "trace": traceback.format_exc(limit=3)}
+        channel.write(json.dumps(reply) + "\n")
+        channel.flush()
+
+
+if __name__ == "__main__":
+    main()
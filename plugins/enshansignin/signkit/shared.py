@@ -0,0 +1,32 @@
+"""
+跨插件共享的实例
+插件市场按插件目录单独安装，signkit 随每个签到插件各带一份，同一进程中会以不同的包名各导入一次。
+统一签到调度、通知发送线程这类必须全进程唯一的实例通过 shared() 登记在进程级的表中，
+接口版本相同的副本取到同一个实例；版本不一致时各自独立，不会混用不兼容的实现
+"""
+import sys
+import threading
+import types
+from typing import Any, Callable
+
+# 共享实例的接口版本：SignOrchestrator、NotificationDispatcher 的接口有不兼容变化时递增
+API_VERSION = 2
+
+_REGISTRY = "_signkit_shared"
+
+
+def shared(name: str, factory: Callable[[], Any]) -> Any:
+    """
+    取进程内共享的实例，首次调用时用 factory 创建；
+    锁与实例表登记在同一处，各副本用同一把锁，factory 只在实例缺失时调用一次
+    """
+    registry = sys.modules.get(_REGISTRY)
+    if registry is None:
+        registry = sys.modules.setdefault(_REGISTRY, types.ModuleType(_REGISTRY))
+    lock = registry.__dict__.setdefault("lock", threading.RLock())
+    instances = registry.__dict__.setdefault("instances", {})
+    key = f"{name}@{API_VERSION}"
+    with lock:
+        if key not in instances:
+            instances[key] = factory()
+        return instances[key]
@@ -0,0 +1,134 @@
+"""
+测试公共设施
+不在 MoviePilot 运行环境中时，以最小替身提供插件依赖的 app.* 模块，并把本仓库的 plugins 目录
+挂到 app.plugins 下，插件仍以 app.plugins.<插件> 导入；在 MoviePilot 环境中则直接使用宿主模块
+"""
+import logging
+import os
+import sys
+import types
+from enum import Enum
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGINS = os.path.join(ROOT, "plugins")
+
+# tools 包（基准、语料校验）从仓库根目录导入
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _module(name: str, package: bool = False, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    if package:
+        module.__path__ = []
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    if "." in name:
+        parent, _, child = name.rpartition(".")
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+class _PluginBase:
+    """
+    宿主插件基类的替身，只保留插件在测试中会调用到的接口
+    """
+    plugin_name = ""
+
+    def get_data(self, key: str = None, **kwargs):
+        return None
+
+    def save_data(self, key: str, value, **kwargs):
+        pass
+
+    def update_config(self, config: dict, **kwargs):
+        pass
+
+    def register_scheduler(self, **kwargs):
+        pass
+
+    def unregister_scheduler(self, **kwargs):
+        pass
+
+    def post_message(self, **kwargs):
+        pass
+
+
+class _EventManager:
+
+    def register(self, *args, **kwargs):
+        return lambda func: func
+
+    def send_event(self, *args, **kwargs):
+        pass
+
+
+class _Event:
+
+    def __init__(self, event_type=None, event_data: dict = None):
+        self.event_type = event_type
+        self.event_data = event_data or {}
+
+
+class _Response:
+
+    def __init__(self, success: bool = True, message: str = "", data=None):
+        self.success = success
+        self.message = message
+        self.data = data
+
+
+def _install_app_stubs():
+    _module("app", package=True)
+    _module("app.log", logger=logging.getLogger("moviepilot"))
+    _module("app.core", package=True)
+    _module("app.core.config", settings=types.SimpleNamespace(PROXY=None, TZ="Asia/Shanghai"))
+    _module("app.core.event", eventmanager=_EventManager(), Event=_Event)
+    _module("app.schemas", package=True, Response=_Response,
+            NotificationType=Enum("NotificationType", {"SiteMessage": "站点消息", "Plugin": "插件"}))
+    _module("app.schemas.types",
+            EventType=Enum("EventType", {"PluginAction": "plugin.action", "NoticeMessage": "notice.message"}))
+    _module("app.plugins", package=True, _PluginBase=_PluginBase).__path__.append(PLUGINS)
+
+
+try:
+    import app.plugins  # noqa: F401
+except ImportError:
+    _install_app_stubs()
+
+
+@pytest.fixture
+def make_plugin():
+    """
+    生成不经过 _PluginBase.__init__ 的插件实例：插件数据存放在内存中，定时任务注册和配置回写不生效；
+    关键字参数直接设为实例属性
+    """
+
+    def make(plugin_class: type, **attrs):
+        class Harness(plugin_class):
+            def __init__(self):
+                self._test_data = {}
+
+            def get_data(self, key: str = None, **kwargs):
+                return self._test_data.get(key)
+
+            def save_data(self, key: str, value, **kwargs):
+                self._test_data[key] = value
+
+            def register_scheduler(self, **kwargs):
+                pass
+
+            def unregister_scheduler(self, **kwargs):
+                pass
+
+            def update_config(self, config: dict, **kwargs):
+                pass
+
+        plugin = Harness()
+        for name, value in attrs.items():
+            setattr(plugin, name, value)
+        return plugin
+
+    return make
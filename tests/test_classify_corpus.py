@@ -0,0 +1,8 @@
+"""
+响应分类回归语料：每条样本的分类结果与标注一致
+"""
+from tools.bench import check_corpus
+
+
+def test_corpus_matches_expectations():
+    assert check_corpus() == []
@@ -0,0 +1,56 @@
+"""
+deepflood 签后补充任务的后台去重
+"""
+import threading
+
+import pytest
+
+from app.plugins import deepfloodsign as deepflood
+
+
+@pytest.fixture
+def plugin_for(make_plugin):
+    """
+    按 Cookie 生成插件实例，补充任务只记录签到日期
+    """
+
+    def make(cookie: str):
+        plugin = make_plugin(deepflood.deepfloodsign, _cookie=cookie, _enabled=True, ran=[])
+        plugin._enrich_after_sign = lambda sign_dict, result, attendance_record=None, profile=None: \
+            plugin.ran.append(sign_dict["date"])
+        return plugin
+
+    return make
+
+
+def _hold_background() -> threading.Event:
+    """
+    占住单线程后台队列，让随后提交的任务都处于排队状态
+    """
+    gate = threading.Event()
+    deepflood.background.submit(f"test_gate_{id(gate)}", gate.wait, 5)
+    return gate
+
+
+def test_two_accounts_enrich_back_to_back(plugin_for):
+    first, second = plugin_for("session=first"), plugin_for("session=second")
+    gate = _hold_background()
+    futures = [plugin._submit_enrichment({"date": "2026-10-19 08:00:01"}, {"success": True})
+               for plugin in (first, second)]
+    assert futures[0] is not futures[1]
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert first.ran == ["2026-10-19 08:00:01"]
+    assert second.ran == ["2026-10-19 08:00:01"]
+
+
+def test_enrich_not_merged_into_pending_refresh(plugin_for):
+    plugin = plugin_for("session=viewer")
+    gate = _hold_background()
+    refresh = deepflood.background.submit(plugin._background_key("refresh"), lambda: None)
+    future = plugin._submit_enrichment({"date": "2026-10-19 08:00:01"}, {"success": True})
+    assert future is not refresh
+    gate.set()
+    future.result(timeout=5)
+    assert plugin.ran == ["2026-10-19 08:00:01"]
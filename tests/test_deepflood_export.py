@@ -0,0 +1,24 @@
+"""
+deepflood 签到历史导出按需读取、逐条过滤
+"""
+from datetime import date
+
+from app.plugins import deepfloodsign as deepflood
+
+HISTORY = [
+    {"date": "2026-10-17 08:00:01", "status": "签到成功"},
+    {"date": "无效日期", "status": "签到失败"},
+    {"date": "2026-10-18 08:00:02", "status": "签到成功"},
+    {"date": "2026-10-19 08:00:03", "status": "已签到"},
+]
+
+
+def test_history_read_when_output_starts(make_plugin):
+    plugin = make_plugin(deepflood.deepfloodsign)
+    reads = []
+    plugin.get_data = lambda key=None, **kwargs: reads.append(key) or HISTORY
+    rows = plugin._iter_history(date(2026, 10, 18), None)
+    assert reads == []
+    assert next(rows)["date"] == "2026-10-18 08:00:02"
+    assert reads == ["sign_history"]
+    assert [row["date"] for row in rows] == ["2026-10-19 08:00:03"]
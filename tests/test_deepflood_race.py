@@ -0,0 +1,61 @@
+"""
+deepflood 抢签的目标日切换
+"""
+from datetime import datetime
+
+import pytest
+
+from app.plugins import deepfloodsign as deepflood
+
+
+def _at(text: str) -> float:
+    return datetime.strptime(text, "%Y-%m-%d %H:%M:%S").replace(tzinfo=deepflood.FORUM_TZ).timestamp()
+
+
+@pytest.mark.parametrize("now, reset", [
+    ("2026-10-19 23:59:50", "2026-10-20 00:00:00"),
+    ("2026-10-20 00:00:05", "2026-10-20 00:00:00"),
+    ("2026-10-20 13:00:00", "2026-10-21 00:00:00"),
+])
+def test_nearest_forum_reset(now, reset):
+    assert deepflood.deepfloodsign._nearest_forum_reset(_at(now)).timestamp() == _at(reset)
+
+
+def test_race_far_from_reset_gives_up(monkeypatch, make_plugin):
+    plugin = make_plugin(deepflood.deepfloodsign, _cookie="session=race")
+    monkeypatch.setattr(deepflood.time, "time", lambda: _at("2026-10-20 06:00:00"))
+    monkeypatch.setattr(plugin, "_scraper_warmup_and_attach_user_cookie",
+                        lambda: pytest.fail("偏离日切换时不应预热"))
+    assert plugin._race_sign() is None
+
+
+class _SignResponse:
+    status_code = 200
+    headers = {"Content-Type": "application/json"}
+
+    def __init__(self, sent_at: float):
+        self.sent_at = sent_at
+
+    def json(self):
+        return {"success": True, "message": "签到成功，获得 5 个鸡腿", "gain": 5, "current": 100}
+
+
+class _SignTransport:
+
+    def __init__(self, sent_at: float):
+        self.sent_at = sent_at
+
+    def post(self, url: str, **kwargs):
+        return _SignResponse(self.sent_at)
+
+
+def test_race_delta_measured_at_post(monkeypatch, make_plugin):
+    target = _at("2026-10-20 00:00:00")
+    # 传输层记录的实际发出时刻：令牌排队等耗时之后，比进入 _run_api_sign 晚 0.8 秒
+    plugin = make_plugin(deepflood.deepfloodsign, _cookie="session=race", _notify=False,
+                         _transport=_SignTransport(target + 0.05))
+    monkeypatch.setattr(deepflood.time, "time", lambda: target - 0.75)
+    monkeypatch.setattr(plugin, "_submit_enrichment", lambda *args, **kwargs: None)
+    sign_dict = plugin._sign(manual=True, race_target=target)
+    assert sign_dict["status"] == "签到成功"
+    assert sign_dict["race_delta"] == 0.05
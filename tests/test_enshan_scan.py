@@ -0,0 +1,62 @@
+"""
+恩山页面流式扫描：formhash 落在块边界上时不能截断
+"""
+import pytest
+
+from app.plugins import enshansignin as enshan
+
+FORMHASH = "ab12cd34"
+
+
+class _Response:
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+
+    def iter_content(self, chunk_size: int = None):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+class _Transport:
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def get(self, url: str, **kwargs):
+        return _Response(self.chunks)
+
+
+@pytest.fixture
+def scan(make_plugin):
+    """
+    以给定的分块响应扫描恩山首页
+    """
+
+    def run(chunks):
+        plugin = make_plugin(enshan.EnshanSignin, _cookie="auth=synthetic", _transport=_Transport(chunks))
+        return plugin._scan_page("https://www.right.com.cn/forum/forum.php")
+
+    return run
+
+
+def _page() -> bytes:
+    # 登录态标记在 formhash 之前出现，截断的 formhash 一旦被采用扫描就会提前结束
+    return (f"<a href='member.php'>退出</a><input name='x' value='formhash={FORMHASH}'>" + "<p>x</p>" * 20).encode("utf-8")
+
+
+@pytest.mark.parametrize("split", range(1, len("formhash=" + FORMHASH) + 1))
+def test_formhash_split_across_chunks(scan, split):
+    page = _page()
+    cut = page.index(b"formhash=") + split
+    result = scan([page[:cut], page[cut:]])
+    assert result["formhash"] == FORMHASH
+    assert result["logout"]
+
+
+def test_formhash_at_end_of_page(scan):
+    page = f"退出 formhash={FORMHASH}".encode("utf-8")
+    assert scan([page])["formhash"] == FORMHASH
@@ -0,0 +1,69 @@
+"""
+通知队列共用一个发送线程
+"""
+import threading
+import time
+
+from app.plugins.deepfloodsign.signkit import notify
+
+
+def _notify_threads() -> int:
+    return sum(1 for thread in threading.enumerate() if thread.name == "signkit-notify")
+
+
+def test_many_queues_share_one_thread():
+    sent = []
+    queues = [notify.NotificationQueue(send=lambda title, text, i=i: sent.append((i, title)),
+                                       digest_title=f"插件{i}：", window=0.05)
+              for i in range(20)]
+    for i, channel in enumerate(queues):
+        channel.put(f"签到成功 {i}", "今日签到任务已完成")
+    assert _notify_threads() == 1
+    for channel in queues:
+        assert channel.flush(timeout=5)
+    assert sorted(sent) == [(i, f"签到成功 {i}") for i in range(20)]
+
+
+def test_window_merges_per_queue():
+    sent = []
+    channel = notify.NotificationQueue(send=lambda title, text: sent.append((title, text)),
+                                       digest_title="插件：", window=0.1)
+    other = notify.NotificationQueue(send=lambda title, text: sent.append((title, text)),
+                                     digest_title="其他：", window=0.1)
+    channel.put("签到失败", "将在 5 分钟后重试")
+    channel.put("签到失败", "将在 9 分钟后重试")
+    other.put("签到成功", "今日签到任务已完成")
+    assert channel.flush(timeout=5) and other.flush(timeout=5)
+    assert ("签到失败", "将在 9 分钟后重试\n（同类通知 2 条已合并）") in sent
+    assert ("签到成功", "今日签到任务已完成") in sent
+    assert len(sent) == 2
+
+
+def test_flush_sends_without_waiting_for_window():
+    sent = []
+    channel = notify.NotificationQueue(send=lambda title, text: sent.append(title),
+                                       digest_title="插件：", window=30)
+    channel.put("签到成功", "今日签到任务已完成")
+    start = time.monotonic()
+    assert channel.flush(timeout=5)
+    assert time.monotonic() - start < 1
+    assert sent == ["签到成功"]
+    # 排期已撤销，窗口到期后不会再发一次空批次或重复发送
+    assert channel not in notify.dispatcher._due
+
+
+def test_flush_waits_for_running_send():
+    sent, started, release = [], threading.Event(), threading.Event()
+
+    def send(title, text):
+        started.set()
+        release.wait(5)
+        sent.append(title)
+
+    channel = notify.NotificationQueue(send=send, digest_title="插件：", window=0.01)
+    channel.put("签到成功", "今日签到任务已完成")
+    assert started.wait(5)
+    assert not channel.flush(timeout=0.1)
+    release.set()
+    assert channel.flush(timeout=5)
+    assert sent == ["签到成功"]
@@ -0,0 +1,43 @@
+"""
+带偏移的 Cron 触发器：偏移在两次触发之间变化时不重复触发同一个 Cron 时间
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.plugins.deepfloodsign.signkit import OffsetCronTrigger
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+
+def _trigger(skew: list) -> OffsetCronTrigger:
+    return OffsetCronTrigger("0 8 * * *", 0, timezone=TZ, adjust=lambda: skew[0])
+
+
+def test_growing_offset_does_not_refire_same_slot():
+    skew = [0.0]
+    trigger = _trigger(skew)
+    now = datetime(2026, 10, 19, 7, 0, tzinfo=TZ)
+    first = trigger.get_next_fire_time(None, now)
+    assert first == datetime(2026, 10, 19, 8, 0, tzinfo=TZ)
+    # 触发后服务器时钟校正使偏移推迟 5 秒
+    skew[0] = 5.0
+    second = trigger.get_next_fire_time(first, first)
+    assert second == datetime(2026, 10, 20, 8, 0, 5, tzinfo=TZ)
+
+
+def test_shrinking_offset_does_not_skip_slot():
+    skew = [5.0]
+    trigger = _trigger(skew)
+    first = trigger.get_next_fire_time(None, datetime(2026, 10, 19, 7, 0, tzinfo=TZ))
+    assert first == datetime(2026, 10, 19, 8, 0, 5, tzinfo=TZ)
+    skew[0] = -5.0
+    assert trigger.get_next_fire_time(first, first) == datetime(2026, 10, 20, 7, 59, 55, tzinfo=TZ)
+
+
+def test_repeated_lookup_is_stable():
+    # 调度器计算误点次数后会以同一个上次触发时间再取一次下次触发时间
+    skew = [0.0]
+    trigger = _trigger(skew)
+    first = trigger.get_next_fire_time(None, datetime(2026, 10, 19, 7, 0, tzinfo=TZ))
+    later = datetime(2026, 10, 19, 9, 0, tzinfo=TZ)
+    assert trigger.get_next_fire_time(first, later) == trigger.get_next_fire_time(first, later)
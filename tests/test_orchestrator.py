@@ -0,0 +1,50 @@
+"""
+统一签到按签到日去重
+"""
+from datetime import datetime
+
+from app.plugins.deepfloodsign.signkit import SignOrchestrator, SignSite
+
+
+class _Site(SignSite):
+    site_name = "stub"
+    site_host = "stub.test"
+
+    def __init__(self):
+        self.day = "2026-10-19"
+        self.signed = []
+
+    def batch_enabled(self) -> bool:
+        return True
+
+    def sign_day(self) -> str:
+        return self.day
+
+    def sign_account(self, account: str):
+        self.signed.append((self.day, account))
+        return "ok"
+
+    def save_batch_report(self, report):
+        pass
+
+
+def test_second_trigger_same_day_skipped():
+    site, orchestrator = _Site(), SignOrchestrator()
+    orchestrator.register(site)
+    assert orchestrator.run("first")
+    assert orchestrator.run("second") is None
+    assert site.signed == [("2026-10-19", "default")]
+
+
+def test_runs_again_after_day_boundary():
+    # 23:50 跑过一次后 00:10 再次触发：相隔不到一小时，但已是新的签到日
+    site, orchestrator = _Site(), SignOrchestrator()
+    orchestrator.register(site)
+    orchestrator.run("before midnight")
+    site.day = "2026-10-20"
+    assert orchestrator.run("after midnight")
+    assert site.signed == [("2026-10-19", "default"), ("2026-10-20", "default")]
+
+
+def test_sign_day_uses_site_timezone():
+    assert SignSite().sign_day() == datetime.now(tz=SignSite.site_tz).strftime("%Y-%m-%d")
@@ -0,0 +1,56 @@
+"""
+signkit 随每个签到插件各带一份：两份内容必须一致，需全进程唯一的实例在副本间共享
+"""
+import filecmp
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.plugins.deepfloodsign import signkit as deepflood_kit
+from app.plugins.enshansignin import signkit as enshan_kit
+
+PLUGINS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins")
+COPIES = [os.path.join(PLUGINS, plugin, "signkit") for plugin in ("deepfloodsign", "enshansignin")]
+
+
+def _files(root: str):
+    result = set()
+    for path, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        result.update(os.path.relpath(os.path.join(path, name), root) for name in files
+                      if not name.endswith(".pyc"))
+    return result
+
+
+def test_copies_are_identical():
+    first, second = COPIES
+    names = _files(first)
+    assert names == _files(second)
+    _, mismatch, errors = filecmp.cmpfiles(first, second, sorted(names), shallow=False)
+    assert not mismatch and not errors, f"signkit 副本不一致: {mismatch + errors}"
+
+
+def test_copies_share_process_singletons():
+    assert deepflood_kit is not enshan_kit
+    assert deepflood_kit.orchestrator is enshan_kit.orchestrator
+    assert deepflood_kit.notify_dispatcher is enshan_kit.notify_dispatcher
+
+
+def test_shared_factory_called_once_across_copies():
+    created = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        created.append(object())
+        time.sleep(0.05)
+        return created[-1]
+
+    def get(kit):
+        barrier.wait()
+        return kit.shared("test_once", factory)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(get, [deepflood_kit, enshan_kit] * 4))
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
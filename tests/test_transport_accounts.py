@@ -0,0 +1,40 @@
+"""
+共享传输层按账号隔离会话 Cookie
+"""
+from app.plugins.deepfloodsign.signkit import isolate, transport
+
+
+def test_accounts_do_not_share_cookie_jar():
+    first = transport.shared_transport(use_proxy=False, backends=("requests",), account="first")
+    second = transport.shared_transport(use_proxy=False, backends=("requests",), account="second")
+    assert first is not second
+    first._session("requests").cookies.set("session", "first", domain="www.deepflood.com")
+    assert not list(second._session("requests").cookies)
+
+
+def test_same_account_reuses_transport():
+    first = transport.shared_transport(use_proxy=False, backends=("requests",), account="same")
+    assert transport.shared_transport(use_proxy=False, backends=("requests",), account="same") is first
+
+
+def test_last_release_closes_transport(monkeypatch):
+    first = transport.shared_transport(use_proxy=False, backends=("requests",), account="released")
+    second = transport.shared_transport(use_proxy=False, backends=("requests",), account="released")
+    closed = []
+    monkeypatch.setattr(first, "close", lambda: closed.append(first))
+    transport.release_transport(second)
+    assert not closed
+    transport.release_transport(first)
+    assert closed == [first]
+    assert transport.shared_transport(use_proxy=False, backends=("requests",), account="released") is not first
+
+
+def test_isolated_pool_stops_with_last_session(monkeypatch):
+    pool = isolate.ScraperPool()
+    stopped = []
+    monkeypatch.setattr(pool, "close", lambda: stopped.append(True))
+    first, second = pool.session("a"), pool.session("b")
+    first.close()
+    assert not stopped
+    second.close()
+    assert stopped == [True]
@@ -0,0 +1,40 @@
+"""
+请求令牌排队受运行时限约束
+"""
+import time
+
+import pytest
+
+from app.plugins.deepfloodsign.signkit import transport
+from app.plugins.deepfloodsign.signkit.latency import run_deadline
+
+
+def test_admission_wait_bounded_by_run_deadline():
+    host = "admission.test"
+    # 令牌每 100 秒补充一个，首个令牌用掉后，下一个远超本次运行时限
+    transport.admission.configure(host, rate=0.01, burst=1)
+    client = transport.Transport(use_proxy=False, backends=("requests",))
+    client._admit(client._new_record("requests", "GET", f"https://{host}/", None))
+    start = time.monotonic()
+    with run_deadline(5):
+        with pytest.raises(TimeoutError, match="运行时限"):
+            client._admit(client._new_record("requests", "GET", f"https://{host}/", None), transport.remaining())
+    assert time.monotonic() - start < 1
+
+
+def test_sent_at_taken_after_admission(monkeypatch):
+    client = transport.Transport(use_proxy=False, backends=("requests",))
+
+    class _Session:
+        def request(self, method, url, **kwargs):
+            resp = transport.requests.Response()
+            resp.status_code = 200
+            resp._content = b"{}"
+            return resp
+
+    monkeypatch.setattr(client, "_session", lambda backend: _Session())
+    monkeypatch.setattr(client, "_admit", lambda record, left=None: time.sleep(0.2))
+    before = time.time()
+    resp = client._send("requests", "POST", "https://sent-at.test/api", data=b"")
+    assert resp.sent_at - before >= 0.2
+    assert client.records[-1]["sent_at"] == resp.sent_at
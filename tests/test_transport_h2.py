@@ -0,0 +1,50 @@
+"""
+HTTP/2 预取复用同一个 AsyncSession，关闭传输层时一并关闭
+"""
+import threading
+import types
+
+from app.plugins.deepfloodsign.signkit import transport
+
+
+class _AsyncSession:
+    created = []
+
+    def __init__(self, **kwargs):
+        self.closed = False
+        self.requests = 0
+        type(self).created.append(self)
+
+    async def request(self, method, url, **kwargs):
+        self.requests += 1
+        resp = transport.requests.Response()
+        resp.status_code = 200
+        resp.headers["Content-Type"] = "application/json"
+        resp._content = b'{"success": true}'
+        return resp
+
+    async def close(self):
+        self.closed = True
+
+
+def _client(monkeypatch):
+    monkeypatch.setattr(transport, "HAS_CURL_CFFI", True)
+    monkeypatch.setitem(transport._backend_modules, "curl_cffi", types.SimpleNamespace(AsyncSession=_AsyncSession))
+    _AsyncSession.created = []
+    transport.admission.configure("h2.test", rate=1000, burst=1000)
+    return transport.Transport(use_proxy=False, backends=("curl_cffi",), http2=True)
+
+
+def test_prefetch_reuses_async_session(monkeypatch):
+    client = _client(monkeypatch)
+    calls = [(f"https://h2.test/api?n={i}", {}) for i in range(3)]
+    threads = threading.active_count()
+    assert client.prefetch(calls) == 3
+    assert client.prefetch(calls) == 3
+    assert len(_AsyncSession.created) == 1
+    assert _AsyncSession.created[0].requests == 6
+    # 令牌排队用的线程池随每次预取结束
+    assert threading.active_count() == threads
+    client.close()
+    assert _AsyncSession.created[0].closed
+    assert client._h2_loop is None
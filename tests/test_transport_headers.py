@@ -0,0 +1,35 @@
+"""
+请求头中的 UA / Client Hints 与实际发出请求的后端指纹一致
+"""
+from app.plugins.deepfloodsign.signkit import transport
+
+CHROME = {"User-Agent": "Mozilla/5.0 Chrome/120.0.0.0", "sec-ch-ua": '"Chromium";v="120"',
+          "Cookie": "auth=synthetic", "Referer": "https://www.right.com.cn/forum/forum.php"}
+
+
+def test_each_backend_gets_matching_client_headers(monkeypatch):
+    monkeypatch.setattr(transport, "HAS_CURL_CFFI", True)
+    monkeypatch.setattr(transport, "HAS_CLOUDSCRAPER", True)
+    client = transport.Transport(use_proxy=False, backends=("requests", "cloudscraper", "curl_cffi"))
+    sent = []
+
+    def send(backend, method, url, **kwargs):
+        sent.append((backend, kwargs.get("impersonate"), kwargs["headers"]))
+        resp = transport.requests.Response()
+        resp.status_code = 403
+        resp._content = b""
+        return resp
+
+    monkeypatch.setattr(client, "_send", send)
+    client.get("https://headers.test/forum.php", headers=CHROME, expect_json=False)
+    by_backend = {}
+    for backend, profile, headers in sent:
+        by_backend.setdefault(backend, (profile, headers))
+    for backend in ("requests", "cloudscraper"):
+        headers = by_backend[backend][1]
+        assert "User-Agent" not in headers and "sec-ch-ua" not in headers
+        assert headers["Cookie"] == "auth=synthetic"
+    profile, headers = by_backend["curl_cffi"]
+    version = profile.replace("chrome", "")
+    assert f"Chrome/{version}.0.0.0" in headers["User-Agent"]
+    assert f'v="{version}"' in headers["sec-ch-ua"]
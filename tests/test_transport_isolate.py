@@ -0,0 +1,16 @@
+"""
+cloudscraper 进程隔离开启时，主进程不导入 cloudscraper
+"""
+import sys
+
+from app.plugins.deepfloodsign.signkit import isolate, transport
+
+
+def test_isolated_scraper_session_does_not_import_cloudscraper(monkeypatch):
+    monkeypatch.delitem(transport._backend_modules, "cloudscraper", raising=False)
+    monkeypatch.delitem(sys.modules, "cloudscraper", raising=False)
+    client = transport.Transport(use_proxy=False, isolate_scraper=True)
+    session = client._create_session("cloudscraper")
+    assert isinstance(session, isolate.RemoteScraper)
+    assert "cloudscraper" not in sys.modules
+    assert "cloudscraper" not in transport._backend_modules
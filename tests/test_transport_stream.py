@@ -0,0 +1,44 @@
+"""
+流式响应按实际读取的字节数记录
+"""
+import io
+
+from app.plugins.deepfloodsign.signkit import exchanges, transport
+
+BODY = b"<p>x</p>" * 100
+
+
+class _Session:
+
+    def request(self, method, url, **kwargs):
+        resp = transport.requests.Response()
+        resp.status_code = 200
+        # 压缩传输时 Content-Length 是压缩后的长度，与读到的正文字节数不同
+        resp.headers["Content-Length"] = "12"
+        resp.raw = io.BytesIO(BODY)
+        return resp
+
+
+def _stream(monkeypatch):
+    client = transport.Transport(use_proxy=False, backends=("requests",))
+    monkeypatch.setattr(client, "_session", lambda backend: _Session())
+    monkeypatch.setattr(client, "_admit", lambda record, left=None: None)
+    resp = client._send("requests", "GET", "https://stream.test/forum.php", stream=True)
+    return client, resp
+
+
+def test_stream_bytes_counted_while_reading(monkeypatch):
+    client, resp = _stream(monkeypatch)
+    assert client.records[-1]["bytes"] == 0
+    assert b"".join(resp.iter_content(chunk_size=64)) == BODY
+    assert client.records[-1]["bytes"] == len(BODY)
+    assert exchanges.entries(host="stream.test")[0]["bytes"] == len(BODY)
+
+
+def test_stream_stopped_early_records_what_was_read(monkeypatch):
+    client, resp = _stream(monkeypatch)
+    chunks = resp.iter_content(chunk_size=64)
+    next(chunks)
+    next(chunks)
+    resp.close()
+    assert client.records[-1]["bytes"] == 128
@@ -0,0 +1,3 @@
+"""
+本仓库的开发工具（基准、压测），不随插件安装
+"""
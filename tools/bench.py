@@ -0,0 +1,380 @@
+"""
+签到插件本地基准，不随插件安装
+在本仓库根目录执行，PYTHONPATH 指向 MoviePilot 根目录，测的是其中已安装的插件
+（signkit 随各签到插件各带一份，内容相同，以 deepfloodsign 中的为例）：
+    python -m tools.bench import   # 各模块冷启动导入耗时
+    python -m tools.bench init     # 传输层构造及各后端首次建会话耗时
+    python -m tools.bench h2 [url] # 一组同源请求：每次新建会话 / 复用连接 / HTTP/2 预取并发
+    python -m tools.bench classify # 响应分类回归语料校验及吞吐（与原子串判断链对比）
+    python -m tools.bench load [accounts=10,100,1000 ...]  # 多账号压测，参数见 loadtest.py
+    python -m tools.bench threads [instances] # 多个 deepflood 实例立即运行并安排重试后的线程数
+h2 默认请求本地桩服务（明文 HTTP/1.1，模拟服务端延迟），只能体现并发收益；
+传入 https 地址时 curl_cffi 经 ALPN 协商 h2，才是真正的单连接多路复用对比
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+# 冷启动导入耗时的测量对象
+IMPORT_TARGETS = [
+    "app.plugins.deepfloodsign.signkit",
+    "app.plugins.deepfloodsign",
+    "app.plugins.enshansignin",
+    "curl_cffi.requests",
+    "cloudscraper",
+]
+
+
+def _timeit(func: Callable, rounds: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
+
+
+def bench_import(rounds: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    每轮在新进程中导入一次，排除模块缓存的影响
+    """
+    results = {}
+    for target in IMPORT_TARGETS:
+        code = (f"import time; t = time.perf_counter(); import {target}; "
+                f"print((time.perf_counter() - t) * 1000)")
+        samples = []
+        for _ in range(rounds):
+            proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            if proc.returncode != 0:
+                samples = []
+                break
+            samples.append(float(proc.stdout.strip().splitlines()[-1]))
+        results[target] = ({"median_ms": round(statistics.median(samples), 2), "max_ms": round(max(samples), 2)}
+                           if samples else {"error": "导入失败"})
+    return results
+
+
+def bench_init(rounds: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Transport 构造（插件保存配置时的开销）与各后端首次请求前建会话的开销
+    """
+    from app.plugins.deepfloodsign.signkit.transport import Transport
+
+    results = {"Transport()": _timeit(lambda: Transport(), rounds)}
+    for backend in Transport().available_backends():
+        def first_session(name=backend):
+            Transport()._session(name).close()
+        results[f"首次建会话 {backend}"] = _timeit(first_session, rounds)
+    return results
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 头部和正文分两次写出，不关 Nagle 会叠加客户端延迟 ACK，使长连接看起来更慢
+    disable_nagle_algorithm = True
+    delay = 0.05
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = json.dumps({"success": True, "path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _SiteStubHandler(_StubHandler):
+    """
+    按路径模拟 deepflood / 恩山的签到相关接口，供多账号压测使用
+    """
+
+    def _reply(self, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        time.sleep(self.delay)
+        path, _, query = self.path.partition("?")
+        now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        if path.startswith("/fail/"):
+            # 请求改写到 /fail/ 前缀下时模拟站点拒绝签到，用于走失败重试路径
+            body = {"success": False, "message": "桩服务模拟签到失败"}
+            return self._reply(json.dumps(body, ensure_ascii=False), "application/json")
+        if path.startswith("/forum/"):
+            if "operation=qiandao" in query:
+                return self._reply("<root><![CDATA[恭喜你签到成功!]]></root>", "text/xml; charset=utf-8")
+            page = "<html><body><a href='logout.php?formhash=ab12cd34'>退出</a>" + "<p>x</p>" * 2000 + "</body></html>"
+            return self._reply(page, "text/html; charset=utf-8")
+        if path == "/api/attendance":
+            body = {"success": True, "message": "签到成功，获得 5 个鸡腿", "gain": 5, "current": 100}
+        elif path == "/api/attendance/board":
+            body = {"success": True, "record": {"gain": 5, "created_at": now}, "order": 1, "total": 100}
+        elif path == "/api/account/credit/page-1":
+            body = {"success": True, "data": [[5, 100, "签到收益5个鸡腿", now]]}
+        elif path.startswith("/api/account/credit/"):
+            body = {"success": True, "data": []}
+        else:
+            body = {"success": True, "path": self.path}
+        return self._reply(json.dumps(body, ensure_ascii=False), "application/json")
+
+    def do_GET(self):
+        self._route()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self._route()
+
+
+def _stub_server(delay: float, handler: type = _StubHandler):
+    """
+    本地桩服务，每个请求固定延迟 delay 秒，并统计建立的连接数
+    """
+    handler.delay = delay
+    handler.connections = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_stub(delay: float):
+    """
+    以独立进程运行站点桩服务：标准输出第一行为端口，随后一直服务到被终止
+    """
+    server = _stub_server(delay, _SiteStubHandler)
+    print(server.server_address[1], flush=True)
+    threading.Event().wait()
+
+
+def bench_h2(url: Optional[str] = None, calls: int = 4, rounds: int = 10,
+             delay: float = 0.05) -> Dict[str, Dict[str, float]]:
+    """
+    模拟签到后的一组补充请求（用户信息、签到排名、收益统计分页等）
+    """
+    import requests
+    from urllib.parse import urlsplit
+
+    from app.plugins.deepfloodsign.signkit.admission import admission
+    from app.plugins.deepfloodsign.signkit.transport import HAS_CURL_CFFI, Transport
+
+    server = None
+    if not url:
+        server = _stub_server(delay)
+        url = f"http://127.0.0.1:{server.server_address[1]}/api"
+    # 基准本身不受令牌桶限速
+    admission.configure(urlsplit(url).hostname, rate=1000, burst=1000)
+    urls = [f"{url}?n={i}" for i in range(calls)]
+
+    def per_call():
+        for item in urls:
+            with requests.Session() as session:
+                session.get(item, timeout=30)
+
+    pooled = Transport(use_proxy=False, backends=("requests",))
+
+    def keep_alive():
+        for item in urls:
+            pooled.get(item, timeout=30)
+
+    modes = {"每次新建会话 HTTP/1.1": per_call, "复用连接 顺序 HTTP/1.1": keep_alive}
+    if HAS_CURL_CFFI:
+        h2 = Transport(use_proxy=False, backends=("curl_cffi",), http2=True)
+
+        def multiplexed():
+            h2.prefetch([(item, {}) for item in urls])
+            for item in urls:
+                h2.get(item, timeout=30)
+
+        modes["HTTP/2 预取并发"] = multiplexed
+
+    results = {}
+    for name, func in modes.items():
+        before = _StubHandler.connections
+        results[name] = _timeit(func, rounds)
+        if server:
+            results[name]["connections"] = _StubHandler.connections - before
+    if server:
+        server.shutdown()
+    return results
+
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classify_corpus.json")
+
+
+def _legacy_deepflood_page(text: str) -> str:
+    """
+    改为规则表之前的子串判断链，仅用于吞吐对比
+    """
+    if any(k in text for k in ["鸡腿", "签到成功", "签到完成", "success"]):
+        return "signed"
+    if "已完成签到" in text:
+        return "already_signed"
+    if "Cannot GET /api/attendance" in text:
+        return "waf_get"
+    if any(k in text for k in ["登录", "注册", "你好啊，陌生人"]):
+        return "cookie_invalid"
+    return "unknown"
+
+
+def check_corpus() -> List[str]:
+    """
+    按语料逐条校验分类结果，返回不符合预期的条目说明
+    """
+    from app.plugins.deepfloodsign.signkit import classify
+
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = json.load(f)
+    failures = []
+    for item in corpus:
+        label, hit = getattr(classify, item["classifier"]).match(item["body"])
+        if label != item["expect"]:
+            failures.append(f"{item['classifier']} {item['note']}: 期望 {item['expect']}，实际 {label}（命中 {hit!r}）")
+    return failures
+
+
+def bench_classify(rounds: int = 2000, padding: int = 64 * 1024) -> Dict[str, Dict[str, float]]:
+    """
+    对语料中的页面类响应测吞吐；padding 模拟把关键字放在大页面末尾之后的无关内容
+    """
+    from app.plugins.deepfloodsign.signkit.classify import DEEPFLOOD_PAGE
+
+    with open(CORPUS, encoding="utf-8") as f:
+        bodies = [item["body"] for item in json.load(f) if item["classifier"] == "DEEPFLOOD_PAGE"]
+    padded = [body + "<!-- " + "x" * padding + " -->" for body in bodies]
+    results = {}
+    for name, texts in (("语料原文", bodies), (f"追加 {padding // 1024}KB 无关内容", padded)):
+        size = sum(len(t.encode("utf-8")) for t in texts)
+        for impl, func in (("规则表", DEEPFLOOD_PAGE.classify), ("子串判断链", _legacy_deepflood_page)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for text in texts:
+                    func(text)
+            elapsed = time.perf_counter() - start
+            results[f"{impl} {name}"] = {"ops_per_s": round(rounds * len(texts) / elapsed),
+                                         "mb_per_s": round(size * rounds / elapsed / 1024 / 1024, 1)}
+    return results
+
+
+def bench_threads(instances: int = 10, settle: float = 60) -> Dict[str, Dict[str, Any]]:
+    """
+    真实走 deepflood 的 init_plugin：instances 个实例开启立即运行，签到请求改写到模拟失败的桩服务，
+    每个实例随后安排一次失败重试。宿主调度服务以一个共享的 BackgroundScheduler 代替，
+    其执行器线程单独统计，plugin_threads 为扣除基线和宿主调度线程后由插件带来的线程数。
+    改造前后的对比：在改造前后的提交上分别运行本命令
+    """
+    from apscheduler.executors.pool import ThreadPoolExecutor as PoolExecutor
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from urllib.parse import urlsplit
+
+    from app.plugins.deepfloodsign import deepfloodsign
+    from app.plugins.deepfloodsign.signkit.admission import admission
+    from app.plugins.deepfloodsign.signkit.transport import release_transport
+    from tools.loadtest import _Sampler, _Store, _harness, _rewrite_transport, _start_stub
+
+    def host_threads() -> int:
+        return sum(1 for thread in threading.enumerate() if thread.name.startswith("host-scheduler"))
+
+    proc, base_url = _start_stub(0.01)
+    admission.configure(urlsplit(base_url).hostname, rate=1000, burst=1000)
+    # 宿主调度服务的替身；放宽误点容忍，执行器线程占满时排队的立即运行任务不会被跳过
+    host = BackgroundScheduler(executors={
+        "default": PoolExecutor(10, pool_kwargs={"thread_name_prefix": "host-scheduler"})},
+        job_defaults={"misfire_grace_time": None})
+    host.start()
+    plugins = []
+    try:
+        baseline = _Sampler.read()[1]
+        store = _Store()
+        plugin_class = _harness(deepfloodsign, store, host=host)
+        transport_class = _rewrite_transport(f"{base_url}/fail")
+        with _Sampler() as sampler:
+            for index in range(instances):
+                plugin = plugin_class()
+                plugin.init_plugin({"enabled": True, "cookie": f"session=synthetic{index}", "onlyonce": True,
+                                    "notify": False, "cron": "0 8 * * *", "use_proxy": False, "max_retries": 1})
+                release_transport(plugin._transport)
+                plugin._transport = transport_class()
+                plugins.append(plugin)
+            # 等待立即运行（3 秒后触发）执行完毕并安排好重试
+            deadline = time.monotonic() + settle
+            while time.monotonic() < deadline and any(plugin._retry_count < 1 for plugin in plugins):
+                time.sleep(0.2)
+            time.sleep(0.5)
+        threads, hosted = _Sampler.read()[1], host_threads()
+        return {
+            "基线": {"threads": baseline},
+            f"deepflood x{instances}": {
+                "threads": threads,
+                "peak_threads": sampler.peak_threads,
+                "host_threads": hosted,
+                "plugin_threads": threads - baseline - hosted,
+                "retries": sum(1 for plugin in plugins if plugin._retry_count),
+                "host_jobs": len(host.get_jobs()),
+            },
+        }
+    finally:
+        for plugin in plugins:
+            plugin.stop_service()
+        host.shutdown(wait=False)
+        proc.terminate()
+
+
+def _print(title: str, results: Dict[str, Dict[str, float]]):
+    print(f"== {title}")
+    for name, item in results.items():
+        print(f"  {name:<32} " + "  ".join(f"{k}={v}" for k, v in item.items()))
+
+
+def main(argv: List[str]):
+    if argv[:1] == ["stub"]:
+        serve_stub(float(argv[1]) if len(argv) > 1 else 0.02)
+        return
+    if argv[:1] == ["load"]:
+        from tools import loadtest
+        loadtest.main(argv[1:])
+        return
+    modes = argv or ["import", "init"]
+    if "import" in modes:
+        _print("导入耗时", bench_import())
+    if "init" in modes:
+        _print("初始化耗时", bench_init())
+    if "classify" in modes:
+        failures = check_corpus()
+        print(f"== 分类语料校验: {'全部通过' if not failures else f'{len(failures)} 条不符合预期'}")
+        for line in failures:
+            print(f"  {line}")
+        _print("分类吞吐", bench_classify())
+        if failures:
+            sys.exit(1)
+    if "threads" in modes:
+        index = modes.index("threads")
+        count = int(modes[index + 1]) if len(modes) > index + 1 and modes[index + 1].isdigit() else 10
+        _print("插件实例线程数", bench_threads(count))
+    if "h2" in modes:
+        index = modes.index("h2")
+        url = modes[index + 1] if len(modes) > index + 1 and modes[index + 1].startswith("http") else None
+        _print(f"同源请求组 {url or '本地桩服务'}", bench_h2(url))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
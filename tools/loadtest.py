@@ -0,0 +1,301 @@
+"""
+多账号压测
+对 N 个合成账号驱动真实的签到流程（deepflood、恩山），请求全部改写到本地桩服务：
+    python -m tools.bench load accounts=10,100,1000 concurrency=8 sites=deepflood,enshan
+可选参数：delay=桩服务单请求延迟秒数（默认 0.02），rate=桩服务 host 的令牌桶速率（默认 1000/s，即不限速）
+每一档输出吞吐、单账号耗时 p50/p95/p99、峰值 RSS、峰值线程数及插件数据写入量，逐档加大 accounts 找拐点。
+- 桩服务运行在子进程中，线程和内存不计入被测进程
+- 插件数据读写、定时任务注册由内存桩接管并计数，不触碰数据库和宿主调度器
+- 只使用 requests 后端（桩服务为明文 HTTP），随机等待与通知关闭
+插件日志量较大，建议把标准错误重定向到文件
+"""
+import importlib
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 站点 -> (插件模块, 插件类名)；每个插件使用自己目录下的 signkit 副本
+SITES = {
+    "deepflood": ("app.plugins.deepfloodsign", "deepfloodsign"),
+    "enshan": ("app.plugins.enshansignin", "EnshanSignin"),
+}
+
+
+def _kit(site: str):
+    """
+    站点插件自带的 signkit 副本
+    """
+    return importlib.import_module(f"{SITES[site][0]}.signkit")
+
+
+class _Store:
+    """
+    插件数据的内存替身，统计写入次数与序列化后的字节数
+    """
+
+    def __init__(self):
+        self.data: Dict[Tuple[int, str], Any] = {}
+        self.writes = 0
+        self.bytes = 0
+        self.jobs = 0
+        self._lock = threading.Lock()
+
+    def get(self, owner: int, key: str):
+        with self._lock:
+            return self.data.get((owner, key))
+
+    def add_job(self):
+        with self._lock:
+            self.jobs += 1
+
+    def put(self, owner: int, key: str, value: Any):
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        with self._lock:
+            self.data[(owner, key)] = value
+            self.writes += 1
+            self.bytes += size
+
+
+def _harness(base: type, store: _Store, host=None) -> type:
+    """
+    生成压测用的插件子类：不调用 _PluginBase.__init__，数据接入内存桩；
+    传入 host（BackgroundScheduler）时定时任务真实注册到该调度器，代替宿主调度服务，否则只计数
+    """
+
+    class Harness(base):
+        def __init__(self):
+            pass
+
+        def get_data(self, key: str = None, **kwargs):
+            return store.get(id(self), key)
+
+        def save_data(self, key: str, value: Any, **kwargs):
+            store.put(id(self), key, value)
+
+        def register_scheduler(self, **kwargs):
+            store.add_job()
+            if host is not None:
+                host.add_job(kwargs["func"], trigger=kwargs["trigger"], id=f"{kwargs['id']}@{id(self):x}",
+                             replace_existing=True)
+
+        def unregister_scheduler(self, **kwargs):
+            if host is not None and host.get_job(f"{kwargs['id']}@{id(self):x}"):
+                host.remove_job(f"{kwargs['id']}@{id(self):x}")
+
+        def update_config(self, config: dict, **kwargs):
+            pass
+
+        def _wait_random_interval(self):
+            pass
+
+    Harness.__name__ = f"{base.__name__}Harness"
+    return Harness
+
+
+def _rewrite_transport(base_url: str, site: str = "deepflood") -> type:
+    """
+    把所有请求改写到桩服务的传输层类，保留路径与查询串；与 shared_transport 一致，每个账号一个实例
+    """
+
+    class RewriteTransport(_kit(site).Transport):
+        requests_sent = 0
+        _count_lock = threading.Lock()
+
+        def __init__(self):
+            super().__init__(use_proxy=False, verify_ssl=False, backends=("requests",))
+
+        def request(self, method: str, url: str, *args, **kwargs):
+            parts = urlsplit(url)
+            target = f"{base_url}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+            with self._count_lock:
+                RewriteTransport.requests_sent += 1
+            return super().request(method, target, *args, **kwargs)
+
+    return RewriteTransport
+
+
+def _start_stub(delay: float) -> Tuple[subprocess.Popen, str]:
+    proc = subprocess.Popen([sys.executable, "-m", "tools.bench", "stub", str(delay)],
+                            stdout=subprocess.PIPE, text=True)
+    port = int(proc.stdout.readline().strip())
+    return proc, f"http://127.0.0.1:{port}"
+
+
+class _Sampler:
+    """
+    周期采样本进程 RSS 与线程数，取峰值
+    """
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_threads = 0
+        self.peak_py_threads = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loadtest-sampler", daemon=True)
+
+    @staticmethod
+    def read() -> Tuple[int, int]:
+        """
+        返回 (RSS 字节数, 操作系统线程数)；无 /proc 时用 ru_maxrss 和 Python 线程数近似
+        """
+        try:
+            rss = threads = 0
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss = int(line.split()[1]) * 1024
+                    elif line.startswith("Threads:"):
+                        threads = int(line.split()[1])
+            return rss, threads
+        except OSError:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, threading.active_count()
+
+    def _sample(self):
+        rss, threads = self.read()
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_threads = max(self.peak_threads, threads)
+        self.peak_py_threads = max(self.peak_py_threads, threading.active_count())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _build(site: str, store: _Store, transport_class: type, index: int):
+    module, name = SITES[site]
+    plugin_class = getattr(importlib.import_module(module), name)
+    if site == "deepflood":
+        config = {"enabled": True, "cookie": f"session=synthetic{index}", "notify": False, "cron": "0 8 * * *",
+                  "use_proxy": False, "verify_ssl": False, "max_retries": 0, "history_days": 30}
+    else:
+        config = {"enabled": True, "cookie": f"auth=synthetic{index}", "notify": False, "cron": "0 9 * * *",
+                  "use_proxy": False}
+    plugin = _harness(plugin_class, store)()
+    plugin.init_plugin(config)
+    _kit(site).release_transport(plugin._transport)
+    plugin._transport = transport_class()
+    return plugin
+
+
+def _run_one(site: str, plugin) -> Tuple[float, bool]:
+    start = time.perf_counter()
+    if site == "deepflood":
+        result = plugin.sign()
+        ok = "成功" in ((result or {}).get("status") or "")
+    else:
+        ok = plugin.sign_in() == "success"
+    return time.perf_counter() - start, ok
+
+
+def _drain_background(site: str, timeout: float = 300):
+    """
+    后台任务为单线程 FIFO，排入一个空任务并等它完成即可确认之前的补充任务都已执行
+    """
+    future = _kit(site).background.submit(f"loadtest_drain_{time.monotonic()}", lambda: None)
+    if future is not None:
+        future.result(timeout=timeout)
+
+
+def run_level(site: str, accounts: int, concurrency: int, base_url: str) -> Dict[str, Any]:
+    store = _Store()
+    transport_class = _rewrite_transport(base_url, site)
+    plugins = [_build(site, store, transport_class, i) for i in range(accounts)]
+    # 初始化阶段的写入与任务注册单独统计
+    init_writes, init_bytes, jobs = store.writes, store.bytes, store.jobs
+    latencies: List[float] = []
+    failures = 0
+    with _Sampler() as sampler:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadtest") as pool:
+            for elapsed, ok in pool.map(lambda p: _run_one(site, p), plugins):
+                latencies.append(elapsed)
+                failures += 0 if ok else 1
+        sign_elapsed = time.perf_counter() - start
+        _drain_background(site)
+        total_elapsed = time.perf_counter() - start
+    for plugin in plugins:
+        plugin.stop_service()
+    latencies.sort()
+
+    def pct(q: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))] * 1000, 1)
+
+    writes, written = store.writes - init_writes, store.bytes - init_bytes
+    return {
+        "accounts": accounts,
+        "failures": failures,
+        "acct_per_s": round(accounts / sign_elapsed, 1),
+        "p50_ms": pct(0.5),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "with_bg_s": round(total_elapsed, 2),
+        "requests": transport_class.requests_sent,
+        "peak_rss_mb": round(sampler.peak_rss / 1024 / 1024, 1),
+        "peak_threads": sampler.peak_threads,
+        "py_threads": sampler.peak_py_threads,
+        "writes": writes,
+        "write_kb": round(written / 1024, 1),
+        "kb_per_acct": round(written / 1024 / accounts, 2),
+        "jobs": jobs,
+    }
+
+
+def run(accounts: List[int], concurrency: int = 8, sites: Tuple[str, ...] = tuple(SITES), delay: float = 0.02,
+        rate: float = 1000) -> Dict[str, Dict[str, Any]]:
+    proc, base_url = _start_stub(delay)
+    try:
+        for site in sites:
+            _kit(site).admission.configure(urlsplit(base_url).hostname, rate=rate, burst=max(1, int(rate)))
+        rss, threads = _Sampler.read()
+        results = {"基线": {"rss_mb": round(rss / 1024 / 1024, 1), "threads": threads}}
+        for site in sites:
+            for count in accounts:
+                results[f"{site} x{count}"] = run_level(site, count, concurrency, base_url)
+        return results
+    finally:
+        proc.terminate()
+
+
+def parse_args(argv: List[str]) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    for item in argv:
+        if "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        if key == "accounts":
+            options[key] = [int(v) for v in value.split(",") if v]
+        elif key == "sites":
+            options[key] = tuple(v for v in value.split(",") if v in SITES)
+        elif key == "concurrency":
+            options[key] = int(value)
+        elif key in ("delay", "rate"):
+            options[key] = float(value)
+    options.setdefault("accounts", [10, 100, 1000])
+    return options
+
+
+def main(argv: Optional[List[str]] = None):
+    options = parse_args(argv or [])
+    results = run(**options)
+    print(f"== 多账号压测 concurrency={options.get('concurrency', 8)}")
+    for name, item in results.items():
+        print(f"  {name:<18} " + "  ".join(f"{k}={v}" for k, v in item.items()))